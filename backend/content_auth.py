@@ -3,8 +3,15 @@ import hashlib
 import json
 import uuid
 import sys
+import threading
+from collections import OrderedDict
+from contextlib import redirect_stdout
 from datetime import datetime, timezone
-from typing import Dict, Any, Optional, TypedDict
+from typing import Callable, Dict, Any, Optional, Tuple, TypedDict
+
+from file_hashing import hash_file
+
+HASH_CACHE_MAX_ENTRIES = 4096
 
 class CertificateContent(TypedDict):
     file_name: str
@@ -79,20 +86,63 @@ class CertificateDict(TypedDict):
     certificate_signature: str
 
 
+class ContentHashCache:
+    """
+    Content hashes keyed by (path, size, mtime_ns), shared between the
+    authenticator and the watermarker in service mode so one read of a file
+    serves signing, watermarking and certification.
+    """
+
+    def __init__(self, hasher: Callable[[str], CertificateHashes],
+                 max_entries: int = HASH_CACHE_MAX_ENTRIES):
+        self.hasher = hasher
+        self.max_entries = max_entries
+        self.entries: OrderedDict[Tuple[str, int, int], CertificateHashes] = OrderedDict()
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def file_key(file_path: str) -> Tuple[str, int, int]:
+        stat = os.stat(file_path)
+        return os.path.abspath(file_path), stat.st_size, stat.st_mtime_ns
+
+    def get(self, file_path: str) -> CertificateHashes:
+        key = self.file_key(file_path)
+        with self.lock:
+            hashes = self.entries.get(key)
+            if hashes is not None:
+                self.entries.move_to_end(key)
+                self.hits += 1
+                return hashes
+            self.misses += 1
+        hashes = self.hasher(file_path)
+        # A file rewritten while it was being hashed must not be cached
+        # under its old key.
+        if self.file_key(file_path) == key:
+            with self.lock:
+                self.entries[key] = hashes
+                if len(self.entries) > self.max_entries:
+                    self.entries.popitem(last=False)
+        return hashes
+
+    def stats(self) -> Dict[str, int]:
+        with self.lock:
+            return {'entries': len(self.entries), 'hits': self.hits, 'misses': self.misses}
+
+
 class ContentAuthenticator:
-    def compute_content_hash(self, file_path: str) -> CertificateHashes:
-        sha256_hash = hashlib.sha256()
-        sha512_hash = hashlib.sha512()
-        md5_hash = hashlib.md5()
-        with open(file_path, 'rb') as f:
-            for chunk in iter(lambda: f.read(4096), b""):
-                sha256_hash.update(chunk)
-                sha512_hash.update(chunk)
-                md5_hash.update(chunk)
+    def content_hash(self, file_path: str) -> CertificateHashes:
+        if self.hash_cache is not None:
+            return self.hash_cache.get(file_path)
+        return self.compute_content_hash(file_path)
+
+    def compute_content_hash(self, file_path: str, parallel: Optional[bool] = None) -> CertificateHashes:
+        hashes = hash_file(file_path, ('sha256', 'sha512', 'md5'), parallel)
         return {
-            'sha256': sha256_hash.hexdigest(),
-            'sha512': sha512_hash.hexdigest(),
-            'md5': md5_hash.hexdigest(),
+            'sha256': hashes['sha256'],
+            'sha512': hashes['sha512'],
+            'md5': hashes['md5'],
             'algorithm': 'SHA-256, SHA-512, MD5'
         }
 
@@ -104,8 +154,9 @@ class ContentAuthenticator:
         signature = hashlib.sha512(signature_input.encode()).hexdigest()
         return signature
 
-    def __init__(self, app_version: str = "1.0.0"):
+    def __init__(self, app_version: str = "1.0.0", hash_cache: Optional[ContentHashCache] = None):
         self.app_version = app_version
+        self.hash_cache = hash_cache
         self.config_path = os.path.join(
             os.path.expanduser('~'), '.openelara', 'auth_config.json'
         )
@@ -136,7 +187,7 @@ class ContentAuthenticator:
         generation_params: Dict[str, Any]
     ) -> CertificateDict:
         timestamp = datetime.now(timezone.utc)
-        content_hashes = self.compute_content_hash(content_path)
+        content_hashes = self.content_hash(content_path)
         file_stats = os.stat(content_path)
         file_size = file_stats.st_size
         provenance_id = str(uuid.uuid4())
@@ -256,7 +307,8 @@ class ContentAuthenticator:
             result['certificate_valid'] = False
         else:
             result['certificate_valid'] = True
-        # 2. Verify content hashes
+        # 2. Verify content hashes (never from the cache: a same-size edit
+        # with a restored mtime would otherwise verify as untouched)
         try:
             current_hashes = self.compute_content_hash(content_path)
         except FileNotFoundError:
@@ -332,6 +384,122 @@ class ContentAuthenticator:
         return "\n".join(lines)
 
 
+def generate_certificate_files(
+    authenticator: ContentAuthenticator,
+    file_path: str,
+    model_info: Dict[str, Any],
+    generation_params: Dict[str, Any]
+) -> Dict[str, Any]:
+    # Determine content type
+    ext = os.path.splitext(file_path)[1].lower()
+    content_type = 'image' if ext in ['.png', '.jpg', '.jpeg', '.webp'] else 'video'
+    
+    # Generate certificate
+    certificate = authenticator.generate_certificate(
+        file_path, content_type, model_info, generation_params
+    )
+    
+    # Save certificate
+    cert_path = authenticator.save_certificate(file_path, certificate)
+    
+    # Save human-readable version
+    readable_path = file_path + '.certificate.txt'
+    try:
+        with open(readable_path, 'w', encoding='utf-8') as f:
+            f.write(authenticator.generate_human_readable_certificate(certificate))
+    except IOError as e:
+        print(f"Error saving human-readable certificate: {e}")
+    
+    return {
+        'success': True,
+        'certificate_path': cert_path,
+        'readable_path': readable_path,
+        'certificate_id': certificate['certificate_id']
+    }
+
+
+WATERMARK_ACTIONS = {
+    'watermark': 'watermark',
+    'watermark_batch': 'watermark_batch',
+    'verify_batch': 'verify_batch',
+    'verify_watermark': 'verify'
+}
+
+
+def handle_service_request(
+    authenticator: ContentAuthenticator,
+    watermarker: Any,
+    request: Dict[str, Any]
+) -> Dict[str, Any]:
+    action = request.get('action')
+    
+    if action == 'generate':
+        return generate_certificate_files(
+            authenticator,
+            request['content_path'],
+            request.get('model_info', {}),
+            request.get('generation_params', {})
+        )
+    if action == 'verify':
+        result = authenticator.verify_content(request['content_path'], request.get('certificate_path'))
+        return {'success': True, **result}
+    if action == 'view':
+        with open(request['certificate_path'], 'r', encoding='utf-8') as f:
+            certificate = json.load(f)
+        return {'success': True, 'text': authenticator.generate_human_readable_certificate(certificate)}
+    if action in WATERMARK_ACTIONS:
+        from content_watermark import run_action
+        return run_action(watermarker, {**request, 'action': WATERMARK_ACTIONS[action]})
+    if action == 'stats':
+        return {'success': True, 'hash_cache': authenticator.hash_cache.stats()}
+    if action == 'shutdown':
+        return {'success': True}
+    return {'success': False, 'error': f'Unknown action: {action}'}
+
+
+def serve() -> None:
+    """
+    Long-lived mode: one JSON request per stdin line, one JSON response per
+    stdout line (echoing the request's "id"). The authenticator, the
+    watermarker and their shared hash cache stay warm between requests.
+    Diagnostic prints from the handlers go to stderr.
+    """
+    from content_watermark import ContentWatermark
+
+    authenticator = ContentAuthenticator()
+    hash_cache = ContentHashCache(authenticator.compute_content_hash)
+    authenticator.hash_cache = hash_cache
+    watermarker = ContentWatermark(hash_cache=hash_cache)
+    out = sys.stdout
+
+    for line in sys.stdin:
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            request = json.loads(line)
+        except json.JSONDecodeError as e:
+            out.write(json.dumps({'success': False, 'error': f'Invalid JSON request: {e}'}) + '\n')
+            out.flush()
+            continue
+        if not isinstance(request, dict):
+            out.write(json.dumps({'success': False, 'error': 'Invalid request: expected a JSON object'}) + '\n')
+            out.flush()
+            continue
+        
+        try:
+            with redirect_stdout(sys.stderr):
+                response = handle_service_request(authenticator, watermarker, request)
+        except Exception as e:
+            response = {'success': False, 'error': str(e)}
+        response['id'] = request.get('id')
+        out.write(json.dumps(response) + '\n')
+        out.flush()
+        
+        if request.get('action') == 'shutdown':
+            break
+
+
 def main():
     if len(sys.argv) < 2:
         print("OpenElara Content Authentication System")
@@ -339,9 +507,14 @@ def main():
         print("  Generate: python content_auth.py generate <file> <model_info_json> <params_json>")
         print("  Verify:   python content_auth.py verify <file> [certificate_file]")
         print("  View:     python content_auth.py view <certificate_file>")
+        print("  Service:  python content_auth.py serve  (JSON lines on stdin/stdout)")
         return
     
     action = sys.argv[1]
+    if action == 'serve':
+        serve()
+        return
+    
     authenticator = ContentAuthenticator()
     
     if action == 'generate' and len(sys.argv) >= 5:
@@ -353,36 +526,12 @@ def main():
             print(f"Error decoding JSON input: {e}")
             return
         
-        # Determine content type
-        ext = os.path.splitext(file_path)[1].lower()
-        content_type = 'image' if ext in ['.png', '.jpg', '.jpeg', '.webp'] else 'video'
-        
         try:
-            # Generate certificate
-            certificate = authenticator.generate_certificate(
-                file_path, content_type, model_info, generation_params
-            )
+            result = generate_certificate_files(authenticator, file_path, model_info, generation_params)
         except FileNotFoundError:
             print(f"Error: Content file not found at {file_path}")
             return
-        
-        # Save certificate
-        cert_path = authenticator.save_certificate(file_path, certificate)
-        
-        # Save human-readable version
-        readable_path = file_path + '.certificate.txt'
-        try:
-            with open(readable_path, 'w', encoding='utf-8') as f:
-                f.write(authenticator.generate_human_readable_certificate(certificate))
-        except IOError as e:
-            print(f"Error saving human-readable certificate: {e}")
-            
-        print(json.dumps({
-            'success': True,
-            'certificate_path': cert_path,
-            'readable_path': readable_path,
-            'certificate_id': certificate['certificate_id']
-        }))
+        print(json.dumps(result))
     
     elif action == 'verify' and len(sys.argv) >= 3:
         file_path = sys.argv[2]
@@ -2,17 +2,36 @@ import subprocess
 import os
 import hashlib
 import json
+import time
 import uuid
 import sys
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime
-from typing import Dict, Optional, Any
+from typing import Dict, List, Optional, Any, Tuple
 from PIL import Image
-from PIL.PngImagePlugin import PngInfo
+
+from file_hashing import hash_file
+from media_metadata import (
+    detect_image_format, read_mp4_tags, write_jpeg_exif, write_mp4_tags, write_png_text_chunks
+)
+from provenance_index import ProvenanceIndex
+
+
+BATCH_EXTENSIONS = {
+    '.png': 'image', '.jpg': 'image', '.jpeg': 'image', '.webp': 'image',
+    '.mp4': 'video', '.mov': 'video'
+}
+VERIFY_EXTENSIONS = set(BATCH_EXTENSIONS) | {'.avi', '.mkv'}
+MP4_EXTENSIONS = ('.mp4', '.mov')
+INDEX_COMMIT_INTERVAL = 500
 
 
 class ContentWatermark:
-    def __init__(self, config_path: Optional[str] = None, app_version: str = "1.0.0"):
+    def __init__(self, config_path: Optional[str] = None, app_version: str = "1.0.0",
+                 hash_cache: Optional[Any] = None):
         self.app_version = app_version
+        # Optional content_auth.ContentHashCache shared with the authenticator.
+        self.hash_cache = hash_cache
         self.config_path = config_path if config_path is not None else os.path.join(
             os.path.expanduser('~'), '.openelara', 'watermark_config.json'
         )
@@ -36,8 +55,19 @@ class ContentWatermark:
         return installation_id
 
     def generate_content_signature(self, content_type: str, content_data: bytes) -> str:
-        timestamp = datetime.now().isoformat()
         content_hash = hashlib.sha256(content_data).hexdigest()
+        return self._signature_from_hash(content_type, content_hash)
+
+    def generate_file_signature(self, content_type: str, content_path: str) -> str:
+        return self._signature_from_hash(content_type, self.compute_file_hash(content_path))
+
+    def compute_file_hash(self, content_path: str) -> str:
+        if self.hash_cache is not None:
+            return self.hash_cache.get(content_path)['sha256']
+        return hash_file(content_path)['sha256']
+
+    def _signature_from_hash(self, content_type: str, content_hash: str) -> str:
+        timestamp = datetime.now().isoformat()
         context = f"{self.installation_id}:{timestamp}:{content_type}"
         context_hash = hashlib.sha256(context.encode()).hexdigest()
         signature = hashlib.sha256(
@@ -93,29 +123,43 @@ class ContentWatermark:
         }
         return mime_types.get(ext, 'application/octet-stream')
 
+    def _video_tags(self, metadata: Dict[str, Any]) -> Dict[str, str]:
+        return {
+            'title': 'AI Generated Content - OpenElara',
+            'artist': f'OpenElara v{str(metadata["version"])}',
+            'comment': str(metadata["notice"]),
+            'description': f'AI-generated content with OpenElara. Metadata: {json.dumps(metadata)}',
+            'date': str(metadata["generated_at"]),
+            'encoder': f'OpenElara v{str(metadata["version"])}',
+            'copyright': 'Generated with OpenElara - AI Content Assistant',
+            'genre': 'AI Generated',
+            'composer': 'OpenElara AI System',
+            'openelara_signature': str(metadata["content_signature"]),
+            'openelara_model': str(metadata["model"]["name"]),
+            'openelara_provider': str(metadata["model"]["provider"]),
+            'openelara_provenance': str(metadata["provenance_id"]),
+            'openelara_installation': str(metadata["installation_id"]),
+            'openelara_content_type': str(metadata["content_type"]),
+        }
+
     def embed_metadata_in_video(self, video_path: str, metadata: Dict[str, Any]) -> bool:
+        video_tags = self._video_tags(metadata)
+        
+        if video_path.lower().endswith(MP4_EXTENSIONS):
+            try:
+                if write_mp4_tags(video_path, video_tags):
+                    print(f"Successfully embedded metadata in video (moov rewrite): {video_path}")
+                    return True
+                print(f"No room to rewrite moov in place, remuxing with ffmpeg: {video_path}")
+            except Exception as e:
+                print(f"Atom rewrite failed for {video_path}, remuxing with ffmpeg: {e}")
+        
         try:
             metadata_file = video_path + '.metadata.txt'
             with open(metadata_file, 'w', encoding='utf-8') as f:
                 f.write(';FFMETADATA1\n')
-                
-                f.write(f'title=AI Generated Content - OpenElara\n')
-                f.write(f'artist=OpenElara v{str(metadata["version"])}\n')
-                f.write(f'comment={str(metadata["notice"])}\n')
-                f.write(f'description=AI-generated content with OpenElara. Metadata: {json.dumps(metadata)}\n')
-                f.write(f'date={str(metadata["generated_at"])}\n')
-                f.write(f'encoder=OpenElara v{str(metadata["version"])}\n')
-                f.write(f'copyright=Generated with OpenElara - AI Content Assistant\n')
-                f.write(f'genre=AI Generated\n')
-                f.write(f'composer=OpenElara AI System\n')
-                
-                
-                f.write(f'openelara_signature={str(metadata["content_signature"])}\n')
-                f.write(f'openelara_model={str(metadata["model"]["name"])}\n')
-                f.write(f'openelara_provider={str(metadata["model"]["provider"])}\n')
-                f.write(f'openelara_provenance={str(metadata["provenance_id"])}\n')
-                f.write(f'openelara_installation={str(metadata["installation_id"])}\n')
-                f.write(f'openelara_content_type={str(metadata["content_type"])}\n')
+                for key, value in video_tags.items():
+                    f.write(f'{key}={value}\n')
             
             temp_output = video_path + '.watermarked.mp4'
             
@@ -148,61 +192,41 @@ class ContentWatermark:
             print(f"Error embedding metadata in video {video_path}: {e}")
             return False
 
+    def _png_text_items(self, metadata: Dict[str, Any]) -> List[Tuple[str, str]]:
+        return [
+            ('OpenElara:Generator', str(metadata['generator'])),
+            ('OpenElara:Version', str(metadata['version'])),
+            ('OpenElara:GeneratedAt', str(metadata['generated_at'])),
+            ('OpenElara:Model', str(metadata['model']['name'])),
+            ('OpenElara:Provider', str(metadata['model']['provider'])),
+            ('OpenElara:Signature', str(metadata['content_signature'])),
+            ('OpenElara:Notice', str(metadata['notice'])),
+            ('OpenElara:ProvenanceID', str(metadata['provenance_id'])),
+            ('OpenElara:Metadata', json.dumps(metadata)),
+        ]
+
+    def _jpeg_exif_bytes(self, image_path: str, metadata: Dict[str, Any]) -> bytes:
+        # Opening only parses the headers; the scan data is never decoded
+        with Image.open(image_path) as img:
+            exif_dict = img.getexif()
+        exif_dict[0x9286] = json.dumps(metadata)
+        exif_dict[0x0131] = f"OpenElara {metadata['version']}"
+        exif_dict[0x013B] = "AI Generated - OpenElara"
+        exif_dict[0x8298] = str(metadata['notice'])
+        return exif_dict.tobytes()
+
     def embed_metadata_in_image(self, image_path: str, metadata: Dict[str, Any]) -> bool:
         try:
-            img = Image.open(image_path)
-            
-            file_ext = os.path.splitext(image_path)[1].lower()
+            img_format = detect_image_format(image_path)
             
-            if file_ext in ('.png',):
-                
-                png_info = PngInfo()
-                png_info.add_text('OpenElara:Generator', str(metadata['generator']))  # type: ignore
-                png_info.add_text('OpenElara:Version', str(metadata['version']))  # type: ignore
-                png_info.add_text('OpenElara:GeneratedAt', str(metadata['generated_at']))  # type: ignore
-                png_info.add_text('OpenElara:Model', str(metadata['model']['name']))  # type: ignore
-                png_info.add_text('OpenElara:Provider', str(metadata['model']['provider']))  # type: ignore
-                png_info.add_text('OpenElara:Signature', str(metadata['content_signature']))  # type: ignore
-                png_info.add_text('OpenElara:Notice', str(metadata['notice']))  # type: ignore
-                png_info.add_text('OpenElara:ProvenanceID', str(metadata['provenance_id']))  # type: ignore
-                png_info.add_text('OpenElara:Metadata', json.dumps(metadata))  # type: ignore
-                img.save(image_path, format='PNG', pnginfo=png_info)
+            if img_format == 'PNG':
+                write_png_text_chunks(image_path, self._png_text_items(metadata))
                 return True
-            elif file_ext in ('.jpg', '.jpeg'):
-                
-                exif_dict = img.getexif()
-                exif_dict[0x9286] = json.dumps(metadata)
-                exif_dict[0x0131] = f"OpenElara {metadata['version']}"
-                exif_dict[0x013B] = "AI Generated - OpenElara"
-                exif_dict[0x8298] = str(metadata['notice'])
-                img.save(image_path, format='JPEG', exif=exif_dict, quality=95)
+            elif img_format == 'JPEG':
+                write_jpeg_exif(image_path, self._jpeg_exif_bytes(image_path, metadata))
                 return True
             else:
-                
-                img_format = img.format
-                if img_format == 'PNG':
-                    png_info = PngInfo()
-                    png_info.add_text('OpenElara:Generator', str(metadata['generator']))  # type: ignore
-                    png_info.add_text('OpenElara:Version', str(metadata['version']))  # type: ignore
-                    png_info.add_text('OpenElara:GeneratedAt', str(metadata['generated_at']))  # type: ignore
-                    png_info.add_text('OpenElara:Model', str(metadata['model']['name']))  # type: ignore
-                    png_info.add_text('OpenElara:Provider', str(metadata['model']['provider']))  # type: ignore
-                    png_info.add_text('OpenElara:Signature', str(metadata['content_signature']))  # type: ignore
-                    png_info.add_text('OpenElara:Notice', str(metadata['notice']))  # type: ignore
-                    png_info.add_text('OpenElara:ProvenanceID', str(metadata['provenance_id']))  # type: ignore
-                    png_info.add_text('OpenElara:Metadata', json.dumps(metadata))  # type: ignore
-                    img.save(image_path, format='PNG', pnginfo=png_info)
-                    return True
-                elif img_format == 'JPEG':
-                    exif_dict = img.getexif()
-                    exif_dict[0x9286] = json.dumps(metadata)
-                    exif_dict[0x0131] = f"OpenElara {metadata['version']}"
-                    exif_dict[0x013B] = "AI Generated - OpenElara"
-                    exif_dict[0x8298] = str(metadata['notice'])
-                    img.save(image_path, format='JPEG', exif=exif_dict, quality=95)
-                    return True
-                else:
-                    return False
+                return False
         except Exception as e:
             print(f"Error embedding metadata in image {image_path}: {e}")
             return False
@@ -226,9 +250,7 @@ class ContentWatermark:
             embed_in_file: bool = True,
             use_c2pa: bool = True) -> Dict[str, Any]:
         print(f"Starting watermark_content for {content_path} with content_type: {content_type}")
-        with open(content_path, 'rb') as f:
-            content_data = f.read()
-        signature = self.generate_content_signature(content_type, content_data)
+        signature = self.generate_file_signature(content_type, content_path)
         metadata = self.create_watermark_metadata(
             content_type=content_type,
             model_info=model_info,
@@ -252,6 +274,142 @@ class ContentWatermark:
         print(f"Sidecar file created at: {sidecar_path}")
         return metadata
 
+    def watermark_directory(self,
+            directory: str,
+            model_info: Dict[str, Any],
+            generation_params: Dict[str, Any],
+            recursive: bool = False,
+            max_workers: Optional[int] = None) -> Dict[str, Any]:
+        content_paths: List[str] = []
+        for root, dirs, files in os.walk(directory):
+            for name in sorted(files):
+                if os.path.splitext(name)[1].lower() in BATCH_EXTENSIONS:
+                    content_paths.append(os.path.join(root, name))
+            if not recursive:
+                break
+            dirs.sort()
+
+        results: Dict[str, Any] = {
+            'success': True,
+            'watermarked': [],
+            'failed': [],
+            'total': len(content_paths)
+        }
+        total_bytes = 0
+        started = time.perf_counter()
+
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures = {}
+            for content_path in content_paths:
+                content_type = BATCH_EXTENSIONS[os.path.splitext(content_path)[1].lower()]
+                future = executor.submit(
+                    self._size_and_watermark, content_path, content_type, model_info, generation_params
+                )
+                futures[future] = content_path
+
+            for future in as_completed(futures):
+                content_path = futures[future]
+                try:
+                    size, metadata = future.result()
+                    results['watermarked'].append({
+                        'file': content_path,
+                        'provenance_id': metadata['provenance_id']
+                    })
+                    total_bytes += size
+                except Exception as e:
+                    results['failed'].append({'file': content_path, 'error': str(e)})
+                    results['success'] = False
+
+        elapsed = time.perf_counter() - started
+        results['watermarked'].sort(key=lambda item: item['file'])
+        results['failed'].sort(key=lambda item: item['file'])
+        results['bytes_processed'] = total_bytes
+        results['elapsed_seconds'] = round(elapsed, 3)
+        results['mb_per_second'] = round(total_bytes / (1024 * 1024) / elapsed, 2) if elapsed > 0 else 0.0
+        return results
+
+    def _size_and_watermark(self, content_path: str, content_type: str, model_info: Dict[str, Any],
+            generation_params: Dict[str, Any]) -> Tuple[int, Dict[str, Any]]:
+        size = os.path.getsize(content_path)
+        return size, self.watermark_content(content_path, content_type, model_info, generation_params)
+
+    def _verify_and_hash(self, content_path: str) -> Tuple[str, Optional[Dict[str, Any]]]:
+        return self.compute_file_hash(content_path), self.verify_watermark(content_path)
+
+    def verify_directory(self,
+            directory: str,
+            recursive: bool = True,
+            max_workers: Optional[int] = None,
+            index_path: Optional[str] = None) -> Dict[str, Any]:
+        if index_path is None:
+            index_path = os.path.join(os.path.dirname(self.config_path), 'provenance_index.db')
+        index = ProvenanceIndex(index_path)
+
+        results: Dict[str, Any] = {
+            'success': True,
+            'verified': [],
+            'unverified': [],
+            'failed': [],
+            'total': 0,
+            'index_hits': 0,
+            'index_path': index_path
+        }
+
+        def record(content_path: str, content_hash: str, metadata: Optional[Dict[str, Any]]) -> None:
+            if metadata:
+                results['verified'].append({
+                    'file': content_path,
+                    'content_hash': content_hash,
+                    'provenance_id': metadata.get('provenance_id')
+                })
+            else:
+                results['unverified'].append({'file': content_path, 'content_hash': content_hash})
+
+        started = time.perf_counter()
+        try:
+            with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                futures = {}
+                for root, dirs, files in os.walk(directory):
+                    dirs.sort()
+                    for name in sorted(files):
+                        if os.path.splitext(name)[1].lower() not in VERIFY_EXTENSIONS:
+                            continue
+                        content_path = os.path.join(root, name)
+                        results['total'] += 1
+                        try:
+                            key = ProvenanceIndex.file_key(content_path)
+                        except OSError as e:
+                            results['failed'].append({'file': content_path, 'error': str(e)})
+                            continue
+                        cached = index.lookup(content_path, key)
+                        if cached is not None:
+                            results['index_hits'] += 1
+                            record(content_path, cached['content_hash'], cached['metadata'])
+                            continue
+                        futures[executor.submit(self._verify_and_hash, content_path)] = (content_path, key)
+                    if not recursive:
+                        break
+
+                for done, future in enumerate(as_completed(futures), 1):
+                    content_path, key = futures[future]
+                    try:
+                        content_hash, metadata = future.result()
+                    except Exception as e:
+                        results['failed'].append({'file': content_path, 'error': str(e)})
+                        continue
+                    index.store(content_path, key, content_hash, metadata)
+                    record(content_path, content_hash, metadata)
+                    if done % INDEX_COMMIT_INTERVAL == 0:
+                        index.commit()
+        finally:
+            index.close()
+
+        for bucket in ('verified', 'unverified', 'failed'):
+            results[bucket].sort(key=lambda item: item['file'])
+        results['success'] = not results['failed']
+        results['elapsed_seconds'] = round(time.perf_counter() - started, 3)
+        return results
+
     def verify_watermark(self, content_path: str) -> Optional[Dict[str, Any]]:
         
         sidecar_path = content_path + '.openelara.json'
@@ -289,12 +447,20 @@ class ContentWatermark:
         try:
             if content_path.lower().endswith(('.mp4', '.mov', '.avi', '.mkv')):
                 
-                result = subprocess.run(['ffprobe', '-v', 'quiet', '-print_format', 'json', '-show_format', '-show_streams', content_path], capture_output=True, text=True)
-                if result.returncode == 0:
-                    probe_data = json.loads(result.stdout)
-                    format_tags = probe_data.get('format', {}).get('tags', {})
-                    
-                    
+                format_tags: Optional[Dict[str, str]] = None
+                if content_path.lower().endswith(MP4_EXTENSIONS):
+                    try:
+                        format_tags = read_mp4_tags(content_path)
+                    except Exception as e:
+                        print(f"Atom read failed for {content_path}, falling back to ffprobe: {e}")
+                if format_tags is None:
+                    result = subprocess.run(['ffprobe', '-v', 'quiet', '-print_format', 'json', '-show_format', '-show_streams', content_path], capture_output=True, text=True)
+                    if result.returncode == 0:
+                        probe_data = json.loads(result.stdout)
+                        format_tags = probe_data.get('format', {}).get('tags', {})
+                    else:
+                        print(f"ffprobe failed for {content_path}: {result.stderr}")
+                if format_tags is not None:
                     print(f"Video format tags: {format_tags}")
 
                     for key, value in format_tags.items():
@@ -341,15 +507,91 @@ class ContentWatermark:
                             'content_type': format_tags.get('openelara_content_type', 'video')
                         }
                         return metadata
-                        
-                else:
-                    print(f"ffprobe failed for {content_path}: {result.stderr}")
         except Exception as e:
             print(f"Error checking video metadata for {content_path}: {e}")
             pass
         
         return None
 
+def run_action(watermarker: ContentWatermark, input_data: Dict[str, Any]) -> Dict[str, Any]:
+    action = input_data.get('action')
+    print(f"Action: {action}")
+
+    if action == 'watermark':
+        content_path = input_data['content_path']
+        metadata_input = input_data['metadata']
+        use_c2pa = input_data.get('use_c2pa', True)
+        
+        content_type = metadata_input.get('content_type', 'unknown')
+        model_info = metadata_input.get('model_info', {})
+        generation_params = metadata_input.get('generation_params', {})
+        
+        print(f"Watermarking content: {content_path}")
+        print(f"Content type: {content_type}")
+        print(f"Model info: {model_info}")
+        print(f"Generation params: {generation_params}")
+        
+        result_metadata = watermarker.watermark_content(
+            content_path=content_path,
+            content_type=content_type,
+            model_info=model_info,
+            generation_params=generation_params,
+            embed_in_file=True,
+            use_c2pa=use_c2pa
+        )
+        
+        print(f"Watermarking completed successfully")
+        return {
+            'success': True,
+            'metadata': result_metadata
+        }
+        
+    elif action == 'watermark_batch':
+        metadata_input = input_data.get('metadata', {})
+        result = watermarker.watermark_directory(
+            directory=input_data['directory'],
+            model_info=metadata_input.get('model_info', {}),
+            generation_params=metadata_input.get('generation_params', {}),
+            recursive=input_data.get('recursive', False),
+            max_workers=input_data.get('max_workers')
+        )
+        print(f"Batch watermarking completed: {len(result['watermarked'])}/{result['total']} files "
+              f"at {result['mb_per_second']} MB/s")
+        return result
+
+    elif action == 'verify_batch':
+        result = watermarker.verify_directory(
+            directory=input_data['directory'],
+            recursive=input_data.get('recursive', True),
+            max_workers=input_data.get('max_workers'),
+            index_path=input_data.get('index_path')
+        )
+        print(f"Batch verification completed: {len(result['verified'])}/{result['total']} verified, "
+              f"{result['index_hits']} from index")
+        return result
+
+    elif action == 'verify':
+        content_path = input_data['content_path']
+        metadata = watermarker.verify_watermark(content_path)
+        
+        if metadata:
+            return {
+                'success': True,
+                'verified': True,
+                'metadata': metadata
+            }
+        return {
+            'success': True,
+            'verified': False,
+            'message': 'No watermark found'
+        }
+
+    return {
+        'success': False,
+        'error': f'Unknown action: {action}'
+    }
+
+
 def main():
     if len(sys.argv) < 2:
         print("OpenElara Content Watermarking System")
@@ -359,61 +601,8 @@ def main():
     try:
         print(f"Received input: {sys.argv[1]}")
         input_data = json.loads(sys.argv[1])
-        action = input_data.get('action')
-        print(f"Action: {action}")
-        
         watermarker = ContentWatermark()
-        
-        if action == 'watermark':
-            content_path = input_data['content_path']
-            metadata_input = input_data['metadata']
-            use_c2pa = input_data.get('use_c2pa', True)
-            
-            content_type = metadata_input.get('content_type', 'unknown')
-            model_info = metadata_input.get('model_info', {})
-            generation_params = metadata_input.get('generation_params', {})
-            
-            print(f"Watermarking content: {content_path}")
-            print(f"Content type: {content_type}")
-            print(f"Model info: {model_info}")
-            print(f"Generation params: {generation_params}")
-            
-            result_metadata = watermarker.watermark_content(
-                content_path=content_path,
-                content_type=content_type,
-                model_info=model_info,
-                generation_params=generation_params,
-                embed_in_file=True,
-                use_c2pa=use_c2pa
-            )
-            
-            print(f"Watermarking completed successfully")
-            print(json.dumps({
-                'success': True,
-                'metadata': result_metadata
-            }))
-            
-        elif action == 'verify':
-            content_path = input_data['content_path']
-            metadata = watermarker.verify_watermark(content_path)
-            
-            if metadata:
-                print(json.dumps({
-                    'success': True,
-                    'verified': True,
-                    'metadata': metadata
-                }))
-            else:
-                print(json.dumps({
-                    'success': True,
-                    'verified': False,
-                    'message': 'No watermark found'
-                }))
-        else:
-            print(json.dumps({
-                'success': False,
-                'error': f'Unknown action: {action}'
-            }))
+        print(json.dumps(run_action(watermarker, input_data)))
             
     except Exception as e:
         print(json.dumps({
@@ -424,4 +613,4 @@ def main():
 
 
 if __name__ == '__main__':
-    main()
\ No newline at end of file
+    main()
@@ -0,0 +1,75 @@
+import hashlib
+import mmap
+import os
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+from typing import Any, Dict, List, Optional, Sequence
+
+HASH_BUFFER_SIZE = 4 * 1024 * 1024
+PARALLEL_HASH_MIN_SIZE = 32 * 1024 * 1024
+MMAP_HASH_MIN_SIZE = 256 * 1024 * 1024
+
+
+def hash_file(file_path: str, algorithms: Sequence[str] = ('sha256',),
+              parallel: Optional[bool] = None) -> Dict[str, str]:
+    """
+    Hex digests of one file for each hashlib algorithm name, from a single
+    pass over the data. Files of PARALLEL_HASH_MIN_SIZE and up hash each
+    digest on its own thread while the next block is read; files of
+    MMAP_HASH_MIN_SIZE and up are memory-mapped instead of read into
+    buffers.
+    """
+    digests = [hashlib.new(name) for name in algorithms]
+    with open(file_path, 'rb') as f:
+        size = os.fstat(f.fileno()).st_size
+        if parallel is None:
+            parallel = size >= PARALLEL_HASH_MIN_SIZE
+        if size >= MMAP_HASH_MIN_SIZE:
+            _hash_mapped(f, size, digests, parallel)
+        elif parallel:
+            _hash_buffered_parallel(f, digests)
+        else:
+            buffer = bytearray(HASH_BUFFER_SIZE)
+            view = memoryview(buffer)
+            for count in iter(lambda: f.readinto(buffer), 0):
+                for digest in digests:
+                    digest.update(view[:count])
+    return {name: digest.hexdigest() for name, digest in zip(algorithms, digests)}
+
+
+def _hash_mapped(f: Any, size: int, digests: List[Any], parallel: bool) -> None:
+    # Each digest walks the mapping independently; hashlib drops the GIL on
+    # large buffers so the digests run on separate cores without copying.
+    with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+        with memoryview(mapped) as view:
+            def feed(targets: List[Any]) -> None:
+                for offset in range(0, size, HASH_BUFFER_SIZE):
+                    with view[offset:offset + HASH_BUFFER_SIZE] as block:
+                        for digest in targets:
+                            digest.update(block)
+
+            if parallel:
+                with ThreadPoolExecutor(max_workers=len(digests)) as executor:
+                    for future in [executor.submit(feed, [digest]) for digest in digests]:
+                        future.result()
+            else:
+                feed(digests)
+
+
+def _hash_buffered_parallel(f: Any, digests: List[Any]) -> None:
+    # Two buffers alternate: the next block is read while the digest
+    # threads are still hashing the previous one.
+    buffers = [bytearray(HASH_BUFFER_SIZE), bytearray(HASH_BUFFER_SIZE)]
+    views = [memoryview(buffer) for buffer in buffers]
+    pending: List[Future[None]] = []
+    with ThreadPoolExecutor(max_workers=len(digests)) as executor:
+        index = 0
+        while True:
+            count = f.readinto(buffers[index])
+            wait(pending)
+            for future in pending:
+                future.result()
+            if not count:
+                break
+            block = views[index][:count]
+            pending = [executor.submit(digest.update, block) for digest in digests]
+            index ^= 1
@@ -1,11 +1,12 @@
 import os
+import codecs
 import markdownify
 from docx import Document
 import pdfplumber
 import re
 import csv
 from openpyxl import load_workbook
-import chardet
+from chardet import UniversalDetector
 from typing import List, Tuple, Any, cast
 import pytesseract as tess
 
@@ -16,6 +17,48 @@ def clean_text(text: str) -> str:
     text = re.sub(r'([.,!?])([a-zA-Z])', r'\1 \2', text)
     return text
 
+ENCODING_SAMPLE_BYTES = 1024 * 1024
+ENCODING_CHUNK_BYTES = 64 * 1024
+
+def detect_encoding(input_file: str, sample_bytes: int = ENCODING_SAMPLE_BYTES) -> str:
+    # Only a bounded prefix is inspected; the caller decodes the whole file once afterwards.
+    # Kept in sync with FileConverter._detect_encoding in extras/file-converter.
+    utf8_decoder = codecs.getincrementaldecoder('utf-8')()
+    detector = UniversalDetector()
+    is_utf8 = True
+    read_total = 0
+    with open(input_file, 'rb') as f:
+        # 'utf-8-sig' strips the BOM instead of leaking it as U+FEFF.
+        if f.read(len(codecs.BOM_UTF8)) == codecs.BOM_UTF8:
+            return 'utf-8-sig'
+        f.seek(0)
+        while read_total < sample_bytes:
+            chunk = f.read(min(ENCODING_CHUNK_BYTES, sample_bytes - read_total))
+            if not chunk:
+                break
+            read_total += len(chunk)
+            if is_utf8:
+                try:
+                    utf8_decoder.decode(chunk)
+                    continue
+                except UnicodeDecodeError:
+                    is_utf8 = False
+                    f.seek(0)
+                    read_total = 0
+                    continue
+            detector.feed(chunk)
+            if detector.done:
+                break
+
+    if is_utf8:
+        return 'utf-8'
+
+    detector.close()
+    detected = detector.result
+    if detected['encoding'] and detected['confidence'] > 0.5:
+        return detected['encoding']
+    return 'utf-8'
+
 def _table_to_markdown(header: List[Any], rows: List[List[Any]]) -> str:
     if not header and not rows:
         return ""
@@ -35,11 +78,8 @@ def convert_to_markdown(input_file: str, output_file: str) -> Tuple[bool, str]:
     
     try:
         if file_extension in ['.txt', '.csv']:
-            with open(input_file, 'rb') as f:
-                raw_data = f.read()
-                detected = chardet.detect(raw_data)
-                encoding = detected['encoding'] if detected['confidence'] > 0.5 else 'utf-8'
-                print(f"   - Detected encoding for {os.path.basename(input_file)}: {encoding}", flush=True)
+            encoding = detect_encoding(input_file)
+            print(f"   - Detected encoding for {os.path.basename(input_file)}: {encoding}", flush=True)
 
             with open(input_file, 'r', encoding=encoding, errors='replace') as f:
                 if file_extension == '.txt':
@@ -1,10 +1,12 @@
 import sys
 import json
 import os
-from pathlib import Path
 from PIL import Image
 import traceback
-from typing import Dict, Any, List
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Dict, Any, List, Optional
+
+from output_names import batch_base_names
 
 
 SUPPORTED_FORMATS = {
@@ -21,7 +23,8 @@ SUPPORTED_FORMATS = {
 }
 
 
-def convert_image(input_path: str, output_path: str, output_format: str, quality: int = 95) -> Dict[str, Any]:
+def convert_image(input_path: str, output_path: str, output_format: str, quality: int = 95,
+                  max_dimension: Optional[int] = None) -> Dict[str, Any]:
     try:
         output_ext: str = output_format.lower().lstrip('.')
         if output_ext not in SUPPORTED_FORMATS:
@@ -33,6 +36,12 @@ def convert_image(input_path: str, output_path: str, output_format: str, quality
         with Image.open(input_path) as img:
             pil_format = SUPPORTED_FORMATS[output_ext]
             
+            if max_dimension and max(img.size) > max_dimension:
+                if img.format == 'JPEG':
+                    # Let libjpeg scale down during decode (1/2, 1/4, 1/8) instead of decoding full size
+                    img.draft(img.mode, (max_dimension, max_dimension))
+                img.thumbnail((max_dimension, max_dimension), Image.Resampling.LANCZOS)
+            
             if pil_format in ['JPEG', 'BMP', 'PDF'] and img.mode in ['RGBA', 'LA', 'P']:
                 background = Image.new('RGB', img.size, (255, 255, 255))
                 if img.mode == 'P':
@@ -71,7 +80,38 @@ def convert_image(input_path: str, output_path: str, output_format: str, quality
         return {'success': False, 'error': f'Conversion failed: {str(e)}'}
 
 
-def batch_convert_images(input_files: List[str], output_dir: str, output_format: str, quality: int = 95) -> Dict[str, Any]:
+def _convert_batch_item(input_path: str, output_dir: str, output_format: str, quality: int,
+                        max_dimension: Optional[int], base_name: str) -> Dict[str, Any]:
+    try:
+        output_filename = base_name + '.' + output_format.lower().lstrip('.')
+        output_path = os.path.join(output_dir, output_filename)
+        
+        result = convert_image(input_path, output_path, output_format, quality, max_dimension)
+        
+        if result['success']:
+            return {
+                'success': True,
+                'input': input_path,
+                'output': output_path,
+                'filename': output_filename
+            }
+        return {
+            'success': False,
+            'input': input_path,
+            'error': result['error']
+        }
+    
+    except Exception as e:
+        return {
+            'success': False,
+            'input': input_path,
+            'error': str(e)
+        }
+
+
+def batch_convert_images(input_files: List[str], output_dir: str, output_format: str, quality: int = 95,
+                         max_workers: Optional[int] = None, max_dimension: Optional[int] = None,
+                         stream: bool = False) -> Dict[str, Any]:
     results: Dict[str, Any] = {
         'success': True,
         'converted': [],
@@ -81,32 +121,40 @@ def batch_convert_images(input_files: List[str], output_dir: str, output_format:
     
     os.makedirs(output_dir, exist_ok=True)
     
-    for input_path in input_files:
-        try:
-            input_file = Path(input_path)
-            output_filename = input_file.stem + '.' + output_format.lower().lstrip('.')
-            output_path = os.path.join(output_dir, output_filename)
-            
-            result = convert_image(input_path, output_path, output_format, quality)
-            
-            if result['success']:
-                results['converted'].append({
-                    'input': input_path,
-                    'output': output_path,
-                    'filename': output_filename
-                })
-            else:
-                results['failed'].append({
-                    'input': input_path,
-                    'error': result['error']
-                })
-                results['success'] = False
+    item_results: List[Optional[Dict[str, Any]]] = [None] * len(input_files)
+    # Same-named inputs from different folders must not race on one output file
+    base_names = batch_base_names(input_files, output_dir)
+    
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        futures = {
+            executor.submit(_convert_batch_item, input_path, output_dir, output_format, quality, max_dimension,
+                            base_names[index]): index
+            for index, input_path in enumerate(input_files)
+        }
         
-        except Exception as e:
-            results['failed'].append({
-                'input': input_path,
-                'error': str(e)
-            })
+        for completed, future in enumerate(as_completed(futures), 1):
+            index = futures[future]
+            try:
+                item = future.result()
+            except Exception as e:
+                item = {'success': False, 'input': input_files[index], 'error': str(e)}
+            item_results[index] = item
+            
+            if stream:
+                print(json.dumps({
+                    'type': 'progress',
+                    'completed': completed,
+                    'total': results['total'],
+                    **item
+                }), flush=True)
+    
+    for item in item_results:
+        if item is None:
+            continue
+        if item.pop('success'):
+            results['converted'].append(item)
+        else:
+            results['failed'].append(item)
             results['success'] = False
     
     results['message'] = f'Converted {len(results["converted"])}/{results["total"]} images'
@@ -120,6 +168,7 @@ def main():
         mode = input_data.get('mode', 'single')
         output_format = input_data.get('output_format', 'png')
         quality = input_data.get('quality', 95)
+        max_dimension = input_data.get('max_dimension')
         
         result: Dict[str, Any]
         
@@ -134,7 +183,7 @@ def main():
                 }))
                 return
             
-            result = convert_image(input_path, output_path, output_format, quality)
+            result = convert_image(input_path, output_path, output_format, quality, max_dimension)
         
         elif mode == 'batch':
             input_files = input_data.get('input', [])
@@ -147,7 +196,10 @@ def main():
                 }))
                 return
             
-            result = batch_convert_images(input_files, output_dir, output_format, quality)
+            result = batch_convert_images(
+                input_files, output_dir, output_format, quality,
+                input_data.get('max_workers'), max_dimension, input_data.get('stream', False)
+            )
         
         else:
             result = {
@@ -2,14 +2,34 @@ import sys
 import os
 import chromadb
 from langchain.text_splitter import RecursiveCharacterTextSplitter
-from typing import List, Dict
+from typing import Any, List, Dict, Tuple
 
-def run_ingestion(knowledge_path: str, writable_path: str):
-    print("--- Starting Knowledge Base Refresh/Update ---", flush=True)
+def open_knowledge_base(writable_path: str) -> Tuple[Any, RecursiveCharacterTextSplitter]:
     db_path = os.path.join(writable_path, "db")
     client = chromadb.PersistentClient(path=db_path)
     collection = client.get_or_create_collection(name="knowledge_base")
     text_splitter = RecursiveCharacterTextSplitter(chunk_size=1000, chunk_overlap=200)
+    return collection, text_splitter
+
+
+def ingest_markdown(collection: Any, text_splitter: RecursiveCharacterTextSplitter, content: str, source: str, replace: bool = False) -> int:
+    """Chunk one markdown document into the collection; returns the chunk count."""
+    chunks = text_splitter.split_text(content)
+    # A re-scraped page that is now empty must still drop its old chunks.
+    if replace:
+        collection.delete(where={"source": source})
+    if not chunks:
+        return 0
+    num_chunks = len(chunks)
+    ids = [f"{source}-{i}" for i in range(num_chunks)]
+    metadatas: List[Dict[str, str]] = [{"source": source} for _ in range(num_chunks)]
+    collection.add(documents=chunks, metadatas=metadatas, ids=ids)  # type: ignore
+    return num_chunks
+
+
+def run_ingestion(knowledge_path: str, writable_path: str):
+    print("--- Starting Knowledge Base Refresh/Update ---", flush=True)
+    collection, text_splitter = open_knowledge_base(writable_path)
     print(f"2. Ingesting documents from: '{knowledge_path}'", flush=True)
 
     if not os.path.isdir(knowledge_path):
@@ -30,13 +50,9 @@ def run_ingestion(knowledge_path: str, writable_path: str):
             print(f"   - ERROR reading markdown {os.path.basename(file_path)}: {e}", flush=True)
             continue
         if content:
-            chunks = text_splitter.split_text(content)
-            if chunks:
-                num_chunks = len(chunks)
-                print(f"     - Splitting into {num_chunks} chunks.", flush=True)
-                ids = [f"{filename}-{i}" for i in range(num_chunks)]
-                metadatas: List[Dict[str, str]] = [{"source": filename} for _ in range(num_chunks)]
-                collection.add(documents=chunks, metadatas=metadatas, ids=ids)  # type: ignore
+            num_chunks = ingest_markdown(collection, text_splitter, content, filename)
+            if num_chunks:
+                print(f"     - Split into {num_chunks} chunks.", flush=True)
                 doc_id_counter += num_chunks
     print(f"   Ingestion complete. Added/Updated {doc_id_counter} document chunks.", flush=True)
     print("--- Knowledge Base Refresh/Update Complete ---", flush=True)
@@ -0,0 +1,215 @@
+import re
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import urljoin, urlsplit
+
+
+SKIPPED_TAGS = {'script', 'style', 'noscript', 'template', 'nav', 'footer', 'aside', 'head'}
+BLOCK_TAGS = {
+    'p', 'div', 'section', 'article', 'main', 'body', 'html', 'form', 'figure',
+    'figcaption', 'details', 'summary', 'dl', 'dt', 'dd', 'address', 'fieldset'
+}
+INLINE_MARKERS = {'strong': '**', 'b': '**', 'em': '*', 'i': '*'}
+HEADING_LEVELS = {f'h{level}': level for level in range(1, 7)}
+WHITESPACE_PATTERN = re.compile(r'\s+')
+
+# Candidate main elements in priority order, mirroring the CSS selectors
+# main, article, [role="main"], #main-content, #content, .main-content,
+# .content, body. Each entry is (kind, value) matched during the page walk.
+MAIN_CANDIDATES: Tuple[Tuple[str, str], ...] = (
+    ('tag', 'main'),
+    ('tag', 'article'),
+    ('role', 'main'),
+    ('id', 'main-content'),
+    ('id', 'content'),
+    ('class', 'main-content'),
+    ('class', 'content'),
+    ('tag', 'body'),
+)
+
+
+def _tag(element: Any) -> Optional[str]:
+    # Comments and processing instructions have a non-string tag.
+    tag = element.tag
+    return tag.lower() if isinstance(tag, str) else None
+
+
+def _candidate_slots(tag: str, element: Any) -> List[int]:
+    slots: List[int] = []
+    element_id = element.get('id')
+    classes = element.get('class')
+    for slot, (kind, value) in enumerate(MAIN_CANDIDATES):
+        if kind == 'tag':
+            matched = tag == value
+        elif kind == 'role':
+            matched = element.get('role') == value
+        elif kind == 'id':
+            matched = element_id == value
+        else:
+            matched = classes is not None and value in classes.split()
+        if matched:
+            slots.append(slot)
+    return slots
+
+
+def scan_page(root: Any, page_url: str) -> Dict[str, Any]:
+    """
+    Walk an already-parsed lxml document once and collect everything the
+    spider needs: same-origin links, title, meta description, first h1 and
+    the main content element.
+    """
+    hrefs: List[str] = []
+    base_href: Optional[str] = None
+    title = ''
+    description = ''
+    h1: Optional[str] = None
+    candidates: List[Any] = [None] * len(MAIN_CANDIDATES)
+
+    for element in root.iter():
+        tag = _tag(element)
+        if tag is None:
+            continue
+        if tag == 'a':
+            href = element.get('href')
+            if href:
+                hrefs.append(href.strip())
+        elif tag == 'title' and not title:
+            title = (element.text or '').strip()
+        elif tag == 'meta' and element.get('name') == 'description' and not description:
+            description = element.get('content') or ''
+        elif tag == 'h1' and h1 is None:
+            h1 = element.text or ''
+        elif tag == 'base' and base_href is None:
+            base_href = element.get('href')
+        for slot in _candidate_slots(tag, element):
+            if candidates[slot] is None:
+                candidates[slot] = element
+
+    base_url = urljoin(page_url, base_href) if base_href else page_url
+    page_origin = urlsplit(page_url)[:2]
+    internal_links: List[str] = []
+    for href in hrefs:
+        absolute_url = urljoin(base_url, href)
+        if urlsplit(absolute_url)[:2] == page_origin:
+            internal_links.append(absolute_url)
+
+    main_element = next((element for element in candidates if element is not None), root)
+    return {
+        'internal_links': internal_links,
+        'title': title,
+        'description': description,
+        'h1': h1 or '',
+        'main_element': main_element
+    }
+
+
+def _inline_text(text: Optional[str]) -> str:
+    return WHITESPACE_PATTERN.sub(' ', text) if text else ''
+
+
+def _children(element: Any) -> str:
+    parts = [_inline_text(element.text)]
+    for child in element:
+        parts.append(_convert(child))
+        parts.append(_inline_text(child.tail))
+    return ''.join(parts)
+
+
+def _wrap_inline(content: str, marker: str) -> str:
+    stripped = content.strip()
+    if not stripped:
+        return content
+    leading = ' ' if content[0].isspace() else ''
+    trailing = ' ' if content[-1].isspace() else ''
+    return f'{leading}{marker}{stripped}{marker}{trailing}'
+
+
+def _convert_list(element: Any, ordered: bool) -> str:
+    lines: List[str] = []
+    number = int(element.get('start') or 1) if ordered else 1
+    for child in element:
+        if _tag(child) != 'li':
+            continue
+        prefix = f'{number}. ' if ordered else '- '
+        number += 1
+        content = re.sub(r'\n{2,}', '\n', _children(child).strip())
+        item_lines = content.split('\n') if content else ['']
+        lines.append(prefix + item_lines[0].strip())
+        indent = ' ' * len(prefix)
+        lines.extend(indent + line if line.strip() else '' for line in item_lines[1:])
+    return '\n\n' + '\n'.join(lines) + '\n\n'
+
+
+def _convert_table(element: Any) -> str:
+    rows: List[str] = []
+    for row in element.iter('tr'):
+        cells = [
+            _children(cell).strip().replace('\n', ' ').replace('|', '\\|')
+            for cell in row if _tag(cell) in ('td', 'th')
+        ]
+        if not cells:
+            continue
+        rows.append('| ' + ' | '.join(cells) + ' |')
+        if len(rows) == 1:
+            rows.append('| ' + ' | '.join('---' for _ in cells) + ' |')
+    return '\n\n' + '\n'.join(rows) + '\n\n' if rows else ''
+
+
+def _convert(element: Any) -> str:
+    tag = _tag(element)
+    if tag is None or tag in SKIPPED_TAGS:
+        return ''
+    if tag in HEADING_LEVELS:
+        text = _children(element).strip()
+        return f'\n\n{"#" * HEADING_LEVELS[tag]} {text}\n\n' if text else ''
+    if tag in INLINE_MARKERS:
+        return _wrap_inline(_children(element), INLINE_MARKERS[tag])
+    if tag == 'code':
+        return _wrap_inline(element.text_content(), '`')
+    if tag == 'pre':
+        code = element.text_content().strip('\n')
+        return f'\n\n```\n{code}\n```\n\n'
+    if tag == 'a':
+        text = _children(element).strip()
+        href = element.get('href')
+        return f'[{text}]({href})' if href and text else text
+    if tag == 'img':
+        src = element.get('src')
+        return f'![{element.get("alt") or ""}]({src})' if src else ''
+    if tag == 'br':
+        return '  \n'
+    if tag == 'hr':
+        return '\n\n---\n\n'
+    if tag in ('ul', 'ol'):
+        return _convert_list(element, tag == 'ol')
+    if tag == 'li':
+        return '\n- ' + _children(element).strip() + '\n'
+    if tag == 'blockquote':
+        content = re.sub(r'\n{3,}', '\n\n', _children(element).strip())
+        quoted = '\n'.join(f'> {line}' if line else '>' for line in content.split('\n'))
+        return f'\n\n{quoted}\n\n'
+    if tag == 'table':
+        return _convert_table(element)
+    if tag in BLOCK_TAGS:
+        return '\n\n' + _children(element).strip() + '\n\n'
+    return _children(element)
+
+
+def element_to_markdown(element: Any) -> str:
+    """
+    Convert an lxml element subtree to Markdown without re-serializing or
+    re-parsing it. Navigation, footer, aside, script and style
+    subtrees are dropped.
+    """
+    lines: List[str] = []
+    in_code = False
+    for line in _convert(element).split('\n'):
+        if line.startswith('```'):
+            in_code = not in_code
+        elif not in_code and line[:1] == ' ' and line[1:2] != ' ':
+            # Whitespace carried over from the tail of a preceding block.
+            line = line[1:]
+        line = line.rstrip()
+        if not line and not in_code and lines and not lines[-1]:
+            continue
+        lines.append(line)
+    return '\n'.join(lines).strip('\n')
@@ -0,0 +1,150 @@
+import re
+from html import escape
+from typing import List, NamedTuple, Optional, Tuple
+
+
+INLINE_PATTERN = re.compile(r'`([^`]+)`|\*\*([^*]+)\*\*|\*([^*]+)\*')
+NUMBERED_PATTERN = re.compile(r'(\d+)[.)]\s+(.*)')
+BULLET_MARKERS = ('- ', '* ', '• ')
+RULE_LINES = ('---', '***', '___')
+
+INLINE_KINDS = ('code', 'bold', 'italic')
+
+Inline = Tuple[str, str]
+
+
+class Block(NamedTuple):
+    kind: str
+    text: str = ''
+    inlines: Tuple[Inline, ...] = ()
+    level: int = 0
+    lang: str = ''
+
+
+def parse_inline(text: str) -> Tuple[Inline, ...]:
+    inlines: List[Inline] = []
+    pos = 0
+    for match in INLINE_PATTERN.finditer(text):
+        if match.start() > pos:
+            inlines.append(('text', text[pos:match.start()]))
+        group = match.lastindex or 1
+        inlines.append((INLINE_KINDS[group - 1], match.group(group)))
+        pos = match.end()
+    if pos < len(text):
+        inlines.append(('text', text[pos:]))
+    return tuple(inlines)
+
+
+def _text_block(kind: str, text: str, level: int = 0) -> Block:
+    return Block(kind, text, parse_inline(text), level)
+
+
+def parse_markdown(markdown_text: str) -> List[Block]:
+    """
+    Tokenize markdown into a flat list of blocks in a single pass over the lines.
+
+    Block kinds: heading, bullet, numbered, quote, rule, code, blank, paragraph.
+    Every text-bearing block carries its inline runs (text, code, bold, italic)
+    so emitters never re-scan the source.
+    """
+    blocks: List[Block] = []
+    code_lines: Optional[List[str]] = None
+    code_lang = ''
+
+    for line in markdown_text.split('\n'):
+        stripped = line.strip()
+
+        if stripped.startswith('```'):
+            if code_lines is None:
+                code_lines = []
+                code_lang = stripped[3:].strip()
+            else:
+                blocks.append(Block('code', '\n'.join(code_lines), lang=code_lang))
+                code_lines = None
+            continue
+
+        if code_lines is not None:
+            code_lines.append(line)
+            continue
+
+        if not stripped:
+            blocks.append(Block('blank'))
+        elif line.startswith('#'):
+            heading_text = line.lstrip('#')
+            blocks.append(_text_block('heading', heading_text.strip(), len(line) - len(heading_text)))
+        elif stripped in RULE_LINES:
+            blocks.append(Block('rule'))
+        elif stripped.startswith(BULLET_MARKERS) or stripped in ('-', '*', '•'):
+            blocks.append(_text_block('bullet', stripped[1:].strip()))
+        elif stripped.startswith('>'):
+            blocks.append(_text_block('quote', stripped.lstrip('>').strip()))
+        else:
+            numbered_match = NUMBERED_PATTERN.match(stripped)
+            if numbered_match:
+                blocks.append(_text_block('numbered', numbered_match.group(2), int(numbered_match.group(1))))
+            else:
+                blocks.append(_text_block('paragraph', line))
+
+    if code_lines is not None:
+        blocks.append(Block('code', '\n'.join(code_lines), lang=code_lang))
+
+    return blocks
+
+
+def render_inline_html(inlines: Tuple[Inline, ...]) -> str:
+    parts: List[str] = []
+    for kind, text in inlines:
+        if kind == 'code':
+            parts.append(f'<code>{escape(text)}</code>')
+        elif kind == 'bold':
+            parts.append(f'<strong>{text}</strong>')
+        elif kind == 'italic':
+            parts.append(f'<em>{text}</em>')
+        else:
+            parts.append(text)
+    return ''.join(parts)
+
+
+LIST_TAGS = {'bullet': 'ul', 'numbered': 'ol'}
+
+
+def render_html(blocks: List[Block]) -> str:
+    """Render parsed blocks as an HTML body fragment (no <html>/<body> wrapper)."""
+    output: List[str] = []
+    group_kind = ''
+    group: List[str] = []
+
+    def flush() -> None:
+        if not group:
+            return
+        if group_kind in LIST_TAGS:
+            tag = LIST_TAGS[group_kind]
+            output.append(f'<{tag}>\n' + '\n'.join(group) + f'\n</{tag}>')
+        elif group_kind == 'quote':
+            output.append('<blockquote>' + '\n'.join(group) + '</blockquote>')
+        else:
+            paragraph = '\n'.join(group).strip()
+            output.append(paragraph if paragraph.startswith('<') else f'<p>{paragraph}</p>')
+        group.clear()
+
+    for block in blocks:
+        kind = block.kind
+        if kind != group_kind:
+            flush()
+            group_kind = kind
+
+        if kind in LIST_TAGS:
+            group.append(f'<li>{render_inline_html(block.inlines)}</li>')
+        elif kind in ('quote', 'paragraph'):
+            group.append(render_inline_html(block.inlines))
+        elif kind == 'heading':
+            level = min(block.level, 6)
+            output.append(f'<h{level}>{render_inline_html(block.inlines)}</h{level}>')
+        elif kind == 'rule':
+            output.append('<hr>')
+        elif kind == 'code':
+            lang_attr = f' class="language-{escape(block.lang)}"' if block.lang else ''
+            output.append(f'<pre><code{lang_attr}>{escape(block.text)}</code></pre>')
+
+    flush()
+    return '\n'.join(output)
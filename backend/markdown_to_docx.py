@@ -1,9 +1,10 @@
 import sys
 import json
 import os
-import re
 import traceback
-from typing import Dict, Any, List
+from typing import Dict, Any, Optional
+
+from markdown_parser import parse_markdown
 
 try:
     from docx import Document
@@ -13,6 +14,34 @@ except ImportError:
     docx_available = False
 
 
+class _ParagraphWriter:
+    """
+    Appends paragraphs to a python-docx Document in O(1) each.
+
+    Document.add_paragraph() locates the trailing sectPr by scanning every body
+    child, and assigning a style by name scans every style, which makes large
+    documents quadratic. Paragraphs are instead inserted before a sentinel
+    paragraph (removed on close) and styles are resolved to ids once.
+    """
+    
+    def __init__(self, doc: Any):
+        self.doc = doc
+        self.style_ids: Dict[str, str] = {}
+        self.anchor = doc.add_paragraph()
+    
+    def add(self, text: str = '', style_name: Optional[str] = None) -> Any:
+        p = self.anchor.insert_paragraph_before(text)
+        if style_name:
+            if style_name not in self.style_ids:
+                self.style_ids[style_name] = self.doc.styles[style_name].style_id
+            p._p.style = self.style_ids[style_name]  # type: ignore
+        return p
+    
+    def close(self) -> None:
+        anchor_element = self.anchor._p  # type: ignore
+        anchor_element.getparent().remove(anchor_element)
+
+
 def parse_markdown_to_docx(markdown_text: str, docx_path: str) -> Dict[str, Any]:
     try:
         if not docx_available:
@@ -22,90 +51,60 @@ def parse_markdown_to_docx(markdown_text: str, docx_path: str) -> Dict[str, Any]
             }
         
         doc = Document()  # type: ignore
-        lines: List[str] = markdown_text.split('\n')
-        
-        in_code_block: bool = False
-        code_lines: List[str] = []
+        writer = _ParagraphWriter(doc)
         in_list: bool = False
         
-        for line in lines:
-            if line.strip().startswith('```'):
-                if in_code_block:
-                    code_text = '\n'.join(code_lines)
-                    p = doc.add_paragraph(code_text)
-                    p.style = 'Intense Quote'
-                    code_lines = []
-                    in_code_block = False
-                else:
-                    in_code_block = True
-                continue
+        for block in parse_markdown(markdown_text):
+            kind = block.kind
             
-            if in_code_block:
-                code_lines.append(line)
+            if kind == 'code':
+                writer.add(block.text, 'Intense Quote')
                 continue
             
-            if line.startswith('#'):
+            if kind == 'heading':
                 in_list = False
-                heading_level = len(line) - len(line.lstrip('#'))
-                heading_text = line.lstrip('#').strip()
-                
-                if heading_level == 1:
-                    p = doc.add_heading(heading_text, level=1)
-                elif heading_level == 2:
-                    p = doc.add_heading(heading_text, level=2)
-                else:
-                    p = doc.add_heading(heading_text, level=3)
+                writer.add(block.text, f'Heading {min(block.level, 3)}')
                 continue
             
-            if line.strip().startswith(('-', '*', '•')):
-                text = line.strip().lstrip('-*•').strip()
-                p = doc.add_paragraph(text, style='List Bullet')
+            if kind == 'bullet':
+                writer.add(block.text, 'List Bullet')
                 in_list = True
                 continue
             
-            numbered_match = re.match(r'^(\d+)[\.\)]\s+(.*)', line.strip())
-            if numbered_match:
-                text = numbered_match.group(2)
-                p = doc.add_paragraph(text, style='List Number')
+            if kind == 'numbered':
+                writer.add(block.text, 'List Number')
                 in_list = True
                 continue
             
-            if line.strip().startswith('>'):
+            if kind == 'quote':
                 in_list = False
-                text = line.strip().lstrip('>').strip()
-                p = doc.add_paragraph(text, style='Quote')
+                writer.add(block.text, 'Quote')
                 continue
             
-            if line.strip() in ('---', '***', '___'):
+            if kind == 'rule':
                 in_list = False
-                doc.add_paragraph('_' * 50)
+                writer.add('_' * 50)
                 continue
             
-            if not line.strip():
+            if kind == 'blank':
                 if not in_list:
-                    doc.add_paragraph()
+                    writer.add()
                 continue
             
             in_list = False
-            p = doc.add_paragraph()
+            p = writer.add()
             
-            text = line
-            
-            parts = re.split(r'`([^`]+)`', text)
-            for i, part in enumerate(parts):
-                if i % 2 == 1:
-                    run = p.add_run(part)
+            for inline_kind, text in block.inlines:
+                run = p.add_run(text)
+                if inline_kind == 'code':
                     run.font.name = 'Courier New'
                     run.font.size = Pt(10)  # type: ignore
-                else:
-                    sub_parts = re.split(r'\*\*([^\*]+)\*\*|\*([^\*]+)\*', part)
-                    for j, sub_part in enumerate(sub_parts):
-                        if sub_part:
-                            run = p.add_run(sub_part)
-                            if j % 3 == 1:
-                                run.bold = True
-                            elif j % 3 == 2:
-                                run.italic = True
+                elif inline_kind == 'bold':
+                    run.bold = True
+                elif inline_kind == 'italic':
+                    run.italic = True
+        
+        writer.close()
         
         os.makedirs(os.path.dirname(docx_path), exist_ok=True)
         
@@ -0,0 +1,456 @@
+"""
+Container-level metadata writers for generated media.
+
+Metadata is spliced into the file's container structure (PNG chunks, JPEG
+APP segments, MP4/MOV moov atoms) and the compressed media data is left
+untouched, so embedding never decodes or re-encodes anything and the bytes
+that were hashed keep their meaning.
+"""
+
+import os
+import shutil
+import struct
+import zlib
+from typing import BinaryIO, Dict, Iterator, List, Optional, Tuple
+
+
+PNG_SIGNATURE = b'\x89PNG\r\n\x1a\n'
+PNG_TEXT_CHUNKS = (b'tEXt', b'iTXt', b'zTXt')
+JPEG_SOI = b'\xff\xd8'
+JPEG_EXIF_HEADER = b'Exif\x00\x00'
+JPEG_MAX_SEGMENT_DATA = 65533
+COPY_BUFFER_SIZE = 1024 * 1024
+
+
+def detect_image_format(path: str) -> Optional[str]:
+    with open(path, 'rb') as f:
+        head = f.read(len(PNG_SIGNATURE))
+    if head == PNG_SIGNATURE:
+        return 'PNG'
+    if head.startswith(JPEG_SOI):
+        return 'JPEG'
+    return None
+
+
+def _copy_bytes(src: BinaryIO, out: BinaryIO, count: int) -> None:
+    while count > 0:
+        block = src.read(min(COPY_BUFFER_SIZE, count))
+        if not block:
+            raise ValueError('Unexpected end of file')
+        out.write(block)
+        count -= len(block)
+
+
+def _png_chunk(chunk_type: bytes, data: bytes) -> bytes:
+    crc = zlib.crc32(chunk_type + data) & 0xffffffff
+    return struct.pack('>I', len(data)) + chunk_type + data + struct.pack('>I', crc)
+
+
+def _png_text_chunk(keyword: str, value: str) -> bytes:
+    key = keyword.encode('latin-1')
+    try:
+        return _png_chunk(b'tEXt', key + b'\x00' + value.encode('latin-1'))
+    except UnicodeEncodeError:
+        # iTXt: keyword, compression flag/method, empty language and translated keyword
+        return _png_chunk(b'iTXt', key + b'\x00\x00\x00\x00\x00' + value.encode('utf-8'))
+
+
+def _png_chunk_keyword(data: bytes) -> str:
+    return data.split(b'\x00', 1)[0].decode('latin-1')
+
+
+def write_png_text_chunks(path: str, items: List[Tuple[str, str]]) -> None:
+    """
+    Insert text chunks directly after IHDR, replacing any existing text chunks
+    with the same keywords. All other chunks (including IDAT) are copied as-is.
+    """
+    keywords = {keyword for keyword, _ in items}
+    new_chunks = b''.join(_png_text_chunk(keyword, value) for keyword, value in items)
+
+    temp_path = path + '.metadata.tmp'
+    try:
+        with open(path, 'rb') as src, open(temp_path, 'wb') as out:
+            if src.read(len(PNG_SIGNATURE)) != PNG_SIGNATURE:
+                raise ValueError(f'Not a PNG file: {path}')
+            out.write(PNG_SIGNATURE)
+
+            while True:
+                header = src.read(8)
+                if len(header) < 8:
+                    raise ValueError(f'Truncated PNG file: {path}')
+                length, chunk_type = struct.unpack('>I4s', header)
+
+                if chunk_type in PNG_TEXT_CHUNKS:
+                    body = src.read(length + 4)
+                    if _png_chunk_keyword(body[:length]) not in keywords:
+                        out.write(header + body)
+                    continue
+
+                out.write(header)
+                _copy_bytes(src, out, length + 4)
+                if chunk_type == b'IHDR':
+                    out.write(new_chunks)
+                elif chunk_type == b'IEND':
+                    break
+        os.replace(temp_path, path)
+    except Exception:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+
+
+def write_jpeg_exif(path: str, exif_bytes: bytes) -> None:
+    """
+    Replace (or insert) the APP1 Exif segment of a JPEG. The new segment goes
+    after any leading APP0/JFIF segment; the scan data is copied verbatim.
+    """
+    if not exif_bytes.startswith(JPEG_EXIF_HEADER):
+        exif_bytes = JPEG_EXIF_HEADER + exif_bytes
+    if len(exif_bytes) > JPEG_MAX_SEGMENT_DATA:
+        raise ValueError(f'EXIF data too large for a JPEG APP1 segment: {len(exif_bytes)} bytes')
+    exif_segment = b'\xff\xe1' + struct.pack('>H', len(exif_bytes) + 2) + exif_bytes
+
+    temp_path = path + '.metadata.tmp'
+    try:
+        with open(path, 'rb') as src, open(temp_path, 'wb') as out:
+            if src.read(2) != JPEG_SOI:
+                raise ValueError(f'Not a JPEG file: {path}')
+            out.write(JPEG_SOI)
+            written = False
+
+            while True:
+                marker = src.read(2)
+                while len(marker) == 2 and marker == b'\xff\xff':
+                    marker = b'\xff' + src.read(1)
+                if len(marker) < 2 or marker[0] != 0xff:
+                    raise ValueError(f'Malformed JPEG segment in {path}')
+
+                if marker[1] == 0xe0 and not written:
+                    length_bytes = src.read(2)
+                    length = struct.unpack('>H', length_bytes)[0]
+                    out.write(marker + length_bytes + src.read(length - 2))
+                    continue
+
+                if not written:
+                    out.write(exif_segment)
+                    written = True
+
+                # SOS, EOI or a standalone marker: the remainder is copied in bulk
+                if marker[1] in (0xda, 0xd9) or 0xd0 <= marker[1] <= 0xd7 or marker[1] == 0x01:
+                    out.write(marker)
+                    shutil.copyfileobj(src, out, COPY_BUFFER_SIZE)
+                    break
+
+                length_bytes = src.read(2)
+                length = struct.unpack('>H', length_bytes)[0]
+                if marker[1] == 0xe1:
+                    body = src.read(length - 2)
+                    if not body.startswith(JPEG_EXIF_HEADER):
+                        out.write(marker + length_bytes + body)
+                    continue
+                out.write(marker + length_bytes)
+                _copy_bytes(src, out, length - 2)
+        os.replace(temp_path, path)
+    except Exception:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+
+
+MP4_TAG_ATOMS = {
+    'title': b'\xa9nam',
+    'artist': b'\xa9ART',
+    'comment': b'\xa9cmt',
+    'description': b'desc',
+    'date': b'\xa9day',
+    'encoder': b'\xa9too',
+    'copyright': b'cprt',
+    'genre': b'\xa9gen',
+    'composer': b'\xa9wrt',
+}
+MP4_ATOM_TAGS = {atom: tag for tag, atom in MP4_TAG_ATOMS.items()}
+MP4_FREEFORM_MEAN = b'com.apple.iTunes'
+MP4_FREE_BOXES = (b'free', b'skip')
+
+Box = Tuple[bytes, int, int, int]
+
+
+def _iter_boxes(data: bytes, start: int, end: int) -> Iterator[Box]:
+    """Yield (type, box_start, payload_start, box_end) for each box in data[start:end]."""
+    pos = start
+    while pos + 8 <= end:
+        size, box_type = struct.unpack_from('>I4s', data, pos)
+        header = 8
+        if size == 1:
+            size = struct.unpack_from('>Q', data, pos + 8)[0]
+            header = 16
+        elif size == 0:
+            size = end - pos
+        if size < header or pos + size > end:
+            raise ValueError(f'Malformed {box_type!r} box at offset {pos}')
+        yield box_type, pos, pos + header, pos + size
+        pos += size
+
+
+def _scan_top_level_boxes(f: BinaryIO, file_size: int) -> List[Box]:
+    boxes: List[Box] = []
+    pos = 0
+    while pos + 8 <= file_size:
+        f.seek(pos)
+        header = f.read(16)
+        size, box_type = struct.unpack('>I4s', header[:8])
+        header_size = 8
+        if size == 1:
+            size = struct.unpack('>Q', header[8:16])[0]
+            header_size = 16
+        elif size == 0:
+            size = file_size - pos
+        if size < header_size or pos + size > file_size:
+            raise ValueError(f'Malformed top-level {box_type!r} box at offset {pos}')
+        boxes.append((box_type, pos, pos + header_size, pos + size))
+        pos += size
+    return boxes
+
+
+def _find_box(data: bytes, start: int, end: int, box_type: bytes) -> Optional[Box]:
+    for box in _iter_boxes(data, start, end):
+        if box[0] == box_type:
+            return box
+    return None
+
+
+def _meta_children_start(data: bytes, payload_start: int) -> int:
+    # ISO meta is a full box (4 bytes version/flags); QuickTime meta is not
+    if data[payload_start + 4:payload_start + 8] == b'hdlr':
+        return payload_start
+    return payload_start + 4
+
+
+def _box(box_type: bytes, payload: bytes) -> bytes:
+    return struct.pack('>I', 8 + len(payload)) + box_type + payload
+
+
+def _ilst_item(tag: str, value: str) -> bytes:
+    data = _box(b'data', struct.pack('>II', 1, 0) + value.encode('utf-8'))
+    atom = MP4_TAG_ATOMS.get(tag)
+    if atom:
+        return _box(atom, data)
+    return _box(b'----', (
+        _box(b'mean', b'\x00\x00\x00\x00' + MP4_FREEFORM_MEAN)
+        + _box(b'name', b'\x00\x00\x00\x00' + tag.encode('utf-8'))
+        + data
+    ))
+
+
+def _ilst_item_tag_and_value(data: bytes, item: Box) -> Tuple[Optional[str], Optional[str]]:
+    item_type, _, payload_start, item_end = item
+    tag = MP4_ATOM_TAGS.get(item_type)
+    value: Optional[str] = None
+    for child_type, _, child_payload, child_end in _iter_boxes(data, payload_start, item_end):
+        if child_type == b'name' and item_type == b'----':
+            tag = data[child_payload + 4:child_end].decode('utf-8', errors='replace')
+        elif child_type == b'data':
+            value = data[child_payload + 8:child_end].decode('utf-8', errors='replace')
+    return tag, value
+
+
+def _parse_udta_tags(data: bytes, udta: Box) -> Dict[str, str]:
+    tags: Dict[str, str] = {}
+    for child_type, _, payload_start, child_end in _iter_boxes(data, udta[2], udta[3]):
+        if child_type == b'meta':
+            ilst = _find_box(data, _meta_children_start(data, payload_start), child_end, b'ilst')
+            if ilst is None:
+                continue
+            for item in _iter_boxes(data, ilst[2], ilst[3]):
+                tag, value = _ilst_item_tag_and_value(data, item)
+                if tag and value is not None:
+                    tags[tag] = value
+        elif child_type in MP4_ATOM_TAGS and child_end - payload_start >= 4:
+            # QuickTime user data text: 16-bit length, 16-bit language, text
+            text_length = struct.unpack_from('>H', data, payload_start)[0]
+            text = data[payload_start + 4:payload_start + 4 + text_length]
+            tags.setdefault(MP4_ATOM_TAGS[child_type], text.decode('utf-8', errors='replace'))
+    return tags
+
+
+def _read_moov(path: str) -> Tuple[bytes, List[Box], int]:
+    with open(path, 'rb') as f:
+        file_size = os.fstat(f.fileno()).st_size
+        boxes = _scan_top_level_boxes(f, file_size)
+        for index, (box_type, start, _, end) in enumerate(boxes):
+            if box_type == b'moov':
+                f.seek(start)
+                return f.read(end - start), boxes, index
+    raise ValueError(f'No moov box found in {path}')
+
+
+def read_mp4_tags(path: str) -> Dict[str, str]:
+    """
+    Read metadata tags from an MP4/MOV file without spawning ffprobe. Keys
+    follow ffprobe's format tag names (title, comment, description, ... and
+    freeform names such as openelara_signature).
+    """
+    _recover_mp4(path)
+    moov, boxes, index = _read_moov(path)
+    header_size = boxes[index][2] - boxes[index][1]
+    udta = _find_box(moov, header_size, len(moov), b'udta')
+    if udta is None:
+        return {}
+    return _parse_udta_tags(moov, udta)
+
+
+def _build_moov(moov: bytes, header_size: int, tags: Dict[str, str]) -> bytes:
+    new_items = b''.join(_ilst_item(tag, value) for tag, value in tags.items())
+    hdlr = _box(b'hdlr', b'\x00' * 8 + b'mdirappl' + b'\x00' * 9)
+
+    children: List[bytes] = []
+    new_udta: Optional[bytes] = None
+    for box_type, start, payload_start, end in _iter_boxes(moov, header_size, len(moov)):
+        if box_type != b'udta':
+            children.append(moov[start:end])
+            continue
+
+        udta_children: List[bytes] = []
+        kept_items: List[bytes] = []
+        for child in _iter_boxes(moov, payload_start, end):
+            child_type, child_start, child_payload, child_end = child
+            if child_type != b'meta':
+                udta_children.append(moov[child_start:child_end])
+                continue
+            ilst = _find_box(moov, _meta_children_start(moov, child_payload), child_end, b'ilst')
+            if ilst is not None:
+                for item in _iter_boxes(moov, ilst[2], ilst[3]):
+                    tag, _ = _ilst_item_tag_and_value(moov, item)
+                    if tag not in tags:
+                        kept_items.append(moov[item[1]:item[3]])
+
+        meta = _box(b'meta', b'\x00\x00\x00\x00' + hdlr + _box(b'ilst', b''.join(kept_items) + new_items))
+        new_udta = _box(b'udta', b''.join(udta_children) + meta)
+        children.append(new_udta)
+
+    if new_udta is None:
+        meta = _box(b'meta', b'\x00\x00\x00\x00' + hdlr + _box(b'ilst', new_items))
+        children.append(_box(b'udta', meta))
+
+    return _box(b'moov', b''.join(children))
+
+
+def _free_header(size: int) -> bytes:
+    return struct.pack('>I4s', size, b'free')
+
+
+def _write_synced(f: BinaryIO, writes: List[Tuple[int, bytes]]) -> None:
+    for offset, data in writes:
+        f.seek(offset)
+        f.write(data)
+    f.flush()
+    os.fsync(f.fileno())
+
+
+def _journal_path(path: str) -> str:
+    return path + '.moov.journal'
+
+
+def _recover_mp4(path: str) -> None:
+    """Undo an overwrite that was interrupted before its journal was removed."""
+    journal_path = _journal_path(path)
+    if not os.path.exists(journal_path):
+        return
+    with open(journal_path, 'rb') as journal:
+        offset = struct.unpack('>Q', journal.read(8))[0]
+        original = journal.read()
+    with open(path, 'r+b') as f:
+        _write_synced(f, [(offset, original)])
+    os.remove(journal_path)
+
+
+def _journaled_overwrite(path: str, offset: int, data: bytes) -> None:
+    """
+    Overwrite bytes in place, keeping the originals in a journal that only
+    appears (via os.replace) once it is complete. _recover_mp4 restores them
+    if the overwrite is interrupted.
+    """
+    journal_path = _journal_path(path)
+    temp_path = journal_path + '.tmp'
+    with open(path, 'r+b') as f:
+        f.seek(offset)
+        original = f.read(len(data))
+        with open(temp_path, 'wb') as journal:
+            journal.write(struct.pack('>Q', offset) + original)
+            journal.flush()
+            os.fsync(journal.fileno())
+        os.replace(temp_path, journal_path)
+        _write_synced(f, [(offset, data)])
+    os.remove(journal_path)
+
+
+def write_mp4_tags(path: str, tags: Dict[str, str]) -> bool:
+    """
+    Write tags into moov/udta/meta/ilst by rewriting only the moov box, in
+    place. Media data never moves, so chunk offsets stay valid.
+
+    The new moov is first written where no parser looks: inside the free/skip
+    padding after or before the old moov, or appended at the end of the file
+    wrapped in a free box when the moov region is last. A single box header
+    write then turns the old moov (and whatever hid the new one) into free
+    space, so an interrupted write leaves either the old or the new moov and
+    never a half-written one.
+
+    When the padding only absorbs the growth, moov and padding are
+    overwritten in place behind a journal of the old bytes, which the next
+    read or write restores if the overwrite was interrupted. Returns False
+    when none of this fits (e.g. faststart files without padding); the
+    caller should then remux.
+    """
+    _recover_mp4(path)
+    moov, boxes, index = _read_moov(path)
+    _, moov_start, moov_payload, moov_end = boxes[index]
+    new_moov = _build_moov(moov, moov_payload - moov_start, tags)
+    length = len(new_moov)
+
+    # The moov plus the free/skip boxes directly around it
+    first = index
+    while first > 0 and boxes[first - 1][0] in MP4_FREE_BOXES:
+        first -= 1
+    last = index
+    while last + 1 < len(boxes) and boxes[last + 1][0] in MP4_FREE_BOXES:
+        last += 1
+    region_start, region_end = boxes[first][1], boxes[last][3]
+    file_size = os.path.getsize(path)
+
+    after = region_end - moov_end
+    before = moov_start - region_start
+    padding = region_end - moov_start - length
+    if after == length + 8 or after >= length + 16:
+        # [moov][free ...] -> [free][new moov][free]
+        prepare = [(moov_end, _free_header(after))]
+        hidden = [(moov_end + 8, new_moov)]
+        if after > length + 8:
+            hidden.append((moov_end + 8 + length, _free_header(after - length - 8)))
+        flip = (moov_start, _free_header(moov_end + 8 - moov_start))
+    elif before >= length + 16:
+        # [free ...][moov] -> [free][new moov][free]
+        prepare = [(region_start, _free_header(before))]
+        hidden = [(region_start + 8, new_moov),
+                  (region_start + 8 + length, _free_header(moov_end - region_start - 8 - length))]
+        flip = (region_start, _free_header(8))
+    elif region_end == file_size and region_end + 8 - region_start <= 0xffffffff:
+        # [free][moov][free] at the end -> [free][new moov]
+        prepare = []
+        hidden = [(region_end, _free_header(length + 8) + new_moov)]
+        flip = (region_start, _free_header(region_end + 8 - region_start))
+    elif padding == 0 or padding >= 8:
+        # [moov][free] -> [new moov][free]; the old free contents stay as they are
+        _journaled_overwrite(path, moov_start, new_moov + (_free_header(padding) if padding else b''))
+        return True
+    else:
+        return False
+
+    with open(path, 'r+b') as f:
+        # Merging padding into one free box and writing inside it leave a
+        # valid file at every step; only the flip exposes the new moov.
+        if prepare:
+            _write_synced(f, prepare)
+        _write_synced(f, hidden)
+        _write_synced(f, [flip])
+    return True
@@ -0,0 +1,25 @@
+import os
+from pathlib import Path
+from typing import List, Optional, Set, Tuple
+
+
+def batch_base_names(input_paths: List[str], output_dir: Optional[str]) -> List[str]:
+    """
+    Output base name for each input of a batch. Inputs that share a stem and
+    an output folder (same name, different source folders) get _2, _3, ...
+    suffixes so parallel workers never write to the same file. Without an
+    output_dir each input writes next to itself.
+    """
+    taken: Set[Tuple[str, str]] = set()
+    base_names: List[str] = []
+    for input_path in input_paths:
+        folder = os.path.abspath(output_dir or os.path.dirname(input_path))
+        stem = Path(input_path).stem
+        base_name = stem
+        counter = 1
+        while (folder, base_name.lower()) in taken:
+            counter += 1
+            base_name = f"{stem}_{counter}"
+        taken.add((folder, base_name.lower()))
+        base_names.append(base_name)
+    return base_names
@@ -0,0 +1,102 @@
+import hashlib
+import re
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+
+# Only parameters that never select content; e.g. GitHub's ?ref=<branch> does.
+TRACKING_PARAMS = {'fbclid', 'gclid', 'msclkid', 'mc_cid', 'mc_eid'}
+TRACKING_PREFIXES = ('utm_',)
+DEFAULT_PORTS = {'http': 80, 'https': 443}
+INDEX_PAGES = ('index.html', 'index.htm', 'index.php')
+
+SIMHASH_BITS = 64
+SIMHASH_BANDS = 4
+SIMHASH_MAX_DISTANCE = 3
+SHINGLE_SIZE = 3
+WORD_PATTERN = re.compile(r'\w+')
+
+
+def canonicalize_url(url: str) -> str:
+    """
+    Normalize a URL so that variants of the same page compare equal:
+    lowercase scheme and host, no default port, no fragment, no tracking
+    parameters, sorted query, no trailing slash or index page.
+    """
+    parts = urlsplit(url.strip())
+    scheme = parts.scheme.lower()
+    host = (parts.hostname or '').lower()
+    try:
+        port = parts.port
+    except ValueError:
+        port = None
+    netloc = host if port is None or DEFAULT_PORTS.get(scheme) == port else f'{host}:{port}'
+
+    path = re.sub(r'/{2,}', '/', parts.path or '/')
+    for index_page in INDEX_PAGES:
+        if path.endswith('/' + index_page):
+            path = path[:-len(index_page)]
+            break
+    if len(path) > 1:
+        path = path.rstrip('/')
+
+    query_items = [
+        (key, value) for key, value in parse_qsl(parts.query, keep_blank_values=True)
+        if key.lower() not in TRACKING_PARAMS and not key.lower().startswith(TRACKING_PREFIXES)
+    ]
+    query = urlencode(sorted(query_items))
+    return urlunsplit((scheme, netloc, path, query, ''))
+
+
+def simhash(text: str) -> int:
+    """
+    64-bit SimHash over the set of word shingles; similar texts differ in
+    few bits. Each distinct shingle counts once, so navigation and footer
+    text repeated across a page cannot outweigh its main content.
+    """
+    words = WORD_PATTERN.findall(text.lower())
+    if len(words) < SHINGLE_SIZE:
+        shingles = {' '.join(words)} if words else set()
+    else:
+        shingles = {' '.join(words[i:i + SHINGLE_SIZE]) for i in range(len(words) - SHINGLE_SIZE + 1)}
+
+    weights = [0] * SIMHASH_BITS
+    for shingle in shingles:
+        value = int.from_bytes(hashlib.blake2b(shingle.encode('utf-8'), digest_size=8).digest(), 'big')
+        for bit in range(SIMHASH_BITS):
+            weights[bit] += 1 if value >> bit & 1 else -1
+
+    fingerprint = 0
+    for bit, weight in enumerate(weights):
+        if weight > 0:
+            fingerprint |= 1 << bit
+    return fingerprint
+
+
+class NearDuplicateIndex:
+    """
+    SimHash fingerprints split into bands. Two fingerprints within
+    SIMHASH_MAX_DISTANCE bits must agree exactly on at least one band
+    (SIMHASH_BANDS > SIMHASH_MAX_DISTANCE), so only that band's bucket is
+    compared instead of every stored page.
+    """
+
+    def __init__(self, max_distance: int = SIMHASH_MAX_DISTANCE):
+        self.max_distance = max_distance
+        self.band_bits = SIMHASH_BITS // SIMHASH_BANDS
+        self.buckets: List[Dict[int, List[Tuple[int, str]]]] = [{} for _ in range(SIMHASH_BANDS)]
+
+    def _bands(self, fingerprint: int) -> List[int]:
+        mask = (1 << self.band_bits) - 1
+        return [fingerprint >> (band * self.band_bits) & mask for band in range(SIMHASH_BANDS)]
+
+    def find(self, fingerprint: int) -> Optional[str]:
+        for band, key in enumerate(self._bands(fingerprint)):
+            for other, url in self.buckets[band].get(key, ()):
+                if bin(fingerprint ^ other).count('1') <= self.max_distance:
+                    return url
+        return None
+
+    def add(self, fingerprint: int, url: str) -> None:
+        for band, key in enumerate(self._bands(fingerprint)):
+            self.buckets[band].setdefault(key, []).append((fingerprint, url))
@@ -3,7 +3,8 @@ import json
 import os
 from pathlib import Path
 import traceback
-from typing import Dict, Any, Optional, List
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Dict, Any, Optional, List, Tuple
 
 try:
     import tabula
@@ -11,50 +12,159 @@ try:
 except ImportError:
     tabula_available = False
 
+try:
+    import pdfplumber
+    pdfplumber_available = True
+except ImportError:
+    pdfplumber_available = False
+
+import pandas as pd
+
+from output_names import batch_base_names
+
 
-def extract_tables_from_pdf(pdf_path: str, output_format: str = 'csv', output_dir: Optional[str] = None) -> Dict[str, Any]:
+SUPPORTED_ENGINES = ['tabula', 'pdfplumber']
+
+_worker_pdf: Optional[Tuple[str, Any]] = None
+
+
+def _save_table(table: Any, output_dir: str, name: str, output_format: str) -> Dict[str, Any]:
+    if output_format.lower() == 'xlsx':
+        output_file = os.path.join(output_dir, f"{name}.xlsx")
+        table.to_excel(output_file, index=False)  # type: ignore
+    else:
+        output_file = os.path.join(output_dir, f"{name}.csv")
+        table.to_csv(output_file, index=False)  # type: ignore
+    
+    return {
+        'file': output_file,
+        'rows': len(table),
+        'columns': len(table.columns)  # type: ignore
+    }
+
+
+def _emit(event: Dict[str, Any]) -> None:
+    print(json.dumps(event), flush=True)
+
+
+def _open_worker_pdf(pdf_path: str) -> Any:
+    global _worker_pdf
+    if _worker_pdf is not None and _worker_pdf[0] == pdf_path:
+        return _worker_pdf[1]
+    if _worker_pdf is not None:
+        _worker_pdf[1].close()
+    pdf = pdfplumber.open(pdf_path)
+    _worker_pdf = (pdf_path, pdf)
+    return pdf
+
+
+def _extract_page_tables(pdf_path: str, page_index: int) -> Tuple[int, List[List[List[Any]]]]:
+    pdf = _open_worker_pdf(pdf_path)
+    page = pdf.pages[page_index]
+    try:
+        tables = [table for table in page.extract_tables() if table and len(table) > 1]
+    finally:
+        page.close()
+    return page_index, tables
+
+
+def _rows_to_dataframe(rows: List[List[Any]]) -> Any:
+    header = [str(cell) if cell is not None else '' for cell in rows[0]]
+    return pd.DataFrame(rows[1:], columns=header)
+
+
+def _count_pages(pdf_path: str) -> int:
+    with pdfplumber.open(pdf_path) as pdf:
+        return len(pdf.pages)
+
+
+def _extract_with_tabula(pdf_path: str, output_format: str, output_dir: str, stream: bool,
+                         base_name: str) -> List[Dict[str, Any]]:
+    tables = tabula.read_pdf(pdf_path, pages='all', multiple_tables=True)  # type: ignore
+    
+    saved_files: List[Dict[str, Any]] = []
+    
+    for i, table in enumerate(tables, 1):
+        saved = _save_table(table, output_dir, f"{base_name}_table_{i}", output_format)
+        saved_files.append(saved)
+        if stream:
+            _emit({'type': 'table', 'input': pdf_path, **saved})
+    
+    return saved_files
+
+
+def _extract_with_pdfplumber(pdf_path: str, output_format: str, output_dir: str, stream: bool,
+                             executor: Optional[ProcessPoolExecutor], base_name: str) -> List[Dict[str, Any]]:
+    page_count = _count_pages(pdf_path)
+    saved_by_page: Dict[int, List[Dict[str, Any]]] = {}
+    
+    def save_page(page_index: int, tables: List[List[List[Any]]]) -> None:
+        page_files: List[Dict[str, Any]] = []
+        for i, rows in enumerate(tables, 1):
+            name = f"{base_name}_page_{page_index + 1}_table_{i}"
+            saved = _save_table(_rows_to_dataframe(rows), output_dir, name, output_format)
+            saved['page'] = page_index + 1
+            page_files.append(saved)
+            if stream:
+                _emit({'type': 'table', 'input': pdf_path, **saved})
+        saved_by_page[page_index] = page_files
+    
+    if executor is None or page_count < 2:
+        for page_index in range(page_count):
+            save_page(*_extract_page_tables(pdf_path, page_index))
+    else:
+        futures = [executor.submit(_extract_page_tables, pdf_path, i) for i in range(page_count)]
+        for future in as_completed(futures):
+            save_page(*future.result())
+    
+    return [saved for page_index in sorted(saved_by_page) for saved in saved_by_page[page_index]]
+
+
+def _check_engine(engine: str) -> Optional[Dict[str, Any]]:
+    if engine not in SUPPORTED_ENGINES:
+        return {
+            'success': False,
+            'error': f'Unsupported engine: {engine}. Supported: {", ".join(SUPPORTED_ENGINES)}'
+        }
+    if engine == 'tabula' and not tabula_available:
+        return {
+            'success': False,
+            'error': 'tabula-py not available. Install: pip install tabula-py'
+        }
+    if engine == 'pdfplumber' and not pdfplumber_available:
+        return {
+            'success': False,
+            'error': 'pdfplumber not available. Install: pip install pdfplumber'
+        }
+    return None
+
+
+def _extract_tables(pdf_path: str, output_format: str, output_dir: Optional[str], engine: str,
+                    stream: bool, executor: Optional[ProcessPoolExecutor],
+                    base_name: Optional[str] = None) -> Dict[str, Any]:
     try:
-        if not tabula_available:
-            return {
-                'success': False,
-                'error': 'tabula-py not available. Install: pip install tabula-py'
-            }
-        
         if not output_dir:
             output_dir = os.path.dirname(pdf_path)
         
         os.makedirs(output_dir, exist_ok=True)
+        base_name = base_name or Path(pdf_path).stem
         
-        tables = tabula.read_pdf(pdf_path, pages='all', multiple_tables=True)  # type: ignore
+        if engine == 'pdfplumber':
+            saved_files = _extract_with_pdfplumber(pdf_path, output_format, output_dir, stream, executor, base_name)
+        else:
+            saved_files = _extract_with_tabula(pdf_path, output_format, output_dir, stream, base_name)
         
-        if not tables:
+        if not saved_files:
             return {
                 'success': False,
                 'error': 'No tables found in PDF'
             }
         
-        saved_files: List[Dict[str, Any]] = []
-        base_name: str = Path(pdf_path).stem
-        
-        for i, table in enumerate(tables, 1):
-            if output_format.lower() == 'xlsx':
-                output_file = os.path.join(output_dir, f"{base_name}_table_{i}.xlsx")
-                table.to_excel(output_file, index=False)  # type: ignore
-            else:
-                output_file = os.path.join(output_dir, f"{base_name}_table_{i}.csv")
-                table.to_csv(output_file, index=False)  # type: ignore
-            
-            saved_files.append({
-                'file': output_file,
-                'rows': len(table),
-                'columns': len(table.columns)  # type: ignore
-            })
-        
         return {
             'success': True,
-            'tables_found': len(tables),
+            'tables_found': len(saved_files),
             'files': saved_files,
-            'message': f'Extracted {len(tables)} table(s) from PDF'
+            'message': f'Extracted {len(saved_files)} table(s) from PDF'
         }
     
     except FileNotFoundError:
@@ -66,13 +176,84 @@ def extract_tables_from_pdf(pdf_path: str, output_format: str = 'csv', output_di
         }
 
 
+def extract_tables_from_pdf(pdf_path: str, output_format: str = 'csv', output_dir: Optional[str] = None,
+                            engine: str = 'tabula', max_workers: Optional[int] = None,
+                            stream: bool = False) -> Dict[str, Any]:
+    engine_error = _check_engine(engine)
+    if engine_error:
+        return engine_error
+    
+    if engine == 'pdfplumber' and max_workers != 1:
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            return _extract_tables(pdf_path, output_format, output_dir, engine, stream, executor)
+    
+    return _extract_tables(pdf_path, output_format, output_dir, engine, stream, None)
+
+
+def batch_extract_tables(pdf_paths: List[str], output_format: str = 'csv', output_dir: Optional[str] = None,
+                         engine: str = 'tabula', max_workers: Optional[int] = None,
+                         stream: bool = False) -> Dict[str, Any]:
+    """
+    Extract tables from many PDFs in one process. tabula-py keeps its JVM
+    in-process (via jpype) when available, so it is started once per batch
+    rather than once per file; the pdfplumber engine shares one page-level
+    process pool across every PDF.
+    """
+    engine_error = _check_engine(engine)
+    if engine_error:
+        return engine_error
+    
+    results: Dict[str, Any] = {
+        'success': True,
+        'extracted': [],
+        'failed': [],
+        'total': len(pdf_paths)
+    }
+    
+    executor: Optional[ProcessPoolExecutor] = None
+    if engine == 'pdfplumber' and max_workers != 1:
+        executor = ProcessPoolExecutor(max_workers=max_workers)
+    
+    try:
+        for pdf_path, base_name in zip(pdf_paths, batch_base_names(pdf_paths, output_dir)):
+            result = _extract_tables(pdf_path, output_format, output_dir, engine, stream, executor, base_name)
+            
+            if result['success']:
+                results['extracted'].append({
+                    'input': pdf_path,
+                    'tables_found': result['tables_found'],
+                    'files': result['files']
+                })
+            else:
+                results['failed'].append({
+                    'input': pdf_path,
+                    'error': result['error']
+                })
+                results['success'] = False
+            
+            if stream:
+                _emit({'type': 'file', 'input': pdf_path, 'success': result['success'],
+                       'error': result.get('error')})
+    finally:
+        if executor is not None:
+            executor.shutdown()
+    
+    tables_total = sum(item['tables_found'] for item in results['extracted'])
+    results['message'] = f'Extracted {tables_total} table(s) from {len(results["extracted"])}/{results["total"]} PDFs'
+    return results
+
+
 def main():
     try:
         input_data = json.loads(sys.stdin.read())
         
+        mode = input_data.get('mode', 'single')
         input_path = input_data.get('input')
         output_format = input_data.get('output_format', 'csv')
         output_dir = input_data.get('output_dir')
+        engine = input_data.get('engine', 'tabula')
+        max_workers = input_data.get('max_workers')
+        stream = input_data.get('stream', False)
         
         if not input_path:
             print(json.dumps({
@@ -81,7 +262,17 @@ def main():
             }))
             return
         
-        result = extract_tables_from_pdf(input_path, output_format, output_dir)
+        if mode == 'single':
+            result = extract_tables_from_pdf(input_path, output_format, output_dir, engine, max_workers, stream)
+        elif mode == 'batch':
+            input_files = input_path if isinstance(input_path, list) else [input_path]
+            result = batch_extract_tables(input_files, output_format, output_dir, engine, max_workers, stream)
+        else:
+            result = {
+                'success': False,
+                'error': f'Invalid mode: {mode}. Use "single" or "batch"'
+            }
+        
         print(json.dumps(result), flush=True)
     
     except json.JSONDecodeError as e:
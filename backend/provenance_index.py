@@ -0,0 +1,99 @@
+import json
+import os
+import sqlite3
+from datetime import datetime
+from typing import Any, Dict, Optional, Tuple
+
+
+FileKey = Tuple[int, int, int, int]
+
+
+class ProvenanceIndex:
+    """
+    Local SQLite index of verified content, keyed by path and searchable by
+    provenance_id and content hash. A row is reused only while the file's
+    size, mtime_ns and inode (and its sidecar's mtime) are unchanged.
+    """
+
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+        os.makedirs(os.path.dirname(db_path), exist_ok=True)
+        self.conn = sqlite3.connect(db_path)
+        self.conn.executescript('''
+            CREATE TABLE IF NOT EXISTS provenance (
+                path TEXT PRIMARY KEY,
+                size INTEGER NOT NULL,
+                mtime_ns INTEGER NOT NULL,
+                inode INTEGER NOT NULL,
+                sidecar_mtime_ns INTEGER NOT NULL,
+                content_hash TEXT NOT NULL,
+                provenance_id TEXT,
+                verified INTEGER NOT NULL,
+                metadata TEXT,
+                checked_at TEXT NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS idx_provenance_id ON provenance(provenance_id);
+            CREATE INDEX IF NOT EXISTS idx_content_hash ON provenance(content_hash);
+        ''')
+
+    @staticmethod
+    def file_key(content_path: str) -> FileKey:
+        stat = os.stat(content_path)
+        sidecar_path = content_path + '.openelara.json'
+        sidecar_mtime_ns = os.stat(sidecar_path).st_mtime_ns if os.path.exists(sidecar_path) else 0
+        return stat.st_size, stat.st_mtime_ns, stat.st_ino, sidecar_mtime_ns
+
+    def lookup(self, content_path: str, key: FileKey) -> Optional[Dict[str, Any]]:
+        row = self.conn.execute(
+            'SELECT content_hash, provenance_id, verified, metadata FROM provenance '
+            'WHERE path = ? AND size = ? AND mtime_ns = ? AND inode = ? AND sidecar_mtime_ns = ?',
+            (os.path.abspath(content_path), *key)
+        ).fetchone()
+        if row is None:
+            return None
+        return {
+            'content_hash': row[0],
+            'provenance_id': row[1],
+            'verified': bool(row[2]),
+            'metadata': json.loads(row[3]) if row[3] else None
+        }
+
+    def store(self, content_path: str, key: FileKey, content_hash: str,
+              metadata: Optional[Dict[str, Any]]) -> None:
+        self.conn.execute(
+            'INSERT OR REPLACE INTO provenance '
+            '(path, size, mtime_ns, inode, sidecar_mtime_ns, content_hash, provenance_id, verified, metadata, checked_at) '
+            'VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)',
+            (
+                os.path.abspath(content_path), *key, content_hash,
+                metadata.get('provenance_id') if metadata else None,
+                1 if metadata else 0,
+                json.dumps(metadata) if metadata else None,
+                datetime.now().isoformat()
+            )
+        )
+
+    def find_by_provenance_id(self, provenance_id: str) -> Optional[Dict[str, Any]]:
+        row = self.conn.execute(
+            'SELECT path, content_hash, metadata FROM provenance WHERE provenance_id = ?',
+            (provenance_id,)
+        ).fetchone()
+        if row is None:
+            return None
+        return {'path': row[0], 'content_hash': row[1], 'metadata': json.loads(row[2]) if row[2] else None}
+
+    def find_by_content_hash(self, content_hash: str) -> Optional[Dict[str, Any]]:
+        row = self.conn.execute(
+            'SELECT path, provenance_id, metadata FROM provenance WHERE content_hash = ?',
+            (content_hash,)
+        ).fetchone()
+        if row is None:
+            return None
+        return {'path': row[0], 'provenance_id': row[1], 'metadata': json.loads(row[2]) if row[2] else None}
+
+    def commit(self) -> None:
+        self.conn.commit()
+
+    def close(self) -> None:
+        self.conn.commit()
+        self.conn.close()
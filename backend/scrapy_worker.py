@@ -2,58 +2,182 @@
 # backend/scrapy_worker.py
 
 import sys
+import hashlib
 import json
 import os
 from pathlib import Path
 import scrapy
 from scrapy.crawler import CrawlerProcess
 import tempfile
-import shutil
 from datetime import datetime
 import re
-from typing import Any, List, Optional, Dict, Union, Tuple, cast
+import time
+from typing import Any, List, Optional, Dict, Set, Union, Tuple, cast
+
+from lxml_markdown import element_to_markdown, scan_page
+from page_dedup import NearDuplicateIndex, canonicalize_url, simhash
+
+DEFAULT_CONCURRENCY_PER_DOMAIN = 4
+DEFAULT_DOWNLOAD_DELAY = 1.0
+DEFAULT_AUTOTHROTTLE_TARGET_CONCURRENCY = 2.0
+DEFAULT_AUTOTHROTTLE_START_DELAY = 1.0
+DEFAULT_AUTOTHROTTLE_MAX_DELAY = 10.0
+MAX_CONCURRENT_REQUESTS = 32
+CACHE_DIRNAME = '.scrapy_cache'
 
 class AIScraperSpider(scrapy.Spider):
     name = 'ai_scraper'
     
-    def __init__(self, start_urls: Optional[List[str]] = None, scrape_type: str = 'basic', max_pages: Union[str, int] = 1, output_dir: Optional[str] = None, *args: Any, **kwargs: Any) -> None:
+    def __init__(self, start_urls: Optional[List[str]] = None, scrape_type: str = 'basic', max_pages: Union[str, int] = 1, output_dir: Optional[str] = None, cache_dir: Optional[str] = None, knowledge_base_path: Optional[str] = None, skip_near_duplicates: bool = True, *args: Any, **kwargs: Any) -> None:
         super(AIScraperSpider, self).__init__(*args, **kwargs)
         self.start_urls = start_urls or []
         self.scrape_type = scrape_type
         self.max_pages = int(max_pages)
         self.scraped_count = 0
         self.output_dir = output_dir
+        self.knowledge_base_path = knowledge_base_path
+        self.skip_near_duplicates = skip_near_duplicates
+        self.cache_counts = {'fetched': 0, 'not_modified': 0, 'changed': 0, 'unchanged': 0}
+        self.dedup_counts = {'duplicate_urls': 0, 'near_duplicates': 0}
+        self.requested_urls: Set[str] = set()
+        self.parsed_urls: Set[str] = set()
+        self.near_duplicates = NearDuplicateIndex()
+        # url -> {'sha256': body hash, 'file': output file name} from earlier
+        # runs, plus 'near_duplicate_of' for pages skipped as near-duplicates.
+        self.content_hashes: Optional[Dict[str, Dict[str, Any]]] = None
+        self.content_hashes_path: Optional[Path] = None
+        if cache_dir:
+            self.content_hashes_path = Path(cache_dir) / f'content_hashes_{scrape_type}.json'
+            self.content_hashes = {}
+            if self.content_hashes_path.exists():
+                try:
+                    with open(self.content_hashes_path, 'r', encoding='utf-8') as f:
+                        self.content_hashes = json.load(f)
+                except (OSError, json.JSONDecodeError) as e:
+                    print(f"Warning: Ignoring unreadable content hash store: {e}", flush=True)
+
+    def closed(self, reason: str) -> None:
+        if self.content_hashes is None or self.content_hashes_path is None:
+            return
+        temp_path = self.content_hashes_path.with_suffix('.tmp')
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.content_hashes, f)
+        os.replace(temp_path, self.content_hashes_path)
+
+    def previous_output(self, url: str) -> Optional[str]:
+        if self.content_hashes is None:
+            return None
+        return self.content_hashes.get(url, {}).get('file')
+
+    def is_ingested(self, url: str) -> bool:
+        return self.content_hashes is not None and bool(self.content_hashes.get(url, {}).get('ingested'))
+
+    def mark_ingested(self, url: str) -> None:
+        if self.content_hashes is not None and url in self.content_hashes:
+            self.content_hashes[url]['ingested'] = True
+
+    def record_output(self, url: str, filename: str) -> None:
+        if self.content_hashes is not None and url in self.content_hashes:
+            self.content_hashes[url]['file'] = filename
+
+    def _is_unchanged(self, response: Any) -> bool:
+        """
+        True when the page body hashes the same as on the last run and that
+        run's output file is still there (or that run skipped the page as a
+        near-duplicate), so extraction and writing can be skipped.
+        Served-from-cache and 304-revalidated responses carry the
+        'cached' flag; everything else came over the network.
+        """
+        if self.content_hashes is None:
+            return False
+        if 'cached' in response.flags:
+            self.cache_counts['not_modified'] += 1
+        else:
+            self.cache_counts['fetched'] += 1
+
+        body_hash = hashlib.sha256(response.body).hexdigest()
+        previous = self.content_hashes.get(response.url)
+        previous_file = previous.get('file') if previous else None
+        if previous is not None and previous.get('sha256') == body_hash:
+            skipped = bool(previous.get('near_duplicate_of')) and self.skip_near_duplicates
+            if skipped or (previous_file and (Path(cast(str, self.output_dir)) / previous_file).exists()):
+                self.cache_counts['unchanged'] += 1
+                return True
+
+        self.cache_counts['changed'] += 1
+        self.content_hashes[response.url] = {'sha256': body_hash, 'file': previous_file}
+        return False
 
     async def start(self):
+        # max-age=0 makes the HTTP cache revalidate every page instead of
+        # trusting heuristic freshness, so re-crawls see edits immediately.
+        headers = {'Cache-Control': 'max-age=0'} if self.content_hashes is not None else None
         if self.start_urls:
             for url in self.start_urls:
-                yield scrapy.Request(url=url, callback=self.parse)
+                canonical_url = canonicalize_url(url)
+                if canonical_url in self.requested_urls:
+                    self.dedup_counts['duplicate_urls'] += 1
+                    continue
+                self.requested_urls.add(canonical_url)
+                yield scrapy.Request(url=url, callback=self.parse, headers=headers)
     
     def parse(self, response: Any) -> Any:
+        # Responses already in flight when max_pages is reached are dropped.
+        if self.scraped_count >= self.max_pages:
+            return
+        # Different requests can land on the same page after redirects.
+        canonical_url = canonicalize_url(response.url)
+        if canonical_url in self.parsed_urls:
+            self.dedup_counts['duplicate_urls'] += 1
+            print(f"DEBUG: Skipping duplicate URL: {response.url}", flush=True)
+            return
+        self.parsed_urls.add(canonical_url)
         self.scraped_count += 1
         print(f"DEBUG: Scraping page {self.scraped_count}: {response.url}", flush=True)
         
-        internal_links: List[str] = []
-        for link in response.css('a::attr(href)').getall():
-            absolute_url = response.urljoin(link)
-            if absolute_url.startswith(response.url.split('//')[0] + '//' + response.url.split('//')[1].split('/')[0]):
-                internal_links.append(absolute_url)
+        if self._is_unchanged(response):
+            previous = cast(Dict[str, Dict[str, Any]], self.content_hashes)[response.url]
+            duplicate_of = previous.get('near_duplicate_of')
+            if duplicate_of and self.skip_near_duplicates:
+                self.dedup_counts['near_duplicates'] += 1
+                print(f"DEBUG: Skipping near-duplicate of {duplicate_of}: {response.url}", flush=True)
+            else:
+                previous_simhash = previous.get('simhash')
+                if previous_simhash is not None:
+                    self.near_duplicates.add(int(previous_simhash, 16), response.url)
+                yield {
+                    'url': response.url,
+                    'timestamp': datetime.now().isoformat(),
+                    'scrape_type': self.scrape_type,
+                    'unchanged': True
+                }
+            if self.scraped_count >= self.max_pages:
+                raise cast(Any, scrapy.exceptions).CloseSpider(f"Reached max_pages limit: {self.max_pages}")
+            return
+        
+        # One walk over the tree parsel already built collects links, title,
+        # meta and the main element; markdown is emitted from that same tree.
+        page = scan_page(response.selector.root, response.url)
         
         if self.scrape_type == 'links':
             yield {
                 'url': response.url,
-                'internal_links': internal_links,
+                'internal_links': page['internal_links'],
                 'timestamp': datetime.now().isoformat(),
                 'scrape_type': self.scrape_type
             }
         else:
-            main_content = self.extract_main_content(response)
+            main_content = self.extract_main_content(page['main_element'])
+            if main_content and self.skip_near_duplicates and self._is_near_duplicate(response.url, main_content):
+                if self.scraped_count >= self.max_pages:
+                    raise cast(Any, scrapy.exceptions).CloseSpider(f"Reached max_pages limit: {self.max_pages}")
+                return
 
             yield {
                 'url': response.url,
-                'title': response.css('title::text').get(default='').strip(),
-                'description': response.css('meta[name="description"]::attr(content)').get(default=''),
-                'h1': response.css('h1::text').get(default=''),
+                'title': page['title'],
+                'description': page['description'],
+                'h1': page['h1'],
                 'main_content': main_content,
                 'timestamp': datetime.now().isoformat(),
                 'scrape_type': self.scrape_type
@@ -62,104 +186,197 @@ class AIScraperSpider(scrapy.Spider):
         if self.scraped_count >= self.max_pages:
             raise cast(Any, scrapy.exceptions).CloseSpider(f"Reached max_pages limit: {self.max_pages}")
     
-    def extract_main_content(self, response: Any) -> str:
-        try:
-            from markdownify import markdownify as md
-            
-            main_selectors = [
-                'main',
-                'article',
-                '[role="main"]',
-                '#main-content',
-                '#content',
-                '.main-content',
-                '.content',
-                'body'
-            ]
-            
-            main_element = None
-            for selector in main_selectors:
-                main_element = response.css(selector).get()
-                if main_element:
-                    break
-            
-            if not main_element:
-                main_element = response.css('body').get()
-            
-            markdown_content = md(
-                main_element,
-                heading_style="ATX",
-                bullets="-",
-                strong_em_symbol="**",
-                strip=['script', 'style', 'nav', 'footer', 'header', 'aside'],
-            )
-            
-            lines = [line.rstrip() for line in markdown_content.split('\n')]
-            cleaned_lines: List[str] = []
-            blank_count = 0
-            for line in lines:
-                if line.strip():
-                    cleaned_lines.append(line)
-                    blank_count = 0
-                else:
-                    blank_count += 1
-                    if blank_count <= 2:
-                        cleaned_lines.append(line)
-            
-            return '\n'.join(cleaned_lines).strip()
-            
-        except ImportError:
-            return self._manual_html_to_markdown(response)
-    
-    def _manual_html_to_markdown(self, response: Any) -> str:
-        """
-        Fallback manual conversion of HTML to Markdown.
-        Preserves basic structure: headings, paragraphs, lists, bold, italic.
-        """
-        markdown_parts: List[str] = []
-        
-        for i in range(1, 7):
-            headings = response.css(f'h{i}::text').getall()
-            for heading in headings:
-                heading_text = heading.strip()
-                if heading_text:
-                    markdown_parts.append(f"{'#' * i} {heading_text}\n")
-        
-        paragraphs = response.css('p').getall()
-        for p in paragraphs:
-            text = re.sub(r'<[^>]+>', '', p).strip()
-            text = re.sub(r'<strong>(.*?)</strong>', r'**\1**', text)
-            text = re.sub(r'<b>(.*?)</b>', r'**\1**', text)
-            text = re.sub(r'<em>(.*?)</em>', r'*\1*', text)
-            text = re.sub(r'<i>(.*?)</i>', r'*\1*', text)
-            
-            if text:
-                markdown_parts.append(f"{text}\n")
-        
-        ul_lists = response.css('ul')
-        for ul in ul_lists:
-            items = ul.css('li::text').getall()
-            for item in items:
-                item_text = item.strip()
-                if item_text:
-                    markdown_parts.append(f"- {item_text}")
-            markdown_parts.append("")
-        
-        ol_lists = response.css('ol')
-        for ol in ol_lists:
-            items = ol.css('li::text').getall()
-            for idx, item in enumerate(items, 1):
-                item_text = item.strip()
-                if item_text:
-                    markdown_parts.append(f"{idx}. {item_text}")
-            markdown_parts.append("")
+    def _is_near_duplicate(self, url: str, main_content: str) -> bool:
+        fingerprint = simhash(main_content)
+        duplicate_of = self.near_duplicates.find(fingerprint)
+        if duplicate_of is not None:
+            self.dedup_counts['near_duplicates'] += 1
+            print(f"DEBUG: Skipping near-duplicate of {duplicate_of}: {url}", flush=True)
+            if self.content_hashes is not None and url in self.content_hashes:
+                self.content_hashes[url]['near_duplicate_of'] = duplicate_of
+            return True
+        self.near_duplicates.add(fingerprint, url)
+        if self.content_hashes is not None and url in self.content_hashes:
+            self.content_hashes[url]['simhash'] = f'{fingerprint:016x}'
+        return False
+
+    def extract_main_content(self, main_element: Any) -> str:
+        markdown_content = element_to_markdown(main_element)
         
-        content = '\n'.join(markdown_parts)
-        content = re.sub(r'\n{3,}', '\n\n', content)
+        cleaned_lines: List[str] = []
+        blank_count = 0
+        for line in markdown_content.split('\n'):
+            if line.strip():
+                cleaned_lines.append(line)
+                blank_count = 0
+            else:
+                blank_count += 1
+                if blank_count <= 2:
+                    cleaned_lines.append(line)
         
-        return content.strip()
+        return '\n'.join(cleaned_lines).strip()
+
+INDEX_FILENAME = 'scraped_index.jsonl'
 
-def run_scrapy_task(command: str, urls: List[str], scrape_type: str = 'basic', max_pages: Union[str, int] = 1, output_dir: Optional[str] = None) -> Tuple[bool, str]:
+def _item_markdown(item: Dict[str, Any]) -> str:
+    markdown_content = f"# {item.get('title', 'Untitled')}\n\n"
+    markdown_content += f"**URL:** {item.get('url', 'N/A')}\n\n"
+    markdown_content += item.get('main_content', 'No main content found.')
+    return markdown_content
+
+class ScrapedItemWriterPipeline:
+    """
+    Writes each item to disk as it arrives (markdown for content scrapes, a
+    .txt link list for link scrapes) and appends one line per item to a JSONL
+    index, so a crawl never holds its pages in memory.
+    """
+
+    def open_spider(self, spider: Any) -> None:
+        self.output_dir = Path(spider.output_dir)
+        self.index_file = open(self.output_dir / INDEX_FILENAME, 'w', encoding='utf-8')
+        spider.written_files = []
+        spider.index_path = str(self.output_dir / INDEX_FILENAME)
+
+    def close_spider(self, spider: Any) -> None:
+        self.index_file.close()
+
+    def _target_path(self, spider: Any, url: str, base_filename: str, extension: str) -> Path:
+        # A page that changed since the last run overwrites its old file.
+        previous_file = spider.previous_output(url)
+        if previous_file and previous_file.endswith(extension):
+            return self.output_dir / previous_file
+        target_path = self.output_dir / f'{base_filename}{extension}'
+        counter = 1
+        while target_path.exists():
+            target_path = self.output_dir / f'{base_filename}_copy{counter}{extension}'
+            counter += 1
+        return target_path
+
+    def process_item(self, item: Dict[str, Any], spider: Any) -> Dict[str, Any]:
+        if item.get('unchanged'):
+            self._write_index_entry({**item, 'file': spider.previous_output(item['url'])})
+            return item
+
+        target_path: Optional[Path] = None
+
+        if item.get('scrape_type') == 'links':
+            from urllib.parse import urlparse
+            parsed_url = cast(Any, urlparse(item.get('url')))
+            base_filename = cast(str, parsed_url.hostname).replace('.', '_') or 'untitled_links'
+            base_filename = re.sub(r'[^a-z0-9_]', '', base_filename.lower())[:50]
+
+            links_content = "\n".join(item.get('internal_links', []))
+            if links_content:
+                target_path = self._target_path(spider, item['url'], base_filename, '.txt')
+                with open(target_path, 'w', encoding='utf-8') as f:
+                    f.write(links_content)
+        else:
+            base_filename = re.sub(r'[^a-z0-9]', '_', item.get('title', item.get('h1', 'untitled')).lower())[:50]
+            target_path = self._target_path(spider, item['url'], base_filename, '.md')
+
+            with open(target_path, 'w', encoding='utf-8') as f:
+                f.write(_item_markdown(item))
+
+        if target_path is not None:
+            spider.written_files.append(target_path.name)
+            spider.record_output(item['url'], target_path.name)
+
+        index_entry = {key: value for key, value in item.items() if key not in ('main_content', 'internal_links')}
+        index_entry['file'] = target_path.name if target_path is not None else None
+        if 'internal_links' in item:
+            index_entry['link_count'] = len(item['internal_links'])
+        else:
+            index_entry['content_length'] = len(item.get('main_content', ''))
+        self._write_index_entry(index_entry)
+        return item
+
+    def _write_index_entry(self, index_entry: Dict[str, Any]) -> None:
+        self.index_file.write(json.dumps(index_entry) + '\n')
+        self.index_file.flush()
+
+class KnowledgeBaseIngestPipeline:
+    """
+    Streams each scraped page through ingest.py's chunking and embedding into
+    the knowledge_base collection as it arrives, with the page URL as source.
+    Chroma calls run on one dedicated thread so downloads keep going while a
+    page is embedded.
+    """
+
+    def open_spider(self, spider: Any) -> None:
+        from twisted.python.threadpool import ThreadPool
+        from ingest import ingest_markdown, open_knowledge_base
+
+        self.ingest_markdown = ingest_markdown
+        self.collection, self.text_splitter = open_knowledge_base(spider.knowledge_base_path)
+        self.thread_pool = ThreadPool(minthreads=1, maxthreads=1, name='knowledge-base-ingest')
+        self.thread_pool.start()
+        spider.ingest_counts = {'pages': 0, 'chunks': 0, 'errors': 0}
+
+    def close_spider(self, spider: Any) -> None:
+        self.thread_pool.stop()
+
+    def process_item(self, item: Dict[str, Any], spider: Any) -> Any:
+        if item.get('scrape_type') == 'links':
+            return item
+
+        url = item['url']
+        if item.get('unchanged'):
+            # Unchanged pages are re-ingested only if an earlier run wrote
+            # them without ingesting.
+            previous_file = spider.previous_output(url)
+            if spider.is_ingested(url) or not previous_file:
+                return item
+            with open(Path(spider.output_dir) / previous_file, 'r', encoding='utf-8') as f:
+                content = f.read()
+        else:
+            content = _item_markdown(item)
+
+        from twisted.internet import reactor
+        from twisted.internet.threads import deferToThreadPool
+
+        def ingested(num_chunks: int) -> Dict[str, Any]:
+            spider.ingest_counts['pages'] += 1
+            spider.ingest_counts['chunks'] += num_chunks
+            spider.mark_ingested(url)
+            print(f"DEBUG: Ingested {num_chunks} chunks from {url}", flush=True)
+            return item
+
+        def failed(failure: Any) -> Dict[str, Any]:
+            spider.ingest_counts['errors'] += 1
+            print(f"ERROR: Knowledge base ingestion failed for {url}: {failure.getErrorMessage()}", flush=True)
+            return item
+
+        deferred = deferToThreadPool(
+            reactor, self.thread_pool, self.ingest_markdown,
+            self.collection, self.text_splitter, content, url, True
+        )
+        deferred.addCallbacks(ingested, failed)
+        return deferred
+
+def _crawl_stats(crawler: Any, elapsed: float) -> Dict[str, Any]:
+    stats = crawler.stats.get_stats()
+    spider = crawler.spider
+    pages = spider.scraped_count if spider is not None else 0
+    response_bytes = stats.get('downloader/response_bytes', 0)
+    return {
+        'pages': pages,
+        'responses': stats.get('response_received_count', 0),
+        'bytes': response_bytes,
+        'elapsed_seconds': round(elapsed, 2),
+        'pages_per_second': round(pages / elapsed, 2) if elapsed > 0 else 0.0,
+        'bytes_per_second': round(response_bytes / elapsed) if elapsed > 0 else 0
+    }
+
+def run_scrapy_task(command: str, urls: List[str], scrape_type: str = 'basic', max_pages: Union[str, int] = 1, output_dir: Optional[str] = None,
+                    concurrency_per_domain: int = DEFAULT_CONCURRENCY_PER_DOMAIN,
+                    download_delay: float = DEFAULT_DOWNLOAD_DELAY,
+                    autothrottle_target_concurrency: float = DEFAULT_AUTOTHROTTLE_TARGET_CONCURRENCY,
+                    autothrottle_start_delay: float = DEFAULT_AUTOTHROTTLE_START_DELAY,
+                    autothrottle_max_delay: float = DEFAULT_AUTOTHROTTLE_MAX_DELAY,
+                    use_cache: bool = True,
+                    cache_dir: Optional[str] = None,
+                    knowledge_base_path: Optional[str] = None,
+                    skip_near_duplicates: bool = True) -> Tuple[bool, Union[Dict[str, Any], str]]:
     print(f"--- Starting Scrapy Task: {command} ---", flush=True)
 
     if output_dir is None:
@@ -169,6 +386,13 @@ def run_scrapy_task(command: str, urls: List[str], scrape_type: str = 'basic', m
         os.makedirs(output_dir, exist_ok=True)
         print(f"Using output directory: {output_dir}", flush=True)
 
+    if use_cache:
+        cache_dir = cache_dir or str(Path(output_dir) / CACHE_DIRNAME)
+        os.makedirs(cache_dir, exist_ok=True)
+        print(f"Using HTTP cache directory: {cache_dir}", flush=True)
+    else:
+        cache_dir = None
+
     settings_dict: Dict[str, Any] = {
         'BOT_NAME': 'AI Assistant Scraper',
         'SPIDER_MODULES': ['scrapy_worker'],
@@ -176,12 +400,29 @@ def run_scrapy_task(command: str, urls: List[str], scrape_type: str = 'basic', m
         'ROBOTSTXT_OBEY': True,
         'USER_AGENT': 'AI-Assistant-Scraper/1.0 (+https://applymytech.ai)',
         'LOG_LEVEL': 'INFO',
-        'DOWNLOAD_DELAY': 1,
-        'CONCURRENT_REQUESTS': 1,
-        'RANDOMIZE_DOWNLOAD_DELAY': 0.5,
+        # Politeness is per host: each domain gets its own download slot with
+        # its own delay and concurrency, so different hosts crawl in parallel.
+        'CONCURRENT_REQUESTS': MAX_CONCURRENT_REQUESTS,
+        'CONCURRENT_REQUESTS_PER_DOMAIN': concurrency_per_domain,
+        'DOWNLOAD_DELAY': download_delay,
+        'RANDOMIZE_DOWNLOAD_DELAY': True,
         'AUTOTHROTTLE_ENABLED': True,
-        'FEEDS': { str(Path(output_dir) / 'scraped_data.json'): {'format': 'json', 'overwrite': True} }
+        'AUTOTHROTTLE_TARGET_CONCURRENCY': autothrottle_target_concurrency,
+        'AUTOTHROTTLE_START_DELAY': autothrottle_start_delay,
+        'AUTOTHROTTLE_MAX_DELAY': autothrottle_max_delay,
+        'ITEM_PIPELINES': {'scrapy_worker.ScrapedItemWriterPipeline': 300}
     }
+    if knowledge_base_path:
+        settings_dict['ITEM_PIPELINES']['scrapy_worker.KnowledgeBaseIngestPipeline'] = 400
+        print(f"Ingesting pages into knowledge base at: {knowledge_base_path}", flush=True)
+    if cache_dir:
+        # RFC2616Policy revalidates stale entries with If-None-Match /
+        # If-Modified-Since; a 304 is served from the cache.
+        settings_dict.update({
+            'HTTPCACHE_ENABLED': True,
+            'HTTPCACHE_DIR': str(Path(cache_dir) / 'http'),
+            'HTTPCACHE_POLICY': 'scrapy.extensions.httpcache.RFC2616Policy'
+        })
     
     original_cwd = os.getcwd()
     script_dir = os.path.dirname(os.path.abspath(__file__))
@@ -190,61 +431,46 @@ def run_scrapy_task(command: str, urls: List[str], scrape_type: str = 'basic', m
 
     try:
         process = CrawlerProcess(settings_dict)
+        crawler = process.create_crawler(AIScraperSpider)
 
         process.crawl(
-            AIScraperSpider,
+            crawler,
             start_urls=urls,
             scrape_type=scrape_type,
             max_pages=max_pages,
-            output_dir=output_dir
+            output_dir=output_dir,
+            cache_dir=cache_dir,
+            knowledge_base_path=knowledge_base_path,
+            skip_near_duplicates=skip_near_duplicates
         )
 
+        crawl_start = time.perf_counter()
         process.start()
+        crawl_stats = _crawl_stats(crawler, time.perf_counter() - crawl_start)
 
-        results_file_path = Path(output_dir) / 'scraped_data.json'
-        all_results: List[Any] = []
-        if results_file_path.exists():
-            with open(results_file_path, 'r', encoding='utf-8') as f:
-                all_results = cast(List[Any], json.load(f))
-            os.remove(results_file_path)
-
-        for result in all_results:
-            result = cast(Dict[str, Any], result)
-
-            if scrape_type == 'links':
-                from urllib.parse import urlparse
-                parsed_url = cast(Any, urlparse(result.get('url')))
-                base_filename = cast(str, parsed_url.hostname).replace('.', '_') or 'untitled_links'
-                base_filename = re.sub(r'[^a-z0-9_]', '', base_filename.lower())[:50]
-                
-                links_path = Path(output_dir) / f'{base_filename}.txt'
-                counter = 1
-                while links_path.exists():
-                    links_path = Path(output_dir) / f'{base_filename}_copy{counter}.txt'
-                    counter += 1
-
-                links_content = "\n".join(result.get('internal_links', []))
-                if links_content:
-                    with open(links_path, 'w', encoding='utf-8') as f:
-                        f.write(links_content)
-            else:
-                base_filename = re.sub(r'[^a-z0-9]', '_', result.get('title', result.get('h1', 'untitled')).lower())[:50]
-                
-                content_path = Path(output_dir) / f'{base_filename}.md'
-                counter = 1
-                while content_path.exists():
-                    content_path = Path(output_dir) / f'{base_filename}_copy{counter}.md'
-                    counter += 1
-
-                markdown_content = f"# {result.get('title', 'Untitled')}\n\n"
-                markdown_content += f"**URL:** {result.get('url', 'N/A')}\n\n"
-                markdown_content += result.get('main_content', 'No main content found.')
-                
-                with open(content_path, 'w', encoding='utf-8') as f:
-                    f.write(markdown_content)
-
-        print(f"Scraping complete. Found {len(all_results)} items.", flush=True)
-        return True, json.dumps(all_results)
+        spider = cast(Any, crawler.spider)
+        written_files: List[str] = list(getattr(spider, 'written_files', []))
+
+        print(f"Scraping complete. Wrote {len(written_files)} files.", flush=True)
+        if cache_dir:
+            counts = spider.cache_counts
+            print(f"Cache: {counts['fetched']} fetched, {counts['not_modified']} not modified, "
+                  f"{counts['changed']} changed, {counts['unchanged']} unchanged", flush=True)
+        print(f"Dedup: {spider.dedup_counts['duplicate_urls']} duplicate URLs, "
+              f"{spider.dedup_counts['near_duplicates']} near-duplicate pages skipped", flush=True)
+        print(f"Crawled {crawl_stats['pages']} pages in {crawl_stats['elapsed_seconds']}s "
+              f"({crawl_stats['pages_per_second']} pages/s, {crawl_stats['bytes_per_second']} bytes/s)", flush=True)
+        return True, {
+            'items': crawl_stats['pages'],
+            'output_dir': output_dir,
+            'index_file': getattr(spider, 'index_path', None),
+            'files': written_files,
+            'filename': written_files[0] if written_files else None,
+            'stats': crawl_stats,
+            'cache': spider.cache_counts if cache_dir else None,
+            'dedup': spider.dedup_counts,
+            'knowledge_base': getattr(spider, 'ingest_counts', None)
+        }
             
     except Exception as e:
         error_msg = f"Scrapy task failed: {str(e)}"
@@ -254,13 +480,6 @@ def run_scrapy_task(command: str, urls: List[str], scrape_type: str = 'basic', m
     finally:
         os.chdir(original_cwd)
         print(f"DEBUG: Changed directory back to: {os.getcwd()}", flush=True)
-        
-        if output_dir and (output_dir.startswith('/tmp/') or output_dir.startswith(tempfile.gettempdir())):
-            try:
-                shutil.rmtree(output_dir)
-                print(f"Cleaned up temp directory: {output_dir}", flush=True)
-            except Exception as cleanup_error:
-                print(f"Warning: Could not clean up temp directory: {cleanup_error}", flush=True)
 
 def main() -> None:
     if len(sys.argv) < 2:
@@ -278,16 +497,36 @@ def main() -> None:
     scrape_type = payload.get('scrapeType', 'content')
     max_pages = payload.get('maxPages', len(urls))
     output_dir = payload.get('outputDir', None)
+    concurrency_per_domain = int(payload.get('concurrencyPerDomain', DEFAULT_CONCURRENCY_PER_DOMAIN))
+    download_delay = float(payload.get('downloadDelay', DEFAULT_DOWNLOAD_DELAY))
+    autothrottle_target_concurrency = float(payload.get('autothrottleTargetConcurrency', DEFAULT_AUTOTHROTTLE_TARGET_CONCURRENCY))
+    autothrottle_start_delay = float(payload.get('autothrottleStartDelay', DEFAULT_AUTOTHROTTLE_START_DELAY))
+    autothrottle_max_delay = float(payload.get('autothrottleMaxDelay', DEFAULT_AUTOTHROTTLE_MAX_DELAY))
+    use_cache = bool(payload.get('useCache', True))
+    cache_dir = payload.get('cacheDir', None)
+    knowledge_base_path = payload.get('writablePath') if payload.get('ingestToKnowledgeBase') else None
+    skip_near_duplicates = bool(payload.get('skipNearDuplicates', True))
     
     if task == "scrape":
         if not urls or len(urls) == 0:
             print("ERROR: scrape command requires a list of URLs", flush=True)
             sys.exit(1)
         
-        success, result = run_scrapy_task(task, urls, scrape_type, max_pages, output_dir)
+        success, result = run_scrapy_task(
+            task, urls, scrape_type, max_pages, output_dir,
+            concurrency_per_domain=concurrency_per_domain,
+            download_delay=download_delay,
+            autothrottle_target_concurrency=autothrottle_target_concurrency,
+            autothrottle_start_delay=autothrottle_start_delay,
+            autothrottle_max_delay=autothrottle_max_delay,
+            use_cache=use_cache,
+            cache_dir=cache_dir,
+            knowledge_base_path=knowledge_base_path,
+            skip_near_duplicates=skip_near_duplicates
+        )
         
         if success:
-            print(json.dumps({"success": True, "data": result}), flush=True)
+            print(json.dumps({"success": True, **cast(Dict[str, Any], result)}), flush=True)
         else:
             print(json.dumps({"success": False, "error": result}), flush=True)
             sys.exit(1)
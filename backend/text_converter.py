@@ -1,71 +1,123 @@
 """
 Universal Text File Converter
 Converts between various text-based file formats using Markdown as an intermediary
-Supports: TXT, MD, HTML, RTF, DOCX (via existing workers)
+Supports: TXT, MD, HTML, RTF, DOCX (emitted in-process via markdown_to_docx)
 """
 
 import sys
 import json
 import os
 import traceback
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from html.parser import HTMLParser
 from pathlib import Path
-from typing import Any, Dict, List, Union
+from typing import Any, Callable, Dict, List, Optional, Tuple, Union
+
+from markdown_parser import parse_markdown, render_html
+from markdown_to_docx import parse_markdown_to_docx
+from output_names import batch_base_names
 
 
 SUPPORTED_FORMATS = ['txt', 'md', 'markdown', 'html', 'htm', 'rtf', 'docx', 'doc']
 
 
-def text_to_markdown(text: str, source_format: str) -> str:
-    if source_format in ['txt', 'md', 'markdown']:
-        return text
-    
-    if source_format in ['html', 'htm']:
-        import re
-        text = re.sub(r'<h1[^>]*>(.*?)</h1>', r'# \1', text, flags=re.IGNORECASE)
-        text = re.sub(r'<h2[^>]*>(.*?)</h2>', r'## \1', text, flags=re.IGNORECASE)
-        text = re.sub(r'<h3[^>]*>(.*?)</h3>', r'### \1', text, flags=re.IGNORECASE)
-        text = re.sub(r'<strong>(.*?)</strong>', r'**\1**', text, flags=re.IGNORECASE)
-        text = re.sub(r'<b>(.*?)</b>', r'**\1**', text, flags=re.IGNORECASE)
-        text = re.sub(r'<em>(.*?)</em>', r'*\1*', text, flags=re.IGNORECASE)
-        text = re.sub(r'<i>(.*?)</i>', r'*\1*', text, flags=re.IGNORECASE)
-        text = re.sub(r'<code>(.*?)</code>', r'`\1`', text, flags=re.IGNORECASE)
-        text = re.sub(r'<li[^>]*>(.*?)</li>', r'- \1', text, flags=re.IGNORECASE)
-        text = re.sub(r'<br\s*/?>', '\n', text, flags=re.IGNORECASE)
-        text = re.sub(r'<p[^>]*>(.*?)</p>', r'\1\n\n', text, flags=re.IGNORECASE)
-        text = re.sub(r'<[^>]+>', '', text)
-        return text
-    
-    return text
+HTML_READ_CHUNK = 64 * 1024
 
+HTML_HEADING_PREFIXES = {f'h{level}': '#' * level + ' ' for level in range(1, 7)}
+HTML_INLINE_MARKERS = {'strong': '**', 'b': '**', 'em': '*', 'i': '*', 'code': '`'}
+HTML_SKIPPED_TAGS = {'script', 'style'}
 
-def markdown_to_html(markdown_text: str) -> str:
-    import re
+
+class HTMLToMarkdownParser(HTMLParser):
+    """
+    Single-pass HTML to Markdown converter.
     
-    html: str = markdown_text
+    Markdown is written through `write` as tags are encountered, so memory is
+    bounded by the largest text run rather than the document. Unclosed inline
+    tags are closed at the end of their block (or at close()) so markers never
+    leak across paragraphs.
+    """
     
-    html = re.sub(r'^# (.*?)$', r'<h1>\1</h1>', html, flags=re.MULTILINE)
-    html = re.sub(r'^## (.*?)$', r'<h2>\1</h2>', html, flags=re.MULTILINE)
-    html = re.sub(r'^### (.*?)$', r'### \1', html, flags=re.MULTILINE)
+    def __init__(self, write: Callable[[str], Any]):
+        super().__init__(convert_charrefs=True)
+        self.write = write
+        self.open_inline: List[str] = []
+        self.skip_depth: int = 0
     
-    html = re.sub(r'\*\*(.*?)\*\*', r'<strong>\1</strong>', html)
-    html = re.sub(r'\*(.*?)\*', r'<em>\1</em>', html)
+    def _close_inline(self) -> None:
+        while self.open_inline:
+            self.write(HTML_INLINE_MARKERS[self.open_inline.pop()])
     
-    html = re.sub(r'`(.*?)`', r'<code>\1</code>', html)
+    def handle_starttag(self, tag: str, attrs: List[Tuple[str, Optional[str]]]) -> None:
+        if tag in HTML_SKIPPED_TAGS:
+            self.skip_depth += 1
+        elif tag in HTML_INLINE_MARKERS:
+            self.open_inline.append(tag)
+            self.write(HTML_INLINE_MARKERS[tag])
+        elif tag in HTML_HEADING_PREFIXES:
+            self.write(HTML_HEADING_PREFIXES[tag])
+        elif tag == 'li':
+            self.write('- ')
+        elif tag == 'br':
+            self.write('\n')
     
-    html = re.sub(r'^- (.*?)$', r'<li>\1</li>', html, flags=re.MULTILINE)
+    def handle_startendtag(self, tag: str, attrs: List[Tuple[str, Optional[str]]]) -> None:
+        if tag == 'br':
+            self.write('\n')
     
-    html = re.sub(r'(<li>.*?</li>(\n<li>.*?</li>)*)', r'<ul>\n\1\n</ul>', html, flags=re.DOTALL)
+    def handle_endtag(self, tag: str) -> None:
+        if tag in HTML_SKIPPED_TAGS:
+            self.skip_depth = max(0, self.skip_depth - 1)
+        elif tag in HTML_INLINE_MARKERS:
+            if tag in self.open_inline:
+                while self.open_inline:
+                    open_tag = self.open_inline.pop()
+                    self.write(HTML_INLINE_MARKERS[open_tag])
+                    if open_tag == tag:
+                        break
+        elif tag in HTML_HEADING_PREFIXES or tag == 'li':
+            self._close_inline()
+        elif tag == 'p':
+            self._close_inline()
+            self.write('\n\n')
     
-    paragraphs: List[str] = html.split('\n\n')
-    formatted_paragraphs: List[str] = []
-    for p in paragraphs:
-        p = p.strip()
-        if p and not p.startswith('<'):
-            p = f'<p>{p}</p>'
-        if p:
-            formatted_paragraphs.append(p)
+    def handle_data(self, data: str) -> None:
+        if not self.skip_depth:
+            self.write(data)
     
-    html = '\n'.join(formatted_paragraphs)
+    def close(self) -> None:
+        super().close()
+        self._close_inline()
+
+
+def html_to_markdown(html_text: str) -> str:
+    parts: List[str] = []
+    parser = HTMLToMarkdownParser(parts.append)
+    parser.feed(html_text)
+    parser.close()
+    return ''.join(parts)
+
+
+def html_file_to_markdown(input_path: str, write: Callable[[str], Any]) -> None:
+    parser = HTMLToMarkdownParser(write)
+    with open(input_path, 'r', encoding='utf-8', errors='ignore') as f:
+        for chunk in iter(lambda: f.read(HTML_READ_CHUNK), ''):
+            parser.feed(chunk)
+    parser.close()
+
+
+def text_to_markdown(text: str, source_format: str) -> str:
+    if source_format in ['txt', 'md', 'markdown']:
+        return text
+    
+    if source_format in ['html', 'htm']:
+        return html_to_markdown(text)
+    
+    return text
+
+
+def markdown_to_html(markdown_text: str) -> str:
+    html: str = render_html(parse_markdown(markdown_text))
     
     html = f"""<!DOCTYPE html>
 <html>
@@ -85,21 +137,78 @@ def markdown_to_html(markdown_text: str) -> str:
     return html
 
 
+def _check_formats(input_ext: str, output_ext: str) -> Optional[Dict[str, Any]]:
+    if input_ext not in SUPPORTED_FORMATS:
+        return {
+            'success': False,
+            'error': f'Unsupported input format: {input_ext}. Supported: {", ".join(SUPPORTED_FORMATS)}'
+        }
+    
+    if output_ext not in SUPPORTED_FORMATS:
+        return {
+            'success': False,
+            'error': f'Unsupported output format: {output_ext}. Supported: {", ".join(SUPPORTED_FORMATS)}'
+        }
+    
+    return None
+
+
+def _write_markdown_as(markdown_text: str, output_path: str, input_ext: str, output_ext: str) -> Dict[str, Any]:
+    if output_ext in ['txt']:
+        import re
+        output_text: str = re.sub(r'[#*`]', '', markdown_text)
+    
+    elif output_ext in ['md', 'markdown']:
+        output_text: str = markdown_text
+    
+    elif output_ext in ['html', 'htm']:
+        output_text: str = markdown_to_html(markdown_text)
+    
+    elif output_ext in ['docx', 'doc']:
+        result: Dict[str, Any] = parse_markdown_to_docx(markdown_text, output_path)
+        if not result['success']:
+            return {
+                'success': False,
+                'error': f'DOCX conversion failed: {result["error"]}'
+            }
+        output_text = ''
+    
+    else:
+        return {
+            'success': False,
+            'error': f'Conversion to {output_ext} not yet implemented'
+        }
+    
+    if output_ext not in ['docx', 'doc']:
+        os.makedirs(os.path.dirname(output_path), exist_ok=True)
+        with open(output_path, 'w', encoding='utf-8') as f:
+            f.write(output_text)
+    
+    return {
+        'success': True,
+        'output_path': output_path,
+        'message': f'Successfully converted {input_ext.upper()} to {output_ext.upper()}'
+    }
+
+
 def convert_text_file(input_path: str, output_path: str, output_format: str) -> Dict[str, Any]:
     try:
         input_ext: str = Path(input_path).suffix.lower().lstrip('.')
         output_ext: str = output_format.lower().lstrip('.')
         
-        if input_ext not in SUPPORTED_FORMATS:
-            return {
-                'success': False,
-                'error': f'Unsupported input format: {input_ext}. Supported: {", ".join(SUPPORTED_FORMATS)}'
-            }
+        format_error = _check_formats(input_ext, output_ext)
+        if format_error:
+            return format_error
         
-        if output_ext not in SUPPORTED_FORMATS:
+        if input_ext in ['html', 'htm'] and output_ext in ['md', 'markdown']:
+            os.makedirs(os.path.dirname(output_path), exist_ok=True)
+            with open(output_path, 'w', encoding='utf-8') as out:
+                html_file_to_markdown(input_path, out.write)
+            
             return {
-                'success': False,
-                'error': f'Unsupported output format: {output_ext}. Supported: {", ".join(SUPPORTED_FORMATS)}'
+                'success': True,
+                'output_path': output_path,
+                'message': f'Successfully converted {input_ext.upper()} to {output_ext.upper()}'
             }
         
         with open(input_path, 'r', encoding='utf-8', errors='ignore') as f:
@@ -107,62 +216,7 @@ def convert_text_file(input_path: str, output_path: str, output_format: str) ->
         
         markdown_text: str = text_to_markdown(input_text, input_ext)
         
-        if output_ext in ['txt']:
-            import re
-            output_text: str = re.sub(r'[#*`]', '', markdown_text)
-        
-        elif output_ext in ['md', 'markdown']:
-            output_text: str = markdown_text
-        
-        elif output_ext in ['html', 'htm']:
-            output_text: str = markdown_to_html(markdown_text)
-        
-        elif output_ext in ['docx', 'doc']:
-            temp_md: str = output_path + '.temp.md'
-            with open(temp_md, 'w', encoding='utf-8') as f:
-                f.write(markdown_text)
-            
-            import subprocess
-            
-            payload: Dict[str, str] = {
-                'input': temp_md,
-                'output': output_path
-            }
-            
-            result = subprocess.run(
-                ['python', 'backend/markdown_to_docx.py'],
-                input=json.dumps(payload),
-                capture_output=True,
-                text=True
-            )
-            
-            if os.path.exists(temp_md):
-                os.remove(temp_md)
-            
-            if result.returncode == 0:
-                return json.loads(result.stdout)
-            else:
-                return {
-                    'success': False,
-                    'error': f'DOCX conversion failed: {result.stderr}'
-                }
-        
-        else:
-            return {
-                'success': False,
-                'error': f'Conversion to {output_ext} not yet implemented'
-            }
-        
-        if output_ext not in ['docx', 'doc']:
-            os.makedirs(os.path.dirname(output_path), exist_ok=True)
-            with open(output_path, 'w', encoding='utf-8') as f:
-                f.write(output_text)
-        
-        return {
-            'success': True,
-            'output_path': output_path,
-            'message': f'Successfully converted {input_ext.upper()} to {output_ext.upper()}'
-        }
+        return _write_markdown_as(markdown_text, output_path, input_ext, output_ext)
     
     except FileNotFoundError:
         return {'success': False, 'error': f'Input file not found: {input_path}'}
@@ -174,10 +228,142 @@ def convert_text_file(input_path: str, output_path: str, output_format: str) ->
         }
 
 
+def convert_text_file_to_formats(input_path: str, output_dir: str, output_formats: List[str],
+                                 base_name: Optional[str] = None) -> List[Dict[str, Any]]:
+    """
+    Convert one input to several formats, reading and parsing it only once.
+    Outputs are named base_name.<ext> (default: the input's stem).
+    """
+    input_ext: str = Path(input_path).suffix.lower().lstrip('.')
+    output_exts: List[str] = [output_format.lower().lstrip('.') for output_format in output_formats]
+    results: List[Dict[str, Any]] = []
+    markdown_text: Optional[str] = None
+    base_name = base_name or Path(input_path).stem
+    
+    for output_ext in output_exts:
+        output_path = os.path.join(output_dir, f'{base_name}.{output_ext}')
+        try:
+            result = _check_formats(input_ext, output_ext)
+            if result is None:
+                if markdown_text is None:
+                    with open(input_path, 'r', encoding='utf-8', errors='ignore') as f:
+                        markdown_text = text_to_markdown(f.read(), input_ext)
+                result = _write_markdown_as(markdown_text, output_path, input_ext, output_ext)
+        except FileNotFoundError:
+            result = {'success': False, 'error': f'Input file not found: {input_path}'}
+        except Exception as e:
+            result = {'success': False, 'error': f'Text conversion failed: {str(e)}'}
+        
+        results.append({'input': input_path, 'output_format': output_ext, **result})
+    
+    return results
+
+
+def batch_convert_text_files(input_files: List[str], output_dir: str, output_formats: List[str],
+                             max_workers: Optional[int] = None, stream: bool = False) -> Dict[str, Any]:
+    """
+    Convert many inputs to one or more formats over a process pool.
+    
+    DOCX output is produced in the worker itself, so each worker pays for its
+    imports once rather than once per file. Inputs sharing a name get
+    distinct output names before dispatch, so workers never race on a file. With `stream` enabled, a JSON line
+    is printed per finished conversion before the summary.
+    """
+    results: Dict[str, Any] = {
+        'success': True,
+        'converted': [],
+        'failed': [],
+        'total': len(input_files) * len(output_formats)
+    }
+    
+    os.makedirs(output_dir, exist_ok=True)
+    
+    completed = 0
+    results_by_input: Dict[int, List[Dict[str, Any]]] = {}
+    
+    base_names = batch_base_names(input_files, output_dir)
+    
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        futures = {
+            executor.submit(convert_text_file_to_formats, input_path, output_dir, output_formats, base_names[index]): index
+            for index, input_path in enumerate(input_files)
+        }
+        
+        for future in as_completed(futures):
+            index = futures[future]
+            try:
+                file_results = future.result()
+            except Exception as e:
+                file_results = [
+                    {'input': input_files[index], 'output_format': output_format, 'success': False, 'error': str(e)}
+                    for output_format in output_formats
+                ]
+            
+            results_by_input[index] = file_results
+            
+            if stream:
+                for file_result in file_results:
+                    completed += 1
+                    print(json.dumps({
+                        'type': 'progress',
+                        'completed': completed,
+                        'total': results['total'],
+                        **file_result
+                    }), flush=True)
+    
+    for index in sorted(results_by_input):
+        for file_result in results_by_input[index]:
+            if file_result['success']:
+                results['converted'].append({
+                    'input': file_result['input'],
+                    'output': file_result['output_path'],
+                    'output_format': file_result['output_format']
+                })
+            else:
+                results['failed'].append({
+                    'input': file_result['input'],
+                    'output_format': file_result['output_format'],
+                    'error': file_result['error']
+                })
+                results['success'] = False
+    
+    results['message'] = f'Converted {len(results["converted"])}/{results["total"]} files'
+    return results
+
+
 def main() -> None:
     try:
         input_data: Dict[str, Any] = json.loads(sys.stdin.read())
         
+        mode: str = input_data.get('mode', 'single')
+        
+        if mode == 'batch':
+            input_files: Union[List[str], str] = input_data.get('input', [])
+            if isinstance(input_files, str):
+                input_files = [input_files]
+            if not isinstance(input_files, list):
+                print(json.dumps({
+                    'success': False,
+                    'error': 'input must be a file path or a list of file paths for batch mode'
+                }))
+                return
+            output_dir: Union[str, None] = input_data.get('output_dir')
+            output_formats: List[str] = input_data.get('output_formats') or [input_data.get('output_format')]
+            
+            if not input_files or not output_dir or not all(output_formats):
+                print(json.dumps({
+                    'success': False,
+                    'error': 'Missing input files, output_dir, or output_formats for batch mode'
+                }))
+                return
+            
+            result: Dict[str, Any] = batch_convert_text_files(
+                input_files, output_dir, output_formats,
+                input_data.get('max_workers'), input_data.get('stream', False)
+            )
+            print(json.dumps(result), flush=True)
+            return
+        
         input_path: Union[str, None] = input_data.get('input')
         output_path: Union[str, None] = input_data.get('output')
         output_format: Union[str, None] = input_data.get('output_format')
@@ -189,7 +375,7 @@ def main() -> None:
             }))
             return
         
-        result: Dict[str, Any] = convert_text_file(input_path, output_path, output_format)
+        result = convert_text_file(input_path, output_path, output_format)
         print(json.dumps(result), flush=True)
     
     except json.JSONDecodeError as e:
@@ -6,6 +6,7 @@ Handles the actual conversion logic
 
 import os
 import re
+import codecs
 from dataclasses import dataclass
 from typing import List, Any
 
@@ -14,10 +15,15 @@ from docx import Document
 import pdfplumber
 from openpyxl import load_workbook
 import html2text
-import chardet
+from chardet import UniversalDetector
 from PIL import Image
 
 
+# Bytes inspected when sniffing a text file's encoding
+ENCODING_SAMPLE_BYTES = 1024 * 1024
+ENCODING_CHUNK_BYTES = 64 * 1024
+
+
 @dataclass
 class ConversionOptions:
     """Configuration options for conversion"""
@@ -215,17 +221,61 @@ converted_with: openElara File Converter
     
     def _convert_txt(self, input_path: str, options: ConversionOptions) -> str:
         """Convert TXT to markdown"""
-        # Detect encoding
-        encoding = 'utf-8'
-        with open(input_path, 'rb') as f:
-            raw_data = f.read()
-            detected = chardet.detect(raw_data)
-            if detected['confidence'] > 0.5:
-                encoding = detected['encoding']
+        encoding = self._detect_encoding(input_path)
         
         with open(input_path, 'r', encoding=encoding, errors='replace') as f:
             return f.read()
     
+    def _detect_encoding(self, input_path: str) -> str:
+        """
+        Detect text encoding from a bounded prefix of the file
+        
+        Valid UTF-8 (including plain ASCII) short-circuits chardet entirely;
+        otherwise chardet's UniversalDetector is fed chunk by chunk and stops
+        as soon as it is confident. A UTF-8 BOM gives 'utf-8-sig' so the BOM
+        is stripped instead of leaking into the output as U+FEFF. Kept in
+        sync with detect_encoding in backend/file_to_markdown_worker.py.
+        """
+        utf8_decoder = codecs.getincrementaldecoder('utf-8')()
+        detector = UniversalDetector()
+        is_utf8 = True
+        read_total = 0
+        
+        with open(input_path, 'rb') as f:
+            if f.read(len(codecs.BOM_UTF8)) == codecs.BOM_UTF8:
+                return 'utf-8-sig'
+            f.seek(0)
+            
+            while read_total < ENCODING_SAMPLE_BYTES:
+                chunk = f.read(min(ENCODING_CHUNK_BYTES, ENCODING_SAMPLE_BYTES - read_total))
+                if not chunk:
+                    break
+                read_total += len(chunk)
+                
+                if is_utf8:
+                    try:
+                        utf8_decoder.decode(chunk)
+                        continue
+                    except UnicodeDecodeError:
+                        # Not UTF-8 - restart the sample through chardet
+                        is_utf8 = False
+                        f.seek(0)
+                        read_total = 0
+                        continue
+                
+                detector.feed(chunk)
+                if detector.done:
+                    break
+        
+        if is_utf8:
+            return 'utf-8'
+        
+        detector.close()
+        detected = detector.result
+        if detected['encoding'] and detected['confidence'] > 0.5:
+            return detected['encoding']
+        return 'utf-8'
+    
     def _convert_csv(self, input_path: str, options: ConversionOptions) -> str:
         """Convert CSV to markdown table"""
         import csv
@@ -12,6 +12,8 @@ import tkinter as tk
 from tkinter import ttk, filedialog, messagebox
 from tkinterdnd2 import DND_FILES, TkinterDnD
 import threading
+import multiprocessing
+import queue
 import os
 from pathlib import Path
 import sys
@@ -315,6 +317,26 @@ class ImageProcessorApp:
             aspect_check.grid(row=1, column=0, columnspan=4, sticky=tk.W, pady=(10, 0))
             self.settings_widgets['aspect_ratio'] = aspect_var
             
+            # Resampling quality/speed policy
+            tk.Label(
+                settings_container,
+                text="Resampling:",
+                bg="#2E3440",
+                fg="#D8DEE9",
+                font=("Segoe UI", 9)
+            ).grid(row=2, column=0, sticky=tk.W, padx=(0, 10), pady=(10, 0))
+            
+            resample_var = tk.StringVar(value=worker.DEFAULT_RESAMPLE_POLICY)
+            resample_combo = ttk.Combobox(
+                settings_container,
+                textvariable=resample_var,
+                values=list(worker.RESAMPLE_POLICIES),
+                state="readonly",
+                width=15
+            )
+            resample_combo.grid(row=2, column=1, sticky=tk.W, pady=(10, 0))
+            self.settings_widgets['resample'] = resample_var
+            
         elif operation == "compress":
             # Quality slider
             tk.Label(
@@ -548,6 +570,11 @@ class ImageProcessorApp:
         self.processing = True
         self.process_btn.config(state=tk.DISABLED, text="Processing...")
         self.progress['value'] = 0
+        self.log(f"Processing {len(self.file_list)} image(s) on {min(os.cpu_count() or 1, len(self.file_list))} worker(s)...")
+        
+        # Workers report through the queue; the UI thread drains it
+        self.progress_queue = queue.Queue()
+        self.root.after(100, self.poll_progress)
         
         thread = threading.Thread(target=self.process_thread, daemon=True)
         thread.start()
@@ -559,51 +586,57 @@ class ImageProcessorApp:
             settings = {key: var.get() for key, var in self.settings_widgets.items()}
             
             total = len(self.file_list)
-            success_count = 0
-            
-            for i, file_path in enumerate(self.file_list):
-                self.log(f"Processing {i+1}/{total}: {os.path.basename(file_path)}")
+            results = worker.process_batch(
+                list(self.file_list),
+                self.output_folder,
+                [(operation, settings)],
+                progress_queue=self.progress_queue
+            )
+            success_count = sum(1 for result in results if result['success'])
+            self.progress_queue.put(('done', success_count, total))
+        
+        except Exception as e:
+            self.progress_queue.put(('error', str(e)))
+    
+    def poll_progress(self):
+        """Apply queued progress updates on the UI thread"""
+        try:
+            while True:
+                update = self.progress_queue.get_nowait()
                 
-                try:
-                    # Call worker function
-                    result = worker.process_image(
-                        file_path,
-                        self.output_folder,
-                        operation,
-                        settings
+                if update[0] == 'done':
+                    _, success_count, total = update
+                    self.log(f"\n{'='*50}")
+                    self.log(f"Processing complete! {success_count}/{total} images processed successfully.")
+                    self.log(f"{'='*50}\n")
+                    self.finish_processing()
+                    messagebox.showinfo(
+                        "Complete",
+                        f"Processed {success_count}/{total} images successfully!\n\nOutput: {self.output_folder}"
                     )
-                    
-                    if result['success']:
-                        self.log(f"✓ Success: {result['message']}")
-                        success_count += 1
-                    else:
-                        self.log(f"✗ Error: {result['message']}")
+                    return
                 
-                except Exception as e:
-                    self.log(f"✗ Error: {str(e)}")
+                if update[0] == 'error':
+                    self.log(f"FATAL ERROR: {update[1]}")
+                    self.finish_processing()
+                    messagebox.showerror("Error", f"Processing failed: {update[1]}")
+                    return
                 
-                # Update progress
-                progress = ((i + 1) / total) * 100
-                self.progress['value'] = progress
-                self.root.update_idletasks()
-            
-            # Complete
-            self.log(f"\n{'='*50}")
-            self.log(f"Processing complete! {success_count}/{total} images processed successfully.")
-            self.log(f"{'='*50}\n")
-            
-            messagebox.showinfo(
-                "Complete",
-                f"Processed {success_count}/{total} images successfully!\n\nOutput: {self.output_folder}"
-            )
+                done, total, file_path, result = update
+                if result['success']:
+                    self.log(f"✓ {done}/{total} {os.path.basename(file_path)}: {result['message']}")
+                else:
+                    self.log(f"✗ {done}/{total} {os.path.basename(file_path)}: {result['message']}")
+                self.progress['value'] = (done / total) * 100
         
-        except Exception as e:
-            self.log(f"FATAL ERROR: {str(e)}")
-            messagebox.showerror("Error", f"Processing failed: {str(e)}")
+        except queue.Empty:
+            pass
         
-        finally:
-            self.processing = False
-            self.process_btn.config(state=tk.NORMAL, text="🚀 PROCESS IMAGES")
+        self.root.after(100, self.poll_progress)
+    
+    def finish_processing(self):
+        self.processing = False
+        self.process_btn.config(state=tk.NORMAL, text="🚀 PROCESS IMAGES")
 
 
 def main():
@@ -614,4 +647,6 @@ def main():
 
 
 if __name__ == "__main__":
+    # Needed for the worker process pool in the frozen .exe
+    multiprocessing.freeze_support()
     main()
@@ -0,0 +1,311 @@
+"""
+Tiled Image Processing
+======================
+Bounded-memory building blocks for images too large to process whole
+(panoramas, 100+ MP scans).
+
+Images are read, processed and written in horizontal strips sized from a
+memory budget:
+- RegionReader decodes only the requested rows of uncompressed inputs
+  (TIFF, BMP, PPM/PGM). Other formats have to be decoded whole once and
+  are then cut into strips.
+- StripWriter streams strips into an uncompressed TIFF, or assembles them
+  into one image for formats Pillow can only encode whole.
+- tiled_crop, tiled_transpose (90/180/270 degree rotation), tiled_map
+  (point operations, and convolutions with a halo of overlapping rows)
+  and tiled_histogram work strip by strip.
+
+Dependencies: Pillow
+"""
+
+import os
+import struct
+from PIL import Image
+
+
+DEFAULT_MEMORY_BUDGET_MB = 256
+
+TILED_MODES = ('L', 'RGB', 'RGBA')
+
+# Bytes per pixel in memory (Pillow keeps RGB as 4 bytes per pixel)
+MEMORY_BYTES_PER_PIXEL = {'L': 1, 'RGB': 4, 'RGBA': 4}
+
+# Raw decoder modes whose rows can be addressed by byte offset
+RAW_BYTES_PER_PIXEL = {
+    'L': 1, 'RGB': 3, 'BGR': 3, 'RGBA': 4, 'RGBX': 4, 'BGRA': 4, 'BGRX': 4
+}
+
+# Baseline TIFF tags for StripWriter
+TIFF_PHOTOMETRIC = {'L': 1, 'RGB': 2, 'RGBA': 2}
+TIFF_SHORT = 3
+TIFF_LONG = 4
+
+
+def budget_bytes(memory_budget_mb):
+    return int((memory_budget_mb or DEFAULT_MEMORY_BUDGET_MB) * 1024 * 1024)
+
+
+def strip_rows(width, mode, budget, copies):
+    """Rows per strip so that `copies` strips of this width fit the budget"""
+    row_bytes = width * MEMORY_BYTES_PER_PIXEL[mode]
+    return max(1, budget // (row_bytes * copies))
+
+
+def fits_in_budget(size, mode, memory_budget_mb):
+    """Whether a whole decoded image stays within the budget"""
+    width, height = size
+    return width * height * MEMORY_BYTES_PER_PIXEL.get(mode, 4) <= budget_bytes(memory_budget_mb)
+
+
+def raw_tiles(img):
+    """
+    Bands of uncompressed full-width rows in an opened image, as
+    (y0, y1, offset, rawmode, stride, orientation), or None when its rows
+    cannot be addressed by byte offset (compressed formats).
+    """
+    if img.mode not in TILED_MODES:
+        return None
+    tiles = []
+    for codec_name, extents, offset, args in img.tile:
+        if isinstance(args, str):
+            args = (args, 0, 1)
+        rawmode, stride, orientation = (tuple(args) + (0, 1))[:3]
+        x0, y0, x1, y1 = extents
+        if codec_name != 'raw' or rawmode not in RAW_BYTES_PER_PIXEL or (x0, x1) != (0, img.width):
+            return None
+        stride = stride or img.width * RAW_BYTES_PER_PIXEL[rawmode]
+        tiles.append((y0, y1, offset, rawmode, stride, orientation))
+    return sorted(tiles) or None
+
+
+def streams_rows(img):
+    """Whether RegionReader decodes this opened image strip by strip"""
+    return raw_tiles(img) is not None
+
+
+class RegionReader:
+    """
+    Reads row ranges of an image file.
+    
+    When the file stores its pixels as uncompressed rows, the tile list is
+    rewritten so Pillow decodes only the requested rows. Otherwise the image
+    is decoded once and kept, and rows are cropped from it.
+    """
+    
+    def __init__(self, file_path):
+        self.file_path = file_path
+        with Image.open(file_path) as img:
+            self.size = img.size
+            self.mode = img.mode
+            self.format = img.format
+            self.raw_tiles = raw_tiles(img)
+        self._full = None
+    
+    @property
+    def streams(self):
+        """True when rows are decoded on demand instead of all at once"""
+        return self.raw_tiles is not None
+    
+    def read_rows(self, top, bottom):
+        """Decode rows [top, bottom) at full width"""
+        width = self.size[0]
+        if self.raw_tiles is None:
+            if self._full is None:
+                self._full = Image.open(self.file_path)
+                self._full.load()
+            return self._full.crop((0, top, width, bottom))
+        
+        tile = []
+        for y0, y1, offset, rawmode, stride, orientation in self.raw_tiles:
+            low, high = max(y0, top), min(y1, bottom)
+            if low >= high:
+                continue
+            # Bottom-up rows (BMP) start from the last row of the tile
+            skipped = (low - y0) if orientation >= 0 else (y1 - high)
+            tile.append(('raw', (0, low - top, width, high - top), offset + skipped * stride,
+                         (rawmode, stride, orientation)))
+        
+        img = Image.open(self.file_path)
+        img._size = (width, bottom - top)
+        if hasattr(img, '_tile_size'):
+            # TIFF allocates its decode buffer from this rather than size
+            img._tile_size = img._size
+        img.tile = tile
+        img.load()
+        return img
+    
+    def read_box(self, box, budget):
+        """Decode a (left, top, right, bottom) box, a few rows at a time"""
+        left, top, right, bottom = box
+        if left == 0 and right == self.size[0]:
+            return self.read_rows(top, bottom)
+        region = Image.new(self.mode, (right - left, bottom - top))
+        rows = strip_rows(self.size[0], self.mode, budget, 2)
+        for row in range(top, bottom, rows):
+            strip = self.read_rows(row, min(row + rows, bottom))
+            region.paste(strip.crop((left, 0, right, strip.height)), (0, row - top))
+        return region
+    
+    def close(self):
+        if self._full is not None:
+            self._full.close()
+            self._full = None
+
+
+class StripWriter:
+    """
+    Receives an image top to bottom, one strip at a time.
+    
+    With a .tif/.tiff path the strips are streamed into an uncompressed
+    baseline TIFF, so memory stays at one strip. Otherwise they are pasted
+    into one image that close() returns for encoding.
+    """
+    
+    def __init__(self, size, mode, output_path=None):
+        self.size = size
+        self.mode = mode
+        self.rows_written = 0
+        self.output_path = output_path
+        self.image = None
+        self.file = None
+        
+        if output_path and output_path.lower().endswith(('.tif', '.tiff')):
+            width, height = size
+            if width * height * len(mode) >= 2 ** 32:
+                raise ValueError("Image too large for a classic TIFF (4 GB)")
+            self.file = open(output_path, 'wb')
+            # Header; the IFD offset is filled in by close()
+            self.file.write(b'II' + struct.pack('<HI', 42, 0))
+        else:
+            self.image = Image.new(mode, size)
+    
+    def write(self, strip):
+        if strip.mode != self.mode:
+            strip = strip.convert(self.mode)
+        if self.file is not None:
+            self.file.write(strip.tobytes())
+        else:
+            self.image.paste(strip, (0, self.rows_written))
+        self.rows_written += strip.height
+    
+    def close(self):
+        """Finish the output; returns the assembled image when not streaming"""
+        if self.rows_written != self.size[1]:
+            raise ValueError(f"Wrote {self.rows_written} of {self.size[1]} rows")
+        if self.file is None:
+            return self.image
+        
+        width, height = self.size
+        samples = len(self.mode)
+        data_bytes = width * height * samples
+        ifd_offset = 8 + data_bytes + (data_bytes % 2)
+        
+        entries = [
+            (256, TIFF_LONG, 1, width),
+            (257, TIFF_LONG, 1, height),
+            (258, TIFF_SHORT, samples, 8),
+            (259, TIFF_SHORT, 1, 1),
+            (262, TIFF_SHORT, 1, TIFF_PHOTOMETRIC[self.mode]),
+            (273, TIFF_LONG, 1, 8),
+            (277, TIFF_SHORT, 1, samples),
+            (278, TIFF_LONG, 1, height),
+            (279, TIFF_LONG, 1, data_bytes),
+            (284, TIFF_SHORT, 1, 1),
+        ]
+        if self.mode == 'RGBA':
+            entries.append((338, TIFF_SHORT, 1, 2))  # Unassociated alpha
+        
+        extra_offset = ifd_offset + 2 + 12 * len(entries) + 4
+        ifd = struct.pack('<H', len(entries))
+        for tag, field_type, count, value in entries:
+            if tag == 258 and count > 2:
+                # BitsPerSample per sample does not fit in the entry
+                ifd += struct.pack('<HHII', tag, field_type, count, extra_offset)
+            elif field_type == TIFF_SHORT:
+                ifd += struct.pack('<HHIHH', tag, field_type, count, value, 0)
+            else:
+                ifd += struct.pack('<HHII', tag, field_type, count, value)
+        ifd += struct.pack('<I', 0)
+        if samples > 2:
+            ifd += struct.pack(f'<{samples}H', *([8] * samples))
+        
+        if data_bytes % 2:
+            self.file.write(b'\0')
+        self.file.write(ifd)
+        self.file.seek(4)
+        self.file.write(struct.pack('<I', ifd_offset))
+        self.file.close()
+        self.file = None
+        return None
+    
+    def abort(self):
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+            os.remove(self.output_path)
+
+
+def tiled_crop(reader, writer, box, budget):
+    left, top, right, bottom = box
+    rows = strip_rows(reader.size[0], reader.mode, budget, 3)
+    for row in range(top, bottom, rows):
+        strip = reader.read_rows(row, min(row + rows, bottom))
+        writer.write(strip.crop((left, 0, right, strip.height)))
+
+
+def tiled_transpose(reader, writer, method, budget):
+    """
+    Rotate by a multiple of 90 degrees (Image.Transpose.ROTATE_90/180/270).
+    
+    Quarter turns turn input columns into output rows, so each output strip
+    is a band of input columns read down the whole image.
+    """
+    width, height = reader.size
+    if method == Image.Transpose.ROTATE_180:
+        rows = strip_rows(width, reader.mode, budget, 3)
+        for row in range(0, height, rows):
+            top = max(height - row - rows, 0)
+            writer.write(reader.read_rows(top, height - row).transpose(method))
+        return
+    
+    # Half the budget for the column band, half for reading rows into it
+    rows = strip_rows(height, reader.mode, budget // 2, 2)
+    for row in range(0, width, rows):
+        band = min(rows, width - row)
+        if method == Image.Transpose.ROTATE_270:
+            left = row
+        else:
+            left = width - row - band
+        writer.write(reader.read_box((left, 0, left + band, height), budget // 2).transpose(method))
+
+
+def tiled_map(reader, writer, function, budget, halo=0):
+    """
+    Apply function(strip) strip by strip.
+    
+    With a halo, each strip is read with that many extra rows above and
+    below, so neighbourhood operations (convolutions) see the real
+    neighbours; the halo rows are cropped off the result.
+    """
+    width, height = reader.size
+    rows = max(strip_rows(width, reader.mode, budget, 4) - 2 * halo, 1)
+    for row in range(0, height, rows):
+        bottom = min(row + rows, height)
+        read_top = max(row - halo, 0)
+        read_bottom = min(bottom + halo, height)
+        result = function(reader.read_rows(read_top, read_bottom))
+        writer.write(result.crop((0, row - read_top, width, row - read_top + bottom - row)))
+
+
+def tiled_histogram(reader, budget):
+    """Image.histogram() of the whole image, accumulated strip by strip"""
+    width, height = reader.size
+    rows = strip_rows(width, reader.mode, budget, 2)
+    histogram = None
+    for row in range(0, height, rows):
+        strip_histogram = reader.read_rows(row, min(row + rows, height)).histogram()
+        if histogram is None:
+            histogram = strip_histogram
+        else:
+            histogram = [total + count for total, count in zip(histogram, strip_histogram)]
+    return histogram
@@ -11,13 +11,120 @@ Operations:
 - Rotate: Rotate images by specified angle
 - Crop: Crop images to specified dimensions
 
+Operations can be chained (e.g. resize -> enhance -> compress) in one
+decode/encode cycle, and batches run on a process pool. Images larger
+than the memory budget are cropped, rotated and enhanced in strips
+(tiled_processing).
+
 Dependencies: Pillow
+
+Headless use:
+    python worker_image_processor.py -o out --op resize:width=800,height=600 --op enhance:contrast=1.2 <images>
 """
 
-from PIL import Image, ImageEnhance, ImageOps
+from PIL import Image, ImageEnhance, ImageFilter, ImageOps
 import os
+import sys
+import argparse
+import struct
+import tempfile
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from pathlib import Path
 
+import tiled_processing
+
+
+OPERATIONS = ('convert', 'resize', 'compress', 'enhance', 'rotate', 'crop')
+
+# Output extension -> Pillow format name, so a chained step after a
+# conversion keeps the converted format
+EXT_FORMATS = {
+    'jpg': 'JPEG',
+    'png': 'PNG',
+    'webp': 'WEBP',
+    'bmp': 'BMP',
+    'tiff': 'TIFF',
+    'gif': 'GIF'
+}
+FORMAT_EXTS = {image_format: ext for ext, image_format in EXT_FORMATS.items()}
+
+# Resize quality/speed policies: (resampling filter, reducing_gap).
+# With a reducing_gap, JPEGs are decoded at reduced resolution (DCT scaling
+# via Image.draft) and other images are first shrunk by an integer factor
+# (Image.reduce), leaving at least reducing_gap times the target size for
+# the final resample. 3.0 is indistinguishable from a full-resolution
+# resample in most cases; 2.0 is Pillow's thumbnail default.
+RESAMPLE_POLICIES = {
+    'best': (Image.Resampling.LANCZOS, 3.0),
+    'balanced': (Image.Resampling.LANCZOS, 2.0),
+    'fast': (Image.Resampling.BILINEAR, 1.0),
+}
+DEFAULT_RESAMPLE_POLICY = 'balanced'
+
+
+def apply_operation(img, operation, settings, original_format):
+    """
+    Apply one operation to an already-decoded image.
+    
+    Returns:
+        tuple: (output image, output extension)
+    """
+    if operation == "convert":
+        return convert_format(img, settings)
+    elif operation == "resize":
+        return resize_image(img, settings, original_format)
+    elif operation == "compress":
+        return compress_image(img, settings, original_format)
+    elif operation == "enhance":
+        return enhance_image(img, settings, original_format)
+    elif operation == "rotate":
+        return rotate_image(img, settings, original_format)
+    elif operation == "crop":
+        return crop_image(img, settings, original_format)
+    raise ValueError(f"Unknown operation: {operation}")
+
+
+def reserve_output_path(output_folder, filename, output_ext):
+    """
+    Pick a unique output path and create it empty.
+    
+    The exclusive create keeps parallel workers from choosing the same name.
+    """
+    output_filename = f"{filename}_processed.{output_ext.lower()}"
+    counter = 1
+    while True:
+        output_path = os.path.join(output_folder, output_filename)
+        try:
+            os.close(os.open(output_path, os.O_CREAT | os.O_EXCL | os.O_WRONLY))
+            return output_path
+        except FileExistsError:
+            output_filename = f"{filename}_processed_{counter}.{output_ext.lower()}"
+            counter += 1
+
+
+def save_image(output_img, output_path, output_ext, settings):
+    """Save with format-specific options (quality, optimize, JPEG flattening)"""
+    save_kwargs = {}
+    if output_ext.upper() in ['JPG', 'JPEG']:
+        save_kwargs['quality'] = int(settings.get('quality', 95))
+        save_kwargs['optimize'] = True
+        # Convert to RGB if necessary (JPEG doesn't support transparency)
+        if output_img.mode in ['RGBA', 'LA', 'P']:
+            background = Image.new('RGB', output_img.size, (255, 255, 255))
+            if output_img.mode == 'P':
+                output_img = output_img.convert('RGBA')
+            background.paste(output_img, mask=output_img.split()[-1] if output_img.mode in ['RGBA', 'LA'] else None)
+            output_img = background
+    
+    elif output_ext.upper() == 'PNG':
+        save_kwargs['optimize'] = True
+    
+    elif output_ext.upper() == 'WEBP':
+        save_kwargs['quality'] = int(settings.get('quality', 90))
+        save_kwargs['method'] = 6  # Best compression
+    
+    output_img.save(output_path, format=EXT_FORMATS.get(output_ext.lower(), output_ext.upper()), **save_kwargs)
+
 
 def process_image(file_path, output_folder, operation, settings):
     """
@@ -32,88 +139,278 @@ def process_image(file_path, output_folder, operation, settings):
     Returns:
         dict: {'success': bool, 'message': str, 'output_path': str}
     """
+    return process_chain(file_path, output_folder, [(operation, settings)])
+
+
+def process_chain(file_path, output_folder, steps, memory_budget_mb=None):
+    """
+    Apply several operations to one image with a single decode and encode.
+    
+    Each step sees the previous step's output, and a step after "convert"
+    keeps the converted format. Save options (quality) come from the
+    steps' settings, later steps taking precedence.
+    
+    Images whose decoded size exceeds the memory budget go through
+    process_chain_tiled when every step can be tiled and either the input
+    can be read or the output written strip by strip.
+    
+    Args:
+        file_path (str): Path to input image
+        output_folder (str): Path to output folder
+        steps (list): (operation, settings) pairs, applied in order
+        memory_budget_mb (int): Working memory budget for huge images
+            (default: tiled_processing.DEFAULT_MEMORY_BUDGET_MB)
+    
+    Returns:
+        dict: {'success': bool, 'message': str, 'output_path': str}
+    """
+    unknown = [operation for operation, _ in steps if operation not in OPERATIONS]
+    if not steps or unknown:
+        return {
+            'success': False,
+            'message': f"Unknown operation: {unknown[0]}" if unknown else "No operations given",
+            'output_path': None
+        }
+    
+    output_path = None
     try:
         # Load image
         img = Image.open(file_path)
-        original_format = img.format
+        current_format = img.format
+        
+        # Tiling only bounds memory when the input is read or the output is
+        # written strip by strip; otherwise the whole frame is held anyway.
+        if (not tiled_processing.fits_in_budget(img.size, img.mode, memory_budget_mb)
+                and can_tile(steps, img.mode)
+                and (tiled_processing.streams_rows(img) or _chain_output(steps, current_format)[0] == 'tiff')):
+            img.close()
+            return process_chain_tiled(file_path, output_folder, steps, memory_budget_mb)
         
         # Get filename without extension
         filename = Path(file_path).stem
         
-        # Process based on operation
-        if operation == "convert":
-            output_img, output_ext = convert_format(img, settings)
+        output_img = img
+        save_settings = {}
+        for operation, settings in steps:
+            output_img, output_ext = apply_operation(output_img, operation, settings, current_format)
+            current_format = EXT_FORMATS.get(output_ext.lower(), current_format)
+            save_settings.update(settings)
         
-        elif operation == "resize":
-            output_img, output_ext = resize_image(img, settings, original_format)
+        output_path = reserve_output_path(output_folder, filename, output_ext)
+        save_image(output_img, output_path, output_ext, save_settings)
         
-        elif operation == "compress":
-            output_img, output_ext = compress_image(img, settings, original_format)
-        
-        elif operation == "enhance":
-            output_img, output_ext = enhance_image(img, settings, original_format)
-        
-        elif operation == "rotate":
-            output_img, output_ext = rotate_image(img, settings, original_format)
-        
-        elif operation == "crop":
-            output_img, output_ext = crop_image(img, settings, original_format)
+        # Get file size for reporting
+        size_kb = os.path.getsize(output_path) / 1024
         
+        return {
+            'success': True,
+            'message': f"Saved to {os.path.basename(output_path)} ({size_kb:.1f} KB)",
+            'output_path': output_path
+        }
+    
+    except Exception as e:
+        if output_path and os.path.exists(output_path):
+            os.remove(output_path)
+        return {
+            'success': False,
+            'message': str(e),
+            'output_path': None
+        }
+
+
+def _is_pixel_step(operation, settings):
+    """Whether a step changes pixels (rotating by a multiple of 360 does not)"""
+    if operation == 'rotate':
+        return _rotation_angle(settings) % 360 != 0
+    return operation in ('crop', 'enhance')
+
+
+def _chain_output(steps, current_format):
+    """Output extension and merged save settings, as process_chain works them out"""
+    output_ext = FORMAT_EXTS.get(current_format, 'png')
+    save_settings = {}
+    for operation, settings in steps:
+        if operation == 'convert':
+            output_ext = convert_format(None, settings)[1]
         else:
-            return {
-                'success': False,
-                'message': f"Unknown operation: {operation}",
-                'output_path': None
-            }
-        
-        # Generate output filename
-        output_filename = f"{filename}_processed.{output_ext.lower()}"
-        output_path = os.path.join(output_folder, output_filename)
-        
-        # Ensure unique filename
-        counter = 1
-        while os.path.exists(output_path):
-            output_filename = f"{filename}_processed_{counter}.{output_ext.lower()}"
-            output_path = os.path.join(output_folder, output_filename)
-            counter += 1
+            output_ext = FORMAT_EXTS.get(current_format, 'png')
+        current_format = EXT_FORMATS.get(output_ext, current_format)
+        save_settings.update(settings)
+    return output_ext, save_settings
+
+
+def can_tile(steps, mode):
+    """Whether every step can run on strips (crop, quarter turns, enhance)"""
+    if mode not in tiled_processing.TILED_MODES:
+        return False
+    if not any(_is_pixel_step(operation, settings) for operation, settings in steps):
+        return False
+    for operation, settings in steps:
+        if operation == 'rotate' and _rotation_angle(settings) % 360 not in (0, 90, 180, 270):
+            return False
+        if operation not in ('convert', 'compress', 'crop', 'rotate', 'enhance'):
+            return False
+    return True
+
+
+def _run_tiled_step(reader, output_path, operation, settings, budget):
+    """Run one pixel step from reader into output_path (None: in memory)"""
+    width, height = reader.size
+    
+    if operation == 'crop':
+        box = _crop_box(settings, width, height)
+        writer = tiled_processing.StripWriter((box[2] - box[0], box[3] - box[1]), reader.mode, output_path)
+        run = lambda: tiled_processing.tiled_crop(reader, writer, box, budget)
+    
+    elif operation == 'rotate':
+        method = QUARTER_TURNS[_rotation_angle(settings) % 360]
+        size = (width, height) if method == Image.Transpose.ROTATE_180 else (height, width)
+        writer = tiled_processing.StripWriter(size, reader.mode, output_path)
+        run = lambda: tiled_processing.tiled_transpose(reader, writer, method, budget)
+    
+    else:
+        brightness = float(settings.get('brightness', 1.0))
+        contrast = float(settings.get('contrast', 1.0))
+        histogram = tiled_processing.tiled_histogram(reader, budget) if contrast != 1.0 else None
+        lut = enhance_lut(histogram, reader.mode, brightness, contrast)
+        kernel = sharpen_filter(float(settings.get('sharpness', 1.0)))
+        writer = tiled_processing.StripWriter(reader.size, reader.mode, output_path)
+        run = lambda: tiled_processing.tiled_map(
+            reader, writer, lambda strip: apply_enhance(strip, lut, kernel), budget,
+            halo=1 if kernel is not None else 0
+        )
+    
+    try:
+        run()
+        return writer.close()
+    except Exception:
+        writer.abort()
+        raise
+
+
+def process_chain_tiled(file_path, output_folder, steps, memory_budget_mb=None):
+    """
+    process_chain for images too large to hold in memory several times.
+    
+    Each pixel step streams strips from the previous result to the next:
+    crops and 90/180/270 degree rotations move strips around, enhance runs
+    its lookup table and sharpen kernel per strip (with one row of halo).
+    Intermediate results are uncompressed TIFFs in the output folder.
+    Uncompressed TIFF/BMP/PPM inputs are decoded strip by strip; other
+    inputs are decoded whole once. TIFF output is written strip by strip;
+    other formats are encoded from one assembled image.
+    
+    Returns:
+        dict: {'success': bool, 'message': str, 'output_path': str}
+    """
+    budget = tiled_processing.budget_bytes(memory_budget_mb)
+    temp_paths = []
+    readers = []
+    output_path = None
+    try:
+        reader = tiled_processing.RegionReader(file_path)
+        readers.append(reader)
         
-        # Save image
-        save_kwargs = {}
-        if output_ext.upper() in ['JPG', 'JPEG']:
-            save_kwargs['quality'] = settings.get('quality', 95)
-            save_kwargs['optimize'] = True
-            # Convert to RGB if necessary (JPEG doesn't support transparency)
-            if output_img.mode in ['RGBA', 'LA', 'P']:
-                background = Image.new('RGB', output_img.size, (255, 255, 255))
-                if output_img.mode == 'P':
-                    output_img = output_img.convert('RGBA')
-                background.paste(output_img, mask=output_img.split()[-1] if output_img.mode in ['RGBA', 'LA'] else None)
-                output_img = background
+        output_ext, save_settings = _chain_output(steps, reader.format)
+        pixel_steps = [
+            (operation, settings) for operation, settings in steps
+            if _is_pixel_step(operation, settings)
+        ]
         
-        elif output_ext.upper() == 'PNG':
-            save_kwargs['optimize'] = True
+        output_path = reserve_output_path(output_folder, Path(file_path).stem, output_ext)
+        streamed = output_ext == 'tiff'
+        output_img = None
         
-        elif output_ext.upper() == 'WEBP':
-            save_kwargs['quality'] = settings.get('quality', 90)
-            save_kwargs['method'] = 6  # Best compression
+        for index, (operation, settings) in enumerate(pixel_steps):
+            if index < len(pixel_steps) - 1:
+                handle, step_path = tempfile.mkstemp(suffix='.tif', dir=output_folder)
+                os.close(handle)
+                temp_paths.append(step_path)
+            else:
+                step_path = output_path if streamed else None
+            output_img = _run_tiled_step(reader, step_path, operation, settings, budget)
+            if step_path is not None and step_path != output_path:
+                reader = tiled_processing.RegionReader(step_path)
+                readers.append(reader)
         
-        output_img.save(output_path, format=output_ext.upper(), **save_kwargs)
+        if not pixel_steps:
+            output_img = reader.read_rows(0, reader.size[1])
+        if output_img is not None:
+            save_image(output_img, output_path, output_ext, save_settings)
         
-        # Get file size for reporting
         size_kb = os.path.getsize(output_path) / 1024
-        
         return {
             'success': True,
-            'message': f"Saved to {output_filename} ({size_kb:.1f} KB)",
+            'message': f"Saved to {os.path.basename(output_path)} ({size_kb:.1f} KB, tiled)",
             'output_path': output_path
         }
     
     except Exception as e:
+        if output_path and os.path.exists(output_path):
+            os.remove(output_path)
         return {
             'success': False,
             'message': str(e),
             'output_path': None
         }
+    
+    finally:
+        for reader in readers:
+            reader.close()
+        for temp_path in temp_paths:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+
+
+def process_batch(file_paths, output_folder, steps, max_workers=None, progress_queue=None,
+                  memory_budget_mb=None):
+    """
+    Run process_chain over many files on a process pool.
+    
+    Each image is decoded, processed and encoded in one worker process, so a
+    batch uses every core. Progress is reported as files finish (in
+    completion order) by putting (done, total, file_path, result) on
+    progress_queue, which a UI thread can poll.
+    
+    Args:
+        file_paths (list): Input images
+        output_folder (str): Path to output folder
+        steps (list): (operation, settings) pairs, applied in order
+        max_workers (int): Worker processes (default: CPU count)
+        progress_queue (queue.Queue): Optional progress sink
+        memory_budget_mb (int): Per-process budget for huge images
+    
+    Returns:
+        list: process_chain results, in file_paths order
+    """
+    total = len(file_paths)
+    results = [None] * total
+    workers = min(max_workers or os.cpu_count() or 1, total) if total else 1
+    
+    def report(done, index, result):
+        results[index] = result
+        if progress_queue is not None:
+            progress_queue.put((done, total, file_paths[index], result))
+    
+    if workers == 1:
+        for index, file_path in enumerate(file_paths):
+            report(index + 1, index, process_chain(file_path, output_folder, steps, memory_budget_mb))
+        return results
+    
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = {
+            executor.submit(process_chain, file_path, output_folder, steps, memory_budget_mb): index
+            for index, file_path in enumerate(file_paths)
+        }
+        for done, future in enumerate(as_completed(futures), 1):
+            try:
+                result = future.result()
+            except Exception as e:
+                # Worker process died (e.g. out of memory)
+                result = {'success': False, 'message': str(e), 'output_path': None}
+            report(done, futures[future], result)
+    
+    return results
 
 
 def convert_format(img, settings):
@@ -137,19 +434,28 @@ def convert_format(img, settings):
 
 
 def resize_image(img, settings, original_format):
-    """Resize image with optional aspect ratio preservation"""
+    """
+    Resize image with optional aspect ratio preservation.
+    
+    settings['resample'] picks a RESAMPLE_POLICIES entry (best/balanced/fast).
+    """
     try:
         width = int(settings.get('width', 1920))
         height = int(settings.get('height', 1080))
         maintain_aspect = settings.get('aspect_ratio', True)
         
+        policy = str(settings.get('resample', DEFAULT_RESAMPLE_POLICY)).lower()
+        resample, reducing_gap = RESAMPLE_POLICIES.get(policy, RESAMPLE_POLICIES[DEFAULT_RESAMPLE_POLICY])
+        
         if maintain_aspect:
-            # Calculate aspect ratio
-            img.thumbnail((width, height), Image.Resampling.LANCZOS)
+            # Calculate aspect ratio (thumbnail drafts JPEGs itself)
+            img.thumbnail((width, height), resample, reducing_gap=reducing_gap)
             output_img = img
         else:
-            # Force resize to exact dimensions
-            output_img = img.resize((width, height), Image.Resampling.LANCZOS)
+            # Force resize to exact dimensions. Draft only applies while a
+            # JPEG is still undecoded, i.e. when resize is the first step.
+            img.draft(None, (int(width * reducing_gap), int(height * reducing_gap)))
+            output_img = img.resize((width, height), resample, reducing_gap=reducing_gap)
         
         # Keep original format
         ext_map = {
@@ -189,27 +495,123 @@ def compress_image(img, settings, original_format):
     return img, output_ext
 
 
-def enhance_image(img, settings, original_format):
-    """Enhance image (brightness, contrast, sharpness)"""
-    output_img = img
+# Modes the fused enhancement handles; others use the ImageEnhance chain
+FUSED_ENHANCE_MODES = ('L', 'RGB', 'RGBA')
+
+# ImageFilter.SMOOTH, the degenerate image ImageEnhance.Sharpness blends with
+SMOOTH_KERNEL = (1, 1, 1, 1, 5, 1, 1, 1, 1)
+SMOOTH_SCALE = 13
+
+
+def _float32(value):
+    return struct.unpack('f', struct.pack('f', value))[0]
+
+
+def _blend_lut(degenerate, factor):
+    """
+    Lookup table for Image.blend(constant, img, factor).
     
-    # Apply brightness
-    brightness = float(settings.get('brightness', 1.0))
-    if brightness != 1.0:
-        enhancer = ImageEnhance.Brightness(output_img)
-        output_img = enhancer.enhance(brightness)
+    Reproduces Pillow's per-pixel arithmetic (float32, then truncation) so
+    the table gives the same bytes as the blend.
+    """
+    alpha = _float32(factor)
+    lut = []
+    for value in range(256):
+        temp = _float32(degenerate + _float32(alpha * (value - degenerate)))
+        lut.append(0 if temp <= 0.0 else 255 if temp >= 255.0 else int(temp))
+    return lut
+
+
+def _mean_luminance(histogram, mode, lut):
+    """Mean of img.point(lut).convert('L'), from img.histogram()"""
+    pixels = sum(histogram[:256])
+    means = []
+    for band in range(3 if mode != 'L' else 1):
+        counts = histogram[band * 256:(band + 1) * 256]
+        means.append(sum(lut[value] * count for value, count in enumerate(counts)) / pixels)
+    if mode == 'L':
+        return means[0]
+    return (means[0] * 299 + means[1] * 587 + means[2] * 114) / 1000
+
+
+def enhance_lut(histogram, mode, brightness, contrast):
+    """
+    Brightness and contrast as one Image.point table, or None if both are 1.
     
-    # Apply contrast
-    contrast = float(settings.get('contrast', 1.0))
+    histogram is only needed (for the contrast mean) when contrast != 1.
+    """
+    if brightness == 1.0 and contrast == 1.0:
+        return None
+    lut = list(range(256)) if brightness == 1.0 else _blend_lut(0, brightness)
     if contrast != 1.0:
-        enhancer = ImageEnhance.Contrast(output_img)
-        output_img = enhancer.enhance(contrast)
+        mean = int(_mean_luminance(histogram, mode, lut) + 0.5)
+        contrast_lut = _blend_lut(mean, contrast)
+        lut = [contrast_lut[value] for value in lut]
+    if mode == 'RGBA':
+        return lut * 3 + list(range(256))
+    return lut * len(mode)
+
+
+def sharpen_filter(sharpness):
+    """ImageEnhance.Sharpness as one 3x3 kernel, or None if sharpness is 1"""
+    if sharpness == 1.0:
+        return None
+    weights = [(1.0 - sharpness) * weight / SMOOTH_SCALE for weight in SMOOTH_KERNEL]
+    weights[4] += sharpness
+    return ImageFilter.Kernel((3, 3), weights, scale=1)
+
+
+def apply_enhance(img, lut, kernel):
+    """Apply an enhance_lut table and a sharpen_filter kernel (either may be None)"""
+    output_img = img
+    if lut is not None:
+        output_img = output_img.point(lut)
+    if kernel is not None:
+        sharpened = output_img.filter(kernel)
+        if output_img.mode == 'RGBA':
+            sharpened.putalpha(output_img.getchannel('A'))
+        output_img = sharpened
+    return output_img
+
+
+def enhance_image_chain(img, brightness, contrast, sharpness):
+    """ImageEnhance Brightness -> Contrast -> Sharpness, one full image per step"""
+    output_img = img
+    if brightness != 1.0:
+        output_img = ImageEnhance.Brightness(output_img).enhance(brightness)
+    if contrast != 1.0:
+        output_img = ImageEnhance.Contrast(output_img).enhance(contrast)
+    if sharpness != 1.0:
+        output_img = ImageEnhance.Sharpness(output_img).enhance(sharpness)
+    return output_img
+
+
+def enhance_image_fused(img, brightness, contrast, sharpness):
+    """
+    Same result as enhance_image_chain with two passes over the pixels.
     
-    # Apply sharpness
+    Brightness and contrast are blends with a constant image, so together
+    they are one per-channel lookup table applied with Image.point. The
+    contrast mean is taken from the channel histograms instead of a
+    grayscale copy, so it can differ by one level from ImageEnhance's.
+    Sharpness blends with a SMOOTH-filtered copy, which is the same as a
+    single 3x3 convolution. Alpha is left untouched, as in ImageEnhance.
+    """
+    histogram = img.histogram() if contrast != 1.0 else None
+    lut = enhance_lut(histogram, img.mode, brightness, contrast)
+    return apply_enhance(img, lut, sharpen_filter(sharpness))
+
+
+def enhance_image(img, settings, original_format):
+    """Enhance image (brightness, contrast, sharpness)"""
+    brightness = float(settings.get('brightness', 1.0))
+    contrast = float(settings.get('contrast', 1.0))
     sharpness = float(settings.get('sharpness', 1.0))
-    if sharpness != 1.0:
-        enhancer = ImageEnhance.Sharpness(output_img)
-        output_img = enhancer.enhance(sharpness)
+    
+    if img.mode in FUSED_ENHANCE_MODES:
+        output_img = enhance_image_fused(img, brightness, contrast, sharpness)
+    else:
+        output_img = enhance_image_chain(img, brightness, contrast, sharpness)
     
     # Keep original format
     ext_map = {
@@ -225,14 +627,24 @@ def enhance_image(img, settings, original_format):
     return output_img, output_ext
 
 
-def rotate_image(img, settings, original_format):
-    """Rotate image by specified angle"""
-    angle_str = settings.get('angle', '90')
-    
+def _rotation_angle(settings):
     try:
-        angle = int(angle_str)
+        return int(settings.get('angle', '90'))
     except ValueError:
-        angle = 90  # Default to 90 if invalid
+        return 90  # Default to 90 if invalid
+
+
+# Clockwise quarter turns -> transpose (Pillow rotates counter-clockwise)
+QUARTER_TURNS = {
+    90: Image.Transpose.ROTATE_270,
+    180: Image.Transpose.ROTATE_180,
+    270: Image.Transpose.ROTATE_90,
+}
+
+
+def rotate_image(img, settings, original_format):
+    """Rotate image by specified angle"""
+    angle = _rotation_angle(settings)
     
     # Rotate image (counter-clockwise, so negate for clockwise)
     output_img = img.rotate(-angle, expand=True, fillcolor='white')
@@ -251,23 +663,28 @@ def rotate_image(img, settings, original_format):
     return output_img, output_ext
 
 
+def _crop_box(settings, width, height):
+    """Validated (left, top, right, bottom) crop box"""
+    left = int(settings.get('left', 0))
+    top = int(settings.get('top', 0))
+    right = int(settings.get('right', width))
+    bottom = int(settings.get('bottom', height))
+    
+    # Validate dimensions
+    if left < 0 or top < 0 or right > width or bottom > height:
+        raise ValueError("Crop dimensions out of bounds")
+    
+    if left >= right or top >= bottom:
+        raise ValueError("Invalid crop dimensions (left >= right or top >= bottom)")
+    
+    return left, top, right, bottom
+
+
 def crop_image(img, settings, original_format):
     """Crop image to specified dimensions"""
     try:
-        left = int(settings.get('left', 0))
-        top = int(settings.get('top', 0))
-        right = int(settings.get('right', img.width))
-        bottom = int(settings.get('bottom', img.height))
-        
-        # Validate dimensions
-        if left < 0 or top < 0 or right > img.width or bottom > img.height:
-            raise ValueError("Crop dimensions out of bounds")
-        
-        if left >= right or top >= bottom:
-            raise ValueError("Invalid crop dimensions (left >= right or top >= bottom)")
-        
         # Crop image
-        output_img = img.crop((left, top, right, bottom))
+        output_img = img.crop(_crop_box(settings, img.width, img.height))
         
         # Keep original format
         ext_map = {
@@ -295,7 +712,49 @@ def check_dependencies():
         return False
 
 
+def parse_steps(op_specs):
+    """Turn "name:key=value,key=value" specs into (operation, settings) steps"""
+    steps = []
+    for spec in op_specs:
+        operation, _, pairs = spec.partition(':')
+        settings = {}
+        for pair in filter(None, pairs.split(',')):
+            key, sep, value = pair.partition('=')
+            if not sep:
+                raise ValueError(f"Expected key=value, got: {pair}")
+            settings[key] = value.lower() not in ('false', 'no', '0') if key == 'aspect_ratio' else value
+        steps.append((operation, settings))
+    return steps
+
+
+def main(argv=None):
+    """Headless CLI: run an operation chain over a batch of images"""
+    parser = argparse.ArgumentParser(description="Image Processor (headless)")
+    parser.add_argument('files', nargs='+', help="Images to process")
+    parser.add_argument('-o', '--output', required=True, help="Output folder")
+    parser.add_argument('--op', action='append', required=True, metavar='NAME:KEY=VALUE,...',
+                        help="Operation and its settings; repeat to chain")
+    parser.add_argument('--workers', type=int, default=None, help="Worker processes (default: CPU count)")
+    parser.add_argument('--memory-budget', type=int, default=None, metavar='MB',
+                        help="Per-process working memory for huge images "
+                             f"(default: {tiled_processing.DEFAULT_MEMORY_BUDGET_MB}). Only a hard cap "
+                             "for uncompressed TIFF/BMP/PPM input saved as TIFF; other inputs are "
+                             "decoded whole and other outputs encoded whole")
+    args = parser.parse_args(argv)
+    
+    os.makedirs(args.output, exist_ok=True)
+    results = process_batch(args.files, args.output, parse_steps(args.op), max_workers=args.workers,
+                            memory_budget_mb=args.memory_budget)
+    for file_path, result in zip(args.files, results):
+        status = "✓" if result['success'] else "✗"
+        print(f"{status} {os.path.basename(file_path)}: {result['message']}")
+    return 0 if all(result['success'] for result in results) else 1
+
+
 if __name__ == "__main__":
+    if len(sys.argv) > 1:
+        sys.exit(main())
+    
     # Test script
     print("Image Processor Worker Module")
     print("=" * 50)
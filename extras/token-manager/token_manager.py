@@ -200,13 +200,13 @@ class TokenManagerApp:
         # RAG chunk size
         tk.Label(
             model_inner,
-            text="RAG Chunk Size:",
+            text="RAG Chunk Size (chars):",
             bg="#2E3440",
             fg="#D8DEE9",
             font=("Segoe UI", 9)
         ).grid(row=0, column=2, sticky=tk.W, padx=(0, 10))
         
-        self.chunk_size_var = tk.StringVar(value="1000")
+        self.chunk_size_var = tk.StringVar(value=str(worker.DEFAULT_CHUNK_SIZE))
         chunk_entry = tk.Entry(
             model_inner,
             textvariable=self.chunk_size_var,
@@ -217,6 +217,26 @@ class TokenManagerApp:
         )
         chunk_entry.grid(row=0, column=3, sticky=tk.W, padx=(0, 20))
         
+        # RAG chunk overlap
+        tk.Label(
+            model_inner,
+            text="Overlap:",
+            bg="#2E3440",
+            fg="#D8DEE9",
+            font=("Segoe UI", 9)
+        ).grid(row=0, column=4, sticky=tk.W, padx=(0, 10))
+        
+        self.chunk_overlap_var = tk.StringVar(value=str(worker.DEFAULT_CHUNK_OVERLAP))
+        overlap_entry = tk.Entry(
+            model_inner,
+            textvariable=self.chunk_overlap_var,
+            width=6,
+            bg="#3B4252",
+            fg="#D8DEE9",
+            insertbackground="#88C0D0"
+        )
+        overlap_entry.grid(row=0, column=5, sticky=tk.W, padx=(0, 20))
+        
         # Include embeddings checkbox
         self.include_embeddings_var = tk.BooleanVar(value=True)
         embed_check = tk.Checkbutton(
@@ -229,7 +249,7 @@ class TokenManagerApp:
             activebackground="#2E3440",
             font=("Segoe UI", 9)
         )
-        embed_check.grid(row=0, column=4, sticky=tk.W)
+        embed_check.grid(row=0, column=6, sticky=tk.W)
         
         # ===== ANALYZE BUTTON =====
         self.analyze_btn = tk.Button(
@@ -342,7 +362,7 @@ This tool helps you analyze token usage and costs for RAG workflows.
 🚀 Getting Started:
    1. Add files or folders using buttons above
    2. Select your target model
-   3. Configure RAG chunk size (if applicable)
+   3. Configure RAG chunk size and overlap (if applicable)
    4. Click "ANALYZE TOKENS"
    5. View results in tabs
 
@@ -422,15 +442,8 @@ This tool helps you analyze token usage and costs for RAG workflows.
     
     def is_text_file(self, filepath):
         """Check if file is likely a text file"""
-        text_extensions = [
-            '.txt', '.md', '.json', '.py', '.js', '.ts', '.jsx', '.tsx',
-            '.html', '.css', '.scss', '.xml', '.yaml', '.yml', '.toml',
-            '.sh', '.bat', '.ps1', '.c', '.cpp', '.h', '.hpp', '.java',
-            '.go', '.rs', '.rb', '.php', '.sql', '.csv', '.log'
-        ]
-        
         ext = Path(filepath).suffix.lower()
-        return ext in text_extensions
+        return ext in worker.TEXT_EXTENSIONS
     
     def analyze_tokens(self):
         """Start token analysis"""
@@ -447,6 +460,9 @@ This tool helps you analyze token usage and costs for RAG workflows.
             chunk_size = int(self.chunk_size_var.get())
             if chunk_size < 100 or chunk_size > 10000:
                 raise ValueError("Chunk size must be between 100 and 10000")
+            chunk_overlap = int(self.chunk_overlap_var.get())
+            if chunk_overlap < 0 or chunk_overlap >= chunk_size:
+                raise ValueError("Chunk overlap must be at least 0 and smaller than the chunk size")
         except ValueError as e:
             messagebox.showerror("Invalid Chunk Size", str(e))
             return
@@ -464,6 +480,7 @@ This tool helps you analyze token usage and costs for RAG workflows.
         try:
             model = self.model_var.get()
             chunk_size = int(self.chunk_size_var.get())
+            chunk_overlap = int(self.chunk_overlap_var.get())
             include_embeddings = self.include_embeddings_var.get()
             
             # Analyze tokens
@@ -471,7 +488,8 @@ This tool helps you analyze token usage and costs for RAG workflows.
                 self.file_list,
                 model,
                 chunk_size,
-                include_embeddings
+                include_embeddings,
+                chunk_overlap=chunk_overlap
             )
             
             # Display results
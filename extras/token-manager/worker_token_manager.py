@@ -5,17 +5,29 @@ Token counting and cost estimation for RAG + LLM workflows.
 
 Features:
 - Multi-model token counting (GPT-4, Claude, Llama, etc.)
-- RAG chunk analysis
+- RAG chunk analysis (dry run of the knowledge-base splitter)
 - Cost calculation (prompt + completion + embeddings)
 - Per-file breakdowns
+- Persistent per-file count cache (only changed files are re-tokenized)
 
 Dependencies: tiktoken, transformers (optional for non-OpenAI models)
+
+Headless use:
+    python worker_token_manager.py --json --model gpt-4 --chunk-size 1000 --chunk-overlap 200 <files or folders>
 """
 
 import os
+import sys
 from pathlib import Path
+import argparse
+import hashlib
 import json
-import math
+import sqlite3
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from itertools import groupby
 
 # Try to import tiktoken (OpenAI tokenizer)
 try:
@@ -23,7 +35,7 @@ try:
     HAS_TIKTOKEN = True
 except ImportError:
     HAS_TIKTOKEN = False
-    print("WARNING: tiktoken not installed. Using approximate counting.")
+    print("WARNING: tiktoken not installed. Using approximate counting.", file=sys.stderr)
 
 
 # Model pricing (per 1M tokens) - Updated Oct 2024
@@ -65,6 +77,312 @@ MODEL_ENCODINGS = {
 }
 
 
+# Files are read in pieces of at most this many characters so memory stays
+# flat on huge files.
+READ_CHUNK_CHARS = 1024 * 1024
+
+TEXT_EXTENSIONS = {
+    '.txt', '.md', '.json', '.py', '.js', '.ts', '.jsx', '.tsx',
+    '.html', '.css', '.scss', '.xml', '.yaml', '.yml', '.toml',
+    '.sh', '.bat', '.ps1', '.c', '.cpp', '.h', '.hpp', '.java',
+    '.go', '.rs', '.rb', '.php', '.sql', '.csv', '.log'
+}
+
+# Knowledge-base ingestion splits documents with langchain's
+# RecursiveCharacterTextSplitter(chunk_size=1000, chunk_overlap=200), measured
+# in characters (backend/ingest.py). The chunk simulation below reproduces it.
+DEFAULT_CHUNK_SIZE = 1000
+DEFAULT_CHUNK_OVERLAP = 200
+SPLITTER_SEPARATORS = ['\n\n', '\n', ' ', '']
+
+# Chunk size histogram buckets, as fractions of the chunk size
+HISTOGRAM_BUCKETS = (0.25, 0.5, 0.75, 1.0)
+
+# Count cache location, inside the openElara user data directory
+APP_DATA_NAME = 'openElara'
+CACHE_FILENAME = 'token_cache.sqlite3'
+HASH_BLOCK_BYTES = 1024 * 1024
+
+_encodings = {}
+_encodings_lock = threading.Lock()
+
+
+def get_encoding(model):
+    """
+    Return the cached tiktoken encoding for a model, loading it on first use.
+    
+    Returns None when tiktoken or the encoding is unavailable; the failure is
+    cached too so callers fall back to approximate counting without retrying.
+    """
+    if not HAS_TIKTOKEN:
+        return None
+    
+    encoding_name = MODEL_ENCODINGS.get(model, 'cl100k_base')
+    with _encodings_lock:
+        if encoding_name not in _encodings:
+            try:
+                _encodings[encoding_name] = tiktoken.get_encoding(encoding_name)
+            except Exception:
+                _encodings[encoding_name] = None
+        return _encodings[encoding_name]
+
+
+def default_cache_path():
+    """Token count cache path in the platform's user data directory"""
+    if sys.platform == 'win32':
+        base = os.environ.get('APPDATA') or os.path.join(os.path.expanduser('~'), 'AppData', 'Roaming')
+    elif sys.platform == 'darwin':
+        base = os.path.join(os.path.expanduser('~'), 'Library', 'Application Support')
+    else:
+        base = os.environ.get('XDG_CONFIG_HOME') or os.path.join(os.path.expanduser('~'), '.config')
+    return os.path.join(base, APP_DATA_NAME, 'token-manager', CACHE_FILENAME)
+
+
+def hash_file(file_path):
+    """SHA-256 of a file's bytes, read in blocks"""
+    hasher = hashlib.sha256()
+    with open(file_path, 'rb') as f:
+        for block in iter(lambda: f.read(HASH_BLOCK_BYTES), b''):
+            hasher.update(block)
+    return hasher.hexdigest()
+
+
+class TokenCountCache:
+    """
+    Persistent SQLite cache of per-file counts.
+    
+    Rows are keyed by path, encoding name and chunk settings, and reused
+    while the file's size and mtime_ns are unchanged. When they changed (or
+    the path is new) the file is hashed and any row with the same content
+    hash is reused, so touched, copied or moved files are not re-tokenized.
+    Safe to share between the analysis threads.
+    """
+    
+    def __init__(self, db_path):
+        self.db_path = db_path
+        os.makedirs(os.path.dirname(db_path), exist_ok=True)
+        self.conn = sqlite3.connect(db_path, check_same_thread=False)
+        self.conn.executescript('''
+            CREATE TABLE IF NOT EXISTS token_counts (
+                path TEXT NOT NULL,
+                encoding TEXT NOT NULL,
+                chunk_size INTEGER NOT NULL,
+                chunk_overlap INTEGER NOT NULL,
+                size INTEGER NOT NULL,
+                mtime_ns INTEGER NOT NULL,
+                content_hash TEXT NOT NULL,
+                counts TEXT NOT NULL,
+                PRIMARY KEY (path, encoding, chunk_size, chunk_overlap)
+            );
+            CREATE INDEX IF NOT EXISTS idx_token_counts_hash
+                ON token_counts(content_hash, encoding, chunk_size, chunk_overlap);
+        ''')
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.hash_hits = 0
+        self.misses = 0
+    
+    def get(self, file_path, encoding_name, chunk_size, chunk_overlap, count_file):
+        """
+        Return cached counts for a file, calling count_file() on a miss.
+        
+        Args:
+            file_path (str): File to look up
+            encoding_name (str): Tokenizer encoding the counts belong to
+            chunk_size (int): Chunk size the counts belong to
+            chunk_overlap (int): Chunk overlap the counts belong to
+            count_file (callable): Computes the counts when nothing is cached
+        
+        Returns:
+            dict: Counts as returned by count_file
+        """
+        path = os.path.abspath(file_path)
+        settings = (encoding_name, chunk_size, chunk_overlap)
+        stat = os.stat(file_path)
+        
+        with self.lock:
+            row = self.conn.execute(
+                'SELECT counts FROM token_counts WHERE path = ? AND encoding = ? AND chunk_size = ? '
+                'AND chunk_overlap = ? AND size = ? AND mtime_ns = ?',
+                (path, *settings, stat.st_size, stat.st_mtime_ns)
+            ).fetchone()
+            if row is not None:
+                self.hits += 1
+                return json.loads(row[0])
+        
+        content_hash = hash_file(file_path)
+        with self.lock:
+            row = self.conn.execute(
+                'SELECT counts FROM token_counts WHERE content_hash = ? AND encoding = ? '
+                'AND chunk_size = ? AND chunk_overlap = ?',
+                (content_hash, *settings)
+            ).fetchone()
+        if row is not None:
+            counts = json.loads(row[0])
+        else:
+            counts = count_file()
+        
+        # Only remember counts for the file version that was hashed
+        after = os.stat(file_path)
+        with self.lock:
+            if row is not None:
+                self.hash_hits += 1
+            else:
+                self.misses += 1
+            if (after.st_size, after.st_mtime_ns) == (stat.st_size, stat.st_mtime_ns):
+                self.conn.execute(
+                    'INSERT OR REPLACE INTO token_counts '
+                    '(path, encoding, chunk_size, chunk_overlap, size, mtime_ns, content_hash, counts) '
+                    'VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+                    (path, *settings, stat.st_size, stat.st_mtime_ns, content_hash, json.dumps(counts))
+                )
+        return counts
+    
+    def stats(self):
+        """Hit counts and hit rate since the cache was opened"""
+        lookups = self.hits + self.hash_hits + self.misses
+        return {
+            'path': self.db_path,
+            'hits': self.hits,
+            'hash_hits': self.hash_hits,
+            'misses': self.misses,
+            'hit_rate': ((self.hits + self.hash_hits) / lookups) * 100 if lookups else 0
+        }
+    
+    def close(self):
+        self.conn.commit()
+        self.conn.close()
+
+
+def read_text_pieces(file_path, max_chars=READ_CHUNK_CHARS):
+    """
+    Yield a file's text in pieces of roughly max_chars characters.
+    
+    Pieces end just after a newline that is followed by non-whitespace, where
+    tiktoken's pre-tokenizer always splits, so per-piece counts add up to the
+    whole-file count.
+    """
+    with open(file_path, 'r', encoding='utf-8', errors='ignore') as f:
+        carry = ''
+        while True:
+            block = f.read(max_chars)
+            if not block:
+                break
+            text = carry + block
+            cut = len(text) - 1
+            while cut > 0:
+                cut = text.rfind('\n', 0, cut)
+                if cut < 0 or not text[cut + 1].isspace():
+                    break
+            if cut <= 0 or len(text) - cut > max_chars:
+                carry = ''
+                yield text
+            else:
+                carry = text[cut + 1:]
+                yield text[:cut + 1]
+        if carry:
+            yield carry
+
+
+def _split_keep_separator(text, separator):
+    """Split text, keeping each separator at the start of the piece after it"""
+    if not separator:
+        return list(text)
+    parts = text.split(separator)
+    splits = [parts[0]] + [separator + part for part in parts[1:]]
+    return [split for split in splits if split]
+
+
+def _stream_splits(pieces, separator):
+    """_split_keep_separator over text that arrives in pieces"""
+    carry = ''
+    prefix = ''
+    for piece in pieces:
+        parts = (carry + piece).split(separator)
+        carry = parts.pop()
+        for part in parts:
+            if prefix or part:
+                yield prefix + part
+            prefix = separator
+    if prefix or carry:
+        yield prefix + carry
+
+
+def _merge_splits(splits, chunk_size, chunk_overlap):
+    """Greedily pack small splits into chunks, carrying the overlap forward"""
+    window = deque()
+    total = 0
+    for split in splits:
+        length = len(split)
+        if total + length > chunk_size and window:
+            chunk = ''.join(window).strip()
+            if chunk:
+                yield chunk
+            while total > chunk_overlap or (total + length > chunk_size and total > 0):
+                total -= len(window.popleft())
+        window.append(split)
+        total += length
+    chunk = ''.join(window).strip()
+    if chunk:
+        yield chunk
+
+
+def _chunk_splits(splits, separators, chunk_size, chunk_overlap):
+    # Runs of splits that fit are merged; each split that does not is
+    # split again with the next separator.
+    for fits, run in groupby(splits, key=lambda split: len(split) < chunk_size):
+        if fits:
+            yield from _merge_splits(run, chunk_size, chunk_overlap)
+        elif separators:
+            for split in run:
+                yield from _split_text(split, separators, chunk_size, chunk_overlap)
+        else:
+            yield from run
+
+
+def _split_text(text, separators, chunk_size, chunk_overlap):
+    for index, separator in enumerate(separators):
+        if separator == '' or separator in text:
+            break
+    splits = _split_keep_separator(text, separator)
+    yield from _chunk_splits(splits, separators[index + 1:], chunk_size, chunk_overlap)
+
+
+def iter_ingest_chunks(pieces, chunk_size=DEFAULT_CHUNK_SIZE, chunk_overlap=DEFAULT_CHUNK_OVERLAP):
+    """
+    Yield the chunks knowledge-base ingestion would produce for one document.
+    
+    Matches RecursiveCharacterTextSplitter.split_text on the joined pieces
+    chunk for chunk. Only the current top-level split and the overlap window
+    are held in memory, and chunks are produced one at a time.
+    
+    Args:
+        pieces (iterable): The document's text, in order
+        chunk_size (int): Maximum chunk size in characters
+        chunk_overlap (int): Characters carried over between chunks
+    
+    Returns:
+        generator: Chunk strings
+    """
+    # Top-level splits fall on blank lines. A document without any is a
+    # single split, which is re-split on the next separator exactly as the
+    # splitter would have done on the whole text.
+    splits = _stream_splits(pieces, SPLITTER_SEPARATORS[0])
+    return _chunk_splits(splits, SPLITTER_SEPARATORS[1:], chunk_size, chunk_overlap)
+
+
+def histogram_labels(chunk_size):
+    """Bucket labels (character ranges) for chunk size histograms"""
+    labels = []
+    lower = 1
+    for fraction in HISTOGRAM_BUCKETS:
+        upper = int(chunk_size * fraction)
+        labels.append(f"{lower}-{upper}")
+        lower = upper + 1
+    labels.append(f">{chunk_size}")
+    return labels
+
+
 def count_tokens(text, model='gpt-4'):
     """
     Count tokens in text for specified model.
@@ -80,77 +398,158 @@ def count_tokens(text, model='gpt-4'):
         # Fallback: approximate counting (4 chars ≈ 1 token)
         return len(text) // 4
     
+    encoding = get_encoding(model)
+    if encoding is None:
+        return len(text) // 4
+    
     try:
-        encoding_name = MODEL_ENCODINGS.get(model, 'cl100k_base')
-        encoding = tiktoken.get_encoding(encoding_name)
         return len(encoding.encode(text))
     except Exception:
         # Fallback
         return len(text) // 4
 
 
-def analyze_tokens(file_paths, model, chunk_size, include_embeddings=True):
+def _count_file(file_path, encoding, chunk_size, chunk_overlap):
+    """
+    Stream one file through the encoder and the chunk simulation in one read.
+    
+    Returns a dict with chars, tokens, chunks, chunk_chars and histogram
+    (chunk counts per HISTOGRAM_BUCKETS bucket).
+    """
+    counts = {'chars': 0, 'tokens': 0, 'chunks': 0, 'chunk_chars': 0}
+    histogram = [0] * (len(HISTOGRAM_BUCKETS) + 1)
+    bounds = [chunk_size * fraction for fraction in HISTOGRAM_BUCKETS]
+    
+    def pieces():
+        for piece in read_text_pieces(file_path):
+            counts['chars'] += len(piece)
+            if encoding is not None:
+                counts['tokens'] += len(encoding.encode_ordinary(piece))
+            yield piece
+    
+    for chunk in iter_ingest_chunks(pieces(), chunk_size, chunk_overlap):
+        length = len(chunk)
+        counts['chunks'] += 1
+        counts['chunk_chars'] += length
+        bucket = 0
+        while bucket < len(bounds) and length > bounds[bucket]:
+            bucket += 1
+        histogram[bucket] += 1
+    
+    if encoding is None:
+        counts['tokens'] = counts['chars'] // 4
+    counts['histogram'] = histogram
+    return counts
+
+
+def analyze_tokens(file_paths, model, chunk_size=DEFAULT_CHUNK_SIZE, include_embeddings=True,
+                   max_workers=None, chunk_overlap=DEFAULT_CHUNK_OVERLAP, use_cache=True, cache_path=None):
     """
     Analyze token usage for list of files.
     
+    Files are counted on a thread pool (tiktoken releases the GIL while
+    encoding) with one cached encoder per model. Chunk counts come from a
+    dry run of the knowledge-base splitter (iter_ingest_chunks); nothing is
+    embedded or stored. Chunk token counts are estimated from each file's
+    tokens-per-character ratio. Counts are cached per file (TokenCountCache)
+    so unchanged files are not re-read on the next run.
+    
     Args:
         file_paths (list): List of file paths
         model (str): Model name
-        chunk_size (int): RAG chunk size in tokens
+        chunk_size (int): RAG chunk size in characters
         include_embeddings (bool): Include embedding costs
+        max_workers (int): Worker threads (default: CPU count)
+        chunk_overlap (int): RAG chunk overlap in characters
+        use_cache (bool): Reuse and store counts in the persistent cache
+        cache_path (str): Cache database (default: default_cache_path())
     
     Returns:
         dict: Analysis results
     """
+    start_time = time.perf_counter()
     results = {
         'model': model,
         'chunk_size': chunk_size,
+        'chunk_overlap': chunk_overlap,
         'total_files': len(file_paths),
         'total_tokens': 0,
         'total_chunks': 0,
         'total_chars': 0,
+        'total_chunk_chars': 0,
+        'total_chunk_tokens': 0,
+        'chunk_histogram': dict.fromkeys(histogram_labels(chunk_size), 0),
         'files': [],
         'costs': {},
         'rag_stats': {},
         'include_embeddings': include_embeddings
     }
     
-    for file_path in file_paths:
+    encoding = get_encoding(model)
+    encoding_name = encoding.name if encoding is not None else 'approximate'
+    cache = TokenCountCache(cache_path or default_cache_path()) if use_cache else None
+    
+    def count_file(file_path):
         try:
-            # Read file
-            with open(file_path, 'r', encoding='utf-8', errors='ignore') as f:
-                content = f.read()
-            
-            # Count tokens
-            token_count = count_tokens(content, model)
-            char_count = len(content)
-            
-            # Calculate chunks
-            num_chunks = math.ceil(token_count / chunk_size)
-            
-            # Store file data
-            file_data = {
-                'path': file_path,
-                'name': os.path.basename(file_path),
-                'size_bytes': os.path.getsize(file_path),
-                'chars': char_count,
-                'tokens': token_count,
-                'chunks': num_chunks,
-                'avg_chunk_size': token_count / num_chunks if num_chunks > 0 else 0
-            }
-            
-            results['files'].append(file_data)
-            results['total_tokens'] += token_count
-            results['total_chunks'] += num_chunks
-            results['total_chars'] += char_count
-        
+            if cache is None:
+                return _count_file(file_path, encoding, chunk_size, chunk_overlap)
+            return cache.get(
+                file_path, encoding_name, chunk_size, chunk_overlap,
+                lambda: _count_file(file_path, encoding, chunk_size, chunk_overlap)
+            )
         except Exception as e:
+            return e
+    
+    workers = max_workers or os.cpu_count() or 1
+    try:
+        if workers == 1 or len(file_paths) < 2:
+            counts = [count_file(file_path) for file_path in file_paths]
+        else:
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                counts = list(executor.map(count_file, file_paths))
+    finally:
+        if cache is not None:
+            cache.close()
+    results['cache'] = cache.stats() if cache is not None else None
+    
+    for file_path, count in zip(file_paths, counts):
+        if isinstance(count, Exception):
             # Log error but continue
             results['files'].append({
                 'path': file_path,
                 'name': os.path.basename(file_path),
-                'error': str(e)
+                'error': str(count)
             })
+            continue
+        
+        char_count = count['chars']
+        token_count = count['tokens']
+        num_chunks = count['chunks']
+        tokens_per_char = token_count / char_count if char_count > 0 else 0
+        chunk_tokens = round(count['chunk_chars'] * tokens_per_char)
+        
+        # Store file data
+        file_data = {
+            'path': file_path,
+            'name': os.path.basename(file_path),
+            'size_bytes': os.path.getsize(file_path),
+            'chars': char_count,
+            'tokens': token_count,
+            'chunks': num_chunks,
+            'chunk_chars': count['chunk_chars'],
+            'chunk_tokens': chunk_tokens,
+            'avg_chunk_size': count['chunk_chars'] / num_chunks if num_chunks > 0 else 0,
+            'avg_chunk_tokens': chunk_tokens / num_chunks if num_chunks > 0 else 0
+        }
+        
+        results['files'].append(file_data)
+        results['total_tokens'] += token_count
+        results['total_chunks'] += num_chunks
+        results['total_chars'] += char_count
+        results['total_chunk_chars'] += count['chunk_chars']
+        results['total_chunk_tokens'] += chunk_tokens
+        for label, bucket_count in zip(results['chunk_histogram'], count['histogram']):
+            results['chunk_histogram'][label] += bucket_count
     
     # Calculate costs
     results['costs'] = calculate_costs(results, model, include_embeddings)
@@ -158,6 +557,7 @@ def analyze_tokens(file_paths, model, chunk_size, include_embeddings=True):
     # RAG statistics
     results['rag_stats'] = calculate_rag_stats(results)
     
+    results['elapsed_seconds'] = round(time.perf_counter() - start_time, 3)
     return results
 
 
@@ -167,17 +567,18 @@ def calculate_costs(results, model, include_embeddings):
     
     total_tokens = results['total_tokens']
     total_chunks = results['total_chunks']
+    chunk_tokens = results['total_chunk_tokens']
     
     # Prompt cost (RAG context + user query)
     # Assume average query is 100 tokens, RAG context varies by chunk count
-    avg_rag_context = min(total_chunks * results['chunk_size'] * 0.1, 8000)  # Max 8K context
+    avg_rag_context = min(chunk_tokens * 0.1, 8000)  # Max 8K context
     prompt_tokens_per_query = avg_rag_context + 100
     
     # Completion cost (assume average response is 500 tokens)
     completion_tokens_per_query = 500
     
-    # Embedding cost (all chunks need to be embedded for RAG)
-    embedding_tokens = total_tokens if include_embeddings else 0
+    # Embedding cost (all chunks need to be embedded for RAG, overlap included)
+    embedding_tokens = chunk_tokens if include_embeddings else 0
     
     costs = {
         'prompt_per_million': pricing['prompt'],
@@ -186,6 +587,7 @@ def calculate_costs(results, model, include_embeddings):
         
         'total_tokens': total_tokens,
         'total_chunks': total_chunks,
+        'embedding_tokens': embedding_tokens,
         
         # One-time costs
         'embedding_cost_total': (embedding_tokens / 1_000_000) * pricing['embedding'],
@@ -220,12 +622,20 @@ def calculate_rag_stats(results):
     if not results['files']:
         return {}
     
-    chunk_sizes = [f['avg_chunk_size'] for f in results['files'] if 'chunks' in f and f['chunks'] > 0]
+    total_chunks = results['total_chunks']
+    overlap_chars = max(results['total_chunk_chars'] - results['total_chars'], 0)
     
     stats = {
-        'total_chunks': results['total_chunks'],
-        'avg_chunk_size': sum(chunk_sizes) / len(chunk_sizes) if chunk_sizes else 0,
+        'total_chunks': total_chunks,
+        'avg_chunk_size': results['total_chunk_chars'] / total_chunks if total_chunks > 0 else 0,
+        'avg_chunk_tokens': results['total_chunk_tokens'] / total_chunks if total_chunks > 0 else 0,
         'target_chunk_size': results['chunk_size'],
+        'chunk_overlap': results['chunk_overlap'],
+        'chunk_chars': results['total_chunk_chars'],
+        'chunk_tokens': results['total_chunk_tokens'],
+        'overlap_chars': overlap_chars,
+        'overlap_overhead': 0,
+        'histogram': results['chunk_histogram'],
         'efficiency': 0,
         'storage_estimate_mb': 0,
     }
@@ -234,12 +644,36 @@ def calculate_rag_stats(results):
     if stats['target_chunk_size'] > 0:
         stats['efficiency'] = (stats['avg_chunk_size'] / stats['target_chunk_size']) * 100
     
+    # Overlap overhead (extra characters embedded because of chunk overlap)
+    if results['total_chars'] > 0:
+        stats['overlap_overhead'] = (overlap_chars / results['total_chars']) * 100
+    
     # Storage estimate (rough - vectors are ~1KB per chunk with metadata)
-    stats['storage_estimate_mb'] = (results['total_chunks'] * 1024) / (1024 * 1024)
+    stats['storage_estimate_mb'] = (total_chunks * 1024) / (1024 * 1024)
     
     return stats
 
 
+def format_histogram(histogram, indent="  "):
+    """Format chunk size histogram as text bars"""
+    largest = max(histogram.values(), default=0)
+    lines = ""
+    for label, count in histogram.items():
+        bar = "█" * round(30 * count / largest) if largest else ""
+        lines += f"{indent}{label:>10} chars: {count:>8,} {bar}\n"
+    return lines
+
+
+def format_cache_line(results):
+    """Format the count cache hit rate for the summary"""
+    cache = results.get('cache')
+    if not cache:
+        return "   Count Cache: off\n"
+    reused = cache['hits'] + cache['hash_hits']
+    return (f"   Count Cache: {reused:,}/{reused + cache['misses']:,} files reused "
+            f"({cache['hit_rate']:.1f}%, {cache['hash_hits']:,} by content hash) in {results['elapsed_seconds']:.2f}s\n")
+
+
 def format_summary(results):
     """Format summary view"""
     summary = f"""
@@ -250,14 +684,14 @@ def format_summary(results):
 📊 Overview:
    Model: {results['model']}
    Files Analyzed: {results['total_files']}
-   RAG Chunk Size: {results['chunk_size']} tokens
+   RAG Chunk Size: {results['chunk_size']} chars ({results['chunk_overlap']} overlap)
 
 📈 Token Statistics:
    Total Characters: {results['total_chars']:,}
    Total Tokens: {results['total_tokens']:,}
    Total RAG Chunks: {results['total_chunks']:,}
    Avg Tokens/File: {results['total_tokens'] // results['total_files'] if results['total_files'] > 0 else 0:,}
-
+{format_cache_line(results)}
 💰 Cost Estimates (USD):
 """
     
@@ -275,9 +709,10 @@ def format_summary(results):
 
 🔍 RAG Analysis:
    Total Chunks: {results['rag_stats']['total_chunks']:,}
-   Avg Chunk Size: {results['rag_stats']['avg_chunk_size']:.0f} tokens
-   Target Chunk Size: {results['rag_stats']['target_chunk_size']} tokens
+   Avg Chunk Size: {results['rag_stats']['avg_chunk_size']:.0f} chars (~{results['rag_stats']['avg_chunk_tokens']:.0f} tokens)
+   Target Chunk Size: {results['rag_stats']['target_chunk_size']} chars
    Chunk Efficiency: {results['rag_stats']['efficiency']:.1f}%
+   Overlap Overhead: {results['rag_stats']['overlap_overhead']:.1f}%
    Vector Storage Est: {results['rag_stats']['storage_estimate_mb']:.2f} MB
 
 """
@@ -312,8 +747,8 @@ Cost Components:
     
     if results['include_embeddings']:
         breakdown += f"""
-  EMBEDDINGS (One-time):
-    Tokens: {costs['total_tokens']:,}
+  EMBEDDINGS (One-time, overlap included):
+    Tokens: {costs['embedding_tokens']:,}
     Rate:   ${costs['embedding_per_million']:.2f} per 1M
     Total:  ${costs['embedding_cost_total']:.4f}
 """
@@ -359,15 +794,24 @@ def format_rag_analysis(results):
 RAG WORKFLOW ANALYSIS
 {'=' * 67}
 
-Chunk Configuration:
-  Target Chunk Size: {rag['target_chunk_size']} tokens
-  Actual Avg Size:   {rag['avg_chunk_size']:.0f} tokens
+Chunk Configuration (dry run of knowledge-base ingestion):
+  Target Chunk Size: {rag['target_chunk_size']} chars
+  Chunk Overlap:     {rag['chunk_overlap']} chars
+  Actual Avg Size:   {rag['avg_chunk_size']:.0f} chars
   Efficiency:        {rag['efficiency']:.1f}%
 
 Chunk Distribution:
   Total Chunks:      {rag['total_chunks']:,}
   Total Tokens:      {results['total_tokens']:,}
-  Avg Tokens/Chunk:  {results['total_tokens'] // rag['total_chunks'] if rag['total_chunks'] > 0 else 0:,}
+  Avg Tokens/Chunk:  ~{rag['avg_chunk_tokens']:.0f}
+
+Chunk Sizes:
+{format_histogram(rag['histogram'])}
+Overlap Overhead:
+  Source Chars:      {results['total_chars']:,}
+  Chunked Chars:     {rag['chunk_chars']:,}
+  Repeated Chars:    {rag['overlap_chars']:,} ({rag['overlap_overhead']:.1f}%)
+  Embedded Tokens:   ~{rag['chunk_tokens']:,}
 
 Storage Requirements:
   Vector DB Size:    ~{rag['storage_estimate_mb']:.2f} MB
@@ -375,8 +819,8 @@ Storage Requirements:
 
 RAG Context Retrieval:
   Typical Retrieval: 5-10 chunks per query
-  Context Size:      {rag['target_chunk_size'] * 7:,} tokens (avg 7 chunks)
-  Max Context (8K):  Fits ~{8000 // rag['target_chunk_size']} chunks
+  Context Size:      {rag['avg_chunk_tokens'] * 7:,.0f} tokens (avg 7 chunks)
+  Max Context (8K):  Fits ~{int(8000 // rag['avg_chunk_tokens']) if rag['avg_chunk_tokens'] > 0 else 0} chunks
 
 Performance Considerations:
 """
@@ -397,8 +841,8 @@ Performance Considerations:
     analysis += f"""
 
 Recommended RAG Strategy:
-  • Chunk Size: {rag['target_chunk_size']} tokens
-  • Overlap:    {int(rag['target_chunk_size'] * 0.1)} tokens (10%)
+  • Chunk Size: {rag['target_chunk_size']} chars
+  • Overlap:    {rag['chunk_overlap']} chars ({rag['overlap_overhead']:.0f}% overhead measured)
   • Retrieval:  Top-K = 5-10 chunks
   • Reranking:  Use cross-encoder for best results
   • Caching:    Cache top 20% most accessed chunks
@@ -429,7 +873,7 @@ def format_file_details(results):
         details += f"   Characters: {file_data['chars']:,}\n"
         details += f"   Tokens:     {file_data['tokens']:,}\n"
         details += f"   RAG Chunks: {file_data['chunks']}\n"
-        details += f"   Avg/Chunk:  {file_data['avg_chunk_size']:.0f} tokens\n"
+        details += f"   Avg/Chunk:  {file_data['avg_chunk_size']:.0f} chars (~{file_data['avg_chunk_tokens']:.0f} tokens)\n"
         details += "\n"
     
     return details
@@ -445,7 +889,60 @@ def check_dependencies():
     return len(missing) == 0, missing
 
 
+def collect_files(paths):
+    """Expand folders (recursively) into text files; plain files pass through."""
+    file_paths = []
+    for path in paths:
+        if os.path.isdir(path):
+            for root, dirs, filenames in os.walk(path):
+                for filename in sorted(filenames):
+                    if Path(filename).suffix.lower() in TEXT_EXTENSIONS:
+                        file_paths.append(os.path.join(root, filename))
+        else:
+            file_paths.append(path)
+    return file_paths
+
+
+def main(argv=None):
+    """Headless CLI: analyze files/folders and print JSON or the text summary"""
+    parser = argparse.ArgumentParser(description="Token Manager (headless)")
+    parser.add_argument('paths', nargs='+', help="Files or folders to analyze")
+    parser.add_argument('--model', default='gpt-4', choices=sorted(MODEL_PRICING))
+    parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE, help="RAG chunk size in characters")
+    parser.add_argument('--chunk-overlap', type=int, default=DEFAULT_CHUNK_OVERLAP, help="RAG chunk overlap in characters")
+    parser.add_argument('--no-embeddings', action='store_true', help="Exclude embedding costs")
+    parser.add_argument('--workers', type=int, default=None, help="Worker threads (default: CPU count)")
+    parser.add_argument('--no-cache', action='store_true', help="Do not read or write the count cache")
+    parser.add_argument('--cache-path', default=None, help="Count cache database (default: user data directory)")
+    parser.add_argument('--json', action='store_true', help="Print the full analysis as JSON")
+    args = parser.parse_args(argv)
+    if args.chunk_size <= 0:
+        parser.error("--chunk-size must be positive")
+    if not 0 <= args.chunk_overlap < args.chunk_size:
+        parser.error("--chunk-overlap must be at least 0 and smaller than --chunk-size")
+    
+    results = analyze_tokens(
+        collect_files(args.paths),
+        args.model,
+        args.chunk_size,
+        include_embeddings=not args.no_embeddings,
+        max_workers=args.workers,
+        chunk_overlap=args.chunk_overlap,
+        use_cache=not args.no_cache,
+        cache_path=args.cache_path
+    )
+    
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        print(format_summary(results))
+
+
 if __name__ == "__main__":
+    if len(sys.argv) > 1:
+        main()
+        sys.exit(0)
+    
     # Test script
     print("Token Manager Worker Module")
     print("=" * 50)
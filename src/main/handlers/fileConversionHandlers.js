@@ -8,7 +8,7 @@ const { runPythonScript } = require('../utils');
 async function handleImageConversion(payload) {
     log.info('Starting image conversion...');
     
-    const { mode, input, output_format, output_path, output_dir, quality } = payload;
+    const { mode, input, output_format, output_path, output_dir, quality, max_dimension, max_workers } = payload;
     
     try {
         const result = await runPythonScript({
@@ -20,7 +20,9 @@ async function handleImageConversion(payload) {
                 output_format: output_format,
                 output_path: output_path,
                 output_dir: output_dir,
-                quality: quality || 95
+                quality: quality || 95,
+                max_dimension: max_dimension,
+                max_workers: max_workers
             })
         });
         
@@ -58,16 +60,19 @@ async function handlePdfToMarkdown(payload) {
 async function handlePdfTableExtraction(payload) {
     log.info('Starting PDF table extraction...');
     
-    const { input, output_format, output_dir } = payload;
+    const { mode, input, output_format, output_dir, engine, max_workers } = payload;
     
     try {
         const result = await runPythonScript({
             scriptName: 'pdf_table_extractor.py',
             args: [],
             inputData: JSON.stringify({
+                mode: mode || (Array.isArray(input) ? 'batch' : 'single'),
                 input: input,
                 output_format: output_format || 'csv',
-                output_dir: output_dir
+                output_dir: output_dir,
+                engine: engine || 'tabula',
+                max_workers: max_workers
             })
         });
         
@@ -103,16 +108,20 @@ async function handleMarkdownToDocx(payload) {
 async function handleTextConversion(payload) {
     log.info('Starting text file conversion...');
     
-    const { input, output, output_format } = payload;
+    const { mode, input, output, output_format, output_formats, output_dir, max_workers } = payload;
     
     try {
         const result = await runPythonScript({
             scriptName: 'text_converter.py',
             args: [],
             inputData: JSON.stringify({
+                mode: mode || 'single',
                 input: input,
                 output: output,
-                output_format: output_format
+                output_format: output_format,
+                output_formats: output_formats,
+                output_dir: output_dir,
+                max_workers: max_workers
             })
         });
         
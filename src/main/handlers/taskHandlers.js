@@ -117,6 +117,10 @@ const setupTaskHandlers = () => {
             const userDataPath = app.getPath('userData');
             const outputDir = path.join(userDataPath, 'output');
             payload.outputDir = outputDir;
+            payload.cacheDir = path.join(userDataPath, 'scrapy_cache');
+            payload.writablePath = userDataPath;
+            // Near-duplicate pages are skipped unless the caller opts out
+            payload.skipNearDuplicates = payload.skipNearDuplicates !== false;
             
             const result = await runPythonScript({
                 scriptName: 'scrapy_worker.py',
@@ -139,7 +143,7 @@ const setupTaskHandlers = () => {
         }
     });
 
-    ipcMain.handle('scrapy-scrape', async (event, { url, mode }) => {
+    ipcMain.handle('scrapy-scrape', async (event, { url, mode, skipNearDuplicates }) => {
         try {
             const userDataPath = app.getPath('userData');
             const outputDir = path.join(userDataPath, 'output', 'scrapy');
@@ -150,7 +154,9 @@ const setupTaskHandlers = () => {
                     task: 'scrape',
                     urls: [url],
                     scrapeType: mode || 'content',
-                    outputDir: outputDir
+                    outputDir: outputDir,
+                    cacheDir: path.join(userDataPath, 'scrapy_cache'),
+                    skipNearDuplicates: skipNearDuplicates !== false
                 })],
                 event: event,
                 progressChannel: 'scrapy-progress'